@@ -0,0 +1,400 @@
+"""Benchmark every patch at several image sizes and compare against a baseline.
+
+    python benchmarks/bench.py                               # all patches, all sizes
+    python benchmarks/bench.py --sizes 0.25,1 --patches pixel-sort,echo
+    python benchmarks/bench.py --save-baseline               # record benchmarks/baseline.json
+    python benchmarks/bench.py --baseline benchmarks/baseline.json --tolerance 0.2
+
+Each run goes through ``op`` in a fresh process (daemon bypassed), exactly as a
+deployed call would, on a synthetic image of the requested size. For every
+(patch, size) the median wall time over ``--repeat`` runs, the median kernel
+time (Python patches, from ``--profile-json``) and the peak RSS are written to
+``--output``. With a baseline, a case fails when its median wall time exceeds
+the baseline's by more than ``--tolerance`` (relative) plus ``--slack``
+(absolute seconds, absorbing startup noise); the exit status is then 1.
+Baselines are machine-specific: record one on the machine you compare on.
+
+Approximate modes of a patch (``VARIANTS``) run as extra cases named
+``patch:variant``, which also report how far their output deviates from the
+patch's exact output on the same image.
+
+    python benchmarks/bench.py --diffusion                   # error-diffusion MP/s
+
+``--diffusion`` instead times every error-diffusion kernel in this process,
+on one synthetic image of ``DIFFUSION_MP`` megapixels: through bit-crush's
+level table, and through closest-palette's cube both cold (the first image
+of a palette) and warm. The numbers quoted in the README are in
+``DIFFUSION_MP_S``, next to which the measured ones are printed.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OP = os.path.join(ROOT, "op")
+BENCH_DIR = os.path.join(ROOT, "benchmarks")
+
+SIZES_MP = (0.25, 1.0, 4.0, 16.0, 48.0)
+
+# Representative arguments per patch; patches not listed run with their defaults
+CASES: dict[str, list[str]] = {
+    "bit-crush": ["--bits", "3"],
+    "closest-palette": ["--palette", "#000000,#ffffff,#d03020,#20a040,#2040c0,#f0d020"],
+    "echo": ["--count", "6"],
+    "pixel-sort": ["--by", "hue", "--threshold", "150"],
+    "scan-glitch": ["--seed", "1"],
+    "seam-carve": ["--percent", "10"],
+    "stipple": ["--seed", "1"],
+    "tile-shuffle": ["--seed", "1"],
+}
+
+# Approximate modes, benchmarked after their patch with these arguments added
+VARIANTS: dict[str, dict[str, list[str]]] = {
+    "seam-carve": {"pyramid": ["--pyramid", "2"]},
+}
+
+
+# Error diffusion in MP/s on one core at DIFFUSION_MP megapixels, as quoted
+# in the README: the median of three --diffusion --repeat 5 runs (Python 3.11)
+DIFFUSION_MP = 12.0
+DIFFUSION_MP_S: dict[str, dict[str, float]] = {
+    "bit-crush": {"floyd-steinberg": 16.9, "atkinson": 13.1, "jarvis": 10.0},
+    "closest-palette cold": {"floyd-steinberg": 8.5, "atkinson": 8.0, "jarvis": 6.4},
+    "closest-palette warm": {"floyd-steinberg": 12.4, "atkinson": 10.5, "jarvis": 9.3},
+}
+
+
+def list_patches() -> list[str]:
+    """Every patch directory with a ``.py`` or ``.sh`` entry point, like ``op --list``."""
+    return sorted(
+        name
+        for name in os.listdir(ROOT)
+        if os.path.isfile(os.path.join(ROOT, name, f"{name}.py"))
+        or os.path.isfile(os.path.join(ROOT, name, f"{name}.sh"))
+    )
+
+
+def is_script(patch: str) -> bool:
+    """ImageMagick patches are shell scripts and report no stage timings."""
+    return not os.path.isfile(os.path.join(ROOT, patch, f"{patch}.py"))
+
+
+def image_shape(megapixels: float) -> tuple[int, int]:
+    """(width, height) of a 4:3 image with about ``megapixels`` million pixels."""
+    height = max(1, round(math.sqrt(megapixels * 1e6 * 3 / 4)))
+    return max(1, round(height * 4 / 3)), height
+
+
+def synthetic_image(path: str, megapixels: float, seed: int = 0) -> tuple[int, int]:
+    """Write a deterministic test photo: gradients, a fine pattern and noise."""
+    width, height = image_shape(megapixels)
+    y, x = np.ogrid[:height, :width]
+    rng = np.random.default_rng(seed)
+    pixels = np.empty((height, width, 3), dtype=np.uint8)
+    pixels[..., 0] = (x * 255 // max(1, width - 1)).astype(np.uint8)
+    pixels[..., 1] = (y * 255 // max(1, height - 1)).astype(np.uint8)
+    pixels[..., 2] = (128 + 127 * np.sin(x * 0.05) * np.cos(y * 0.03)).astype(np.uint8)
+    pixels ^= rng.integers(0, 24, size=pixels.shape, dtype=np.uint8)
+    Image.fromarray(pixels).save(path)
+    return width, height
+
+
+def _maxrss_mib(rusage: Any) -> float:
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    return rusage.ru_maxrss / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+
+
+def measure(
+    patch: str, input_path: str, output_path: str, timeout: float, extra: Sequence[str] = ()
+) -> dict[str, Any]:
+    """One ``op`` invocation: wall seconds, peak RSS in MiB, and kernel seconds if reported."""
+    args = [OP, patch, input_path, output_path, *CASES.get(patch, []), *extra]
+    if not is_script(patch):
+        args.append("--profile-json")
+    env = {**os.environ, "OPIMG_NO_DAEMON": "1"}
+
+    with tempfile.TemporaryFile("w+") as stderr:
+        start = time.perf_counter()
+        proc = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=stderr, env=env)
+        timer = threading.Timer(timeout, proc.kill)
+        timer.start()
+        # Reap the child ourselves: wait4 reports its peak RSS (and that of the
+        # ImageMagick processes a script waited for)
+        _, status, rusage = os.wait4(proc.pid, 0)
+        wall = time.perf_counter() - start
+        timer.cancel()
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        stderr.seek(0)
+        lines = stderr.read().strip().splitlines()
+
+    if wall >= timeout and proc.returncode != 0:
+        return {"status": "timeout"}
+    if proc.returncode != 0:
+        return {"status": "error", "error": lines[-1] if lines else f"exit status {proc.returncode}"}
+
+    run: dict[str, Any] = {"status": "ok", "wall": wall, "peak_rss_mib": _maxrss_mib(rusage)}
+    if not is_script(patch) and lines:
+        try:
+            report = json.loads(lines[-1])
+            run["kernel"] = sum(s["wall_ms"] for s in report["stages"] if s["stage"] == "kernel") / 1e3
+        except (ValueError, KeyError):
+            pass
+    return run
+
+
+def output_name(workdir: str, patch: str, variant: Optional[str] = None) -> str:
+    return os.path.join(workdir, f"out-{patch}{'-' + variant if variant else ''}.png")
+
+
+def bench_case(
+    patch: str, input_path: str, workdir: str, repeat: int, timeout: float, variant: Optional[str] = None
+) -> dict[str, Any]:
+    """Median wall/kernel time and peak RSS of ``repeat`` runs of one patch (or variant) on one image."""
+    output_path = output_name(workdir, patch, variant)
+    extra = VARIANTS[patch][variant] if variant else []
+    walls, kernels, peak = [], [], 0.0
+    for _ in range(repeat):
+        run = measure(patch, input_path, output_path, timeout, extra)
+        if run["status"] != "ok":
+            return run
+        walls.append(run["wall"])
+        if "kernel" in run:
+            kernels.append(run["kernel"])
+        peak = max(peak, run["peak_rss_mib"])
+    case = {"status": "ok", "median_s": round(statistics.median(walls), 4), "peak_rss_mib": round(peak, 1)}
+    if kernels:
+        case["kernel_median_s"] = round(statistics.median(kernels), 4)
+    return case
+
+
+def deviation(reference_path: str, path: str) -> dict[str, Any]:
+    """How far the image at ``path`` is from the one at ``reference_path``.
+
+    ``deviation_mae`` is the mean absolute difference per channel (0-255) and
+    ``deviation_changed`` the fraction of pixels that differ at all.
+    """
+    reference = np.asarray(Image.open(reference_path).convert("RGB"))
+    result = np.asarray(Image.open(path).convert("RGB"))
+    if reference.shape != result.shape:
+        return {"deviation_mae": None, "deviation_changed": 1.0}
+    diff = np.abs(reference.astype(np.int16) - result)
+    return {
+        "deviation_mae": round(float(diff.mean()), 3),
+        "deviation_changed": round(float(diff.any(axis=2).mean()), 4),
+    }
+
+
+def environment() -> dict[str, Any]:
+    """What the numbers depend on besides the code."""
+    import PIL
+
+    try:
+        commit = subprocess.run(
+            ["git", "-C", ROOT, "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pillow": PIL.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def size_key(megapixels: float) -> str:
+    return f"{megapixels:g}MP"
+
+
+def run_benchmarks(
+    patches: Sequence[str], sizes: Sequence[float], repeat: int, timeout: float, workdir: str
+) -> dict[str, dict[str, Any]]:
+    """``{patch: {"1MP": case, ...}}`` for every requested patch, and variant, and size."""
+    has_magick = shutil.which("magick") is not None
+    names = [(patch, None) for patch in patches]
+    names += [(patch, variant) for patch in patches for variant in VARIANTS.get(patch, {})]
+    results: dict[str, dict[str, Any]] = {f"{patch}:{v}" if v else patch: {} for patch, v in names}
+    for megapixels in sizes:
+        input_path = os.path.join(workdir, f"input-{size_key(megapixels)}.png")
+        width, height = synthetic_image(input_path, megapixels)
+        for patch, variant in names:
+            name = f"{patch}:{variant}" if variant else patch
+            if is_script(patch) and not has_magick:
+                case = {"status": "skipped", "error": "ImageMagick not installed"}
+            else:
+                case = bench_case(patch, input_path, workdir, repeat, timeout, variant)
+            if variant and case["status"] == "ok" and results[patch][size_key(megapixels)]["status"] == "ok":
+                case.update(deviation(output_name(workdir, patch), output_name(workdir, patch, variant)))
+            case.update(width=width, height=height)
+            results[name][size_key(megapixels)] = case
+            print(f"{name:>18} {size_key(megapixels):>7}  {describe(case)}", file=sys.stderr)
+    return results
+
+
+def diffusion_throughput(megapixels: float, repeat: int, workdir: str) -> dict[str, dict[str, float]]:
+    """Median MP/s over ``repeat`` runs of every error-diffusion kernel, shaped like ``DIFFUSION_MP_S``."""
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    from opimg.cache import CACHE_DIR_ENV
+    from opimg.dither import KERNELS
+    from opimg.effects import closest_palette
+    from opimg.registry import get_effect
+
+    path = os.path.join(workdir, "diffusion.png")
+    width, height = synthetic_image(path, megapixels)
+    pixels = np.asarray(Image.open(path).convert("RGB"))
+    palette = CASES["closest-palette"][CASES["closest-palette"].index("--palette") + 1]
+
+    def rate(name: str, **params: Any) -> float:
+        start = time.perf_counter()
+        get_effect(name)(pixels, **params)
+        return round(width * height / 1e6 / (time.perf_counter() - start), 2)
+
+    runs: dict[str, dict[str, list[float]]] = {name: {kernel: [] for kernel in KERNELS} for name in DIFFUSION_MP_S}
+    # A cube stored under $OPIMG_CACHE_DIR would make every run warm
+    cache_dir = os.environ.pop(CACHE_DIR_ENV, None)
+    try:
+        for _ in range(repeat):
+            for kernel in KERNELS:
+                runs["bit-crush"][kernel].append(rate("bit-crush", bits=3, dither=kernel))
+                closest_palette._cube.cache_clear()
+                runs["closest-palette cold"][kernel].append(rate("closest-palette", palette=palette, dither=kernel))
+                runs["closest-palette warm"][kernel].append(rate("closest-palette", palette=palette, dither=kernel))
+    finally:
+        if cache_dir is not None:
+            os.environ[CACHE_DIR_ENV] = cache_dir
+    return {
+        name: {kernel: statistics.median(rates) for kernel, rates in kernels.items()} for name, kernels in runs.items()
+    }
+
+
+def describe(case: dict[str, Any]) -> str:
+    if case["status"] != "ok":
+        return case["status"] + (f": {case['error']}" if case.get("error") else "")
+    kernel = f"  kernel {case['kernel_median_s']:.3f}s" if "kernel_median_s" in case else ""
+    line = f"{case['median_s']:.3f}s{kernel}  {case['peak_rss_mib']:.0f} MiB"
+    if "deviation_changed" in case:
+        mae = "n/a" if case["deviation_mae"] is None else f"{case['deviation_mae']:.2f}"
+        line += f"  vs exact: MAE {mae}, {case['deviation_changed']:.1%} of pixels differ"
+    return line
+
+
+def compare(
+    results: dict[str, dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+    tolerance: float,
+    slack: float,
+) -> list[str]:
+    """Describe every case slower than its baseline beyond ``tolerance``/``slack``."""
+    regressions = []
+    for patch, sizes in results.items():
+        for size, case in sizes.items():
+            base = baseline.get(patch, {}).get(size)
+            if base is None or base["status"] != "ok" or case["status"] == "skipped":
+                continue
+            if case["status"] != "ok":
+                regressions.append(f"{patch} {size}: {case['status']} (baseline {base['median_s']:.3f}s)")
+                continue
+            limit = base["median_s"] * (1 + tolerance) + slack
+            if case["median_s"] > limit:
+                ratio = case["median_s"] / base["median_s"]
+                regressions.append(
+                    f"{patch} {size}: {case['median_s']:.3f}s vs baseline {base['median_s']:.3f}s ({ratio:.2f}x)"
+                )
+    return regressions
+
+
+def _parse_sizes(text: str) -> list[float]:
+    return [float(s) for s in text.split(",") if s.strip()]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark every patch at several image sizes.")
+    parser.add_argument("--sizes", type=_parse_sizes, default=None,
+                        help=f"Comma-separated megapixel sizes (default: {','.join(f'{s:g}' for s in SIZES_MP)})")
+    parser.add_argument("--patches", default=None, help="Comma-separated patch names (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the median is kept (default: 3)")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds before a run is abandoned (default: 600)")
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results.json"),
+                        help="Where to write the results (default: benchmarks/results.json)")
+    parser.add_argument("--baseline", default=os.path.join(BENCH_DIR, "baseline.json"),
+                        help="Results to compare against, if the file exists (default: benchmarks/baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Also write the results to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative slowdown before failing (default: 0.25)")
+    parser.add_argument("--slack", type=float, default=0.05,
+                        help="Allowed absolute slowdown in seconds, on top of --tolerance (default: 0.05)")
+    parser.add_argument("--diffusion", action="store_true",
+                        help="Only time error diffusion in this process, at the first --sizes "
+                             f"(default: {DIFFUSION_MP:g})")
+    args = parser.parse_args(argv)
+
+    if args.diffusion:
+        megapixels = args.sizes[0] if args.sizes else DIFFUSION_MP
+        with tempfile.TemporaryDirectory(prefix="opimg-bench-") as workdir:
+            diffusion = diffusion_throughput(megapixels, max(1, args.repeat), workdir)
+        for name, kernels in diffusion.items():
+            for kernel, rate in kernels.items():
+                recorded = DIFFUSION_MP_S.get(name, {}).get(kernel)
+                print(f"{name:>20} {kernel:>15}  {rate:5.1f} MP/s  (README: {recorded:g})", file=sys.stderr)
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment(), "diffusion": diffusion}, f, indent=2)
+        print(f"Wrote {args.output}", file=sys.stderr)
+        return 0
+
+    patches = list_patches()
+    if args.patches:
+        wanted = args.patches.split(",")
+        unknown = sorted(set(wanted) - set(patches))
+        if unknown:
+            parser.error(f"unknown patch(es): {', '.join(unknown)}")
+        patches = wanted
+
+    with tempfile.TemporaryDirectory(prefix="opimg-bench-") as workdir:
+        results = run_benchmarks(patches, args.sizes or SIZES_MP, max(1, args.repeat), args.timeout, workdir)
+    report = {"environment": environment(), "results": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}", file=sys.stderr)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline {args.baseline}", file=sys.stderr)
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one", file=sys.stderr)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline["results"], args.tolerance, args.slack)
+    for line in regressions:
+        print(f"SLOWER {line}", file=sys.stderr)
+    print(
+        f"{len(regressions)} regression(s) against {args.baseline} "
+        f"(commit {baseline['environment'].get('commit')})",
+        file=sys.stderr,
+    )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
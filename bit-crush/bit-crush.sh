@@ -1,25 +1,35 @@
 #!/bin/bash
 # bit-crush.sh — Reduce color depth by posterizing an image
 #
-# Usage: ./bit-crush.sh <input> [output] [--bits N]
-#   input  - Source image (GIF, PNG, JPG, etc.)
-#   output - Output PNG path (default: <input>-crush-Nbit.png)
-#   --bits  - Bit depth per channel (default: 3)
+# Usage: ./bit-crush.sh <input> [output] [--bits N] [--dither METHOD] [--format FMT]
+#   input  - Source image (GIF, PNG, JPG, etc.), or - for stdin
+#   output - Output PNG path, or - for stdout (default: <input>-crush-Nbit.png; stdout when reading stdin)
+#   --bits   - Bit depth per channel (default: 3)
+#   --dither - none, floyd-steinberg, atkinson, jarvis, bayer-2, bayer-4, bayer-8,
+#              bayer-16 or blue-noise (default: none); dithered renders run in the
+#              opimg port, as ImageMagick has no Atkinson, Jarvis or blue noise
+#   --format - Output format, e.g. png or jpg (default: from the output extension; png on stdout)
 #
 # Example:
 #   ./bit-crush.sh ~/Desktop/photo.png
 #   ./bit-crush.sh ~/Desktop/photo.png ~/output/result.png --bits 2
+#   ./bit-crush.sh ~/Desktop/photo.png --bits 1 --dither floyd-steinberg
+#   curl -s https://example.com/photo.jpg | ./bit-crush.sh - --bits 2 > result.png
 
 set -euo pipefail
 
 BITS=3
+DITHER="none"
 INPUT=""
 OUTPUT=""
+FORMAT=""
 
 while [ $# -gt 0 ]; do
   case "$1" in
-    --bits) BITS="$2"; shift 2 ;;
-    -*)     echo "Unknown option: $1" >&2; exit 1 ;;
+    --bits)   BITS="$2"; shift 2 ;;
+    --dither) DITHER="$2"; shift 2 ;;
+    --format) FORMAT="$2"; shift 2 ;;
+    -?*)      echo "Unknown option: $1" >&2; exit 1 ;;
     *)
       if [ -z "$INPUT" ]; then INPUT="$1"
       elif [ -z "$OUTPUT" ]; then OUTPUT="$1"
@@ -29,15 +39,20 @@ while [ $# -gt 0 ]; do
 done
 
 if [ -z "$INPUT" ]; then
-  echo "Usage: $0 <input> [output] [--bits N]" >&2
+  echo "Usage: $0 <input> [output] [--bits N] [--dither METHOD] [--format FMT]" >&2
   exit 1
 fi
 
-if [ ! -f "$INPUT" ]; then
+if [ "$INPUT" != "-" ] && [ ! -f "$INPUT" ]; then
   echo "Error: File not found: $INPUT" >&2
   exit 1
 fi
 
+# Reading stdin writes to stdout unless an output is given
+if [ "$INPUT" = "-" ] && [ -z "$OUTPUT" ]; then
+  OUTPUT="-"
+fi
+
 LEVELS=$(( 1 << BITS ))
 
 if [ -z "$OUTPUT" ]; then
@@ -46,6 +61,27 @@ if [ -z "$OUTPUT" ]; then
   OUTPUT="${DIR}/${BASE}-crush-${BITS}bit.png"
 fi
 
-magick "$INPUT" -posterize "$LEVELS" "$OUTPUT"
+# ImageMagick picks the format from a "png:" style prefix, and "-" is stdin/stdout
+if [ "$OUTPUT" = "-" ]; then
+  TARGET="${FORMAT:-png}:-"
+elif [ -n "$FORMAT" ]; then
+  TARGET="${FORMAT}:${OUTPUT}"
+else
+  TARGET="$OUTPUT"
+fi
+
+if [ "$DITHER" != "none" ]; then
+  ROOT="$(cd "$(dirname "$0")/.." && pwd)"
+  ARGS=("$INPUT" "$OUTPUT" --bits "$BITS" --dither "$DITHER")
+  if [ -n "$FORMAT" ]; then
+    ARGS+=(--format "$FORMAT")
+  elif [ "$OUTPUT" = "-" ]; then
+    # PNG on stdout, as without --dither, whatever the port's own default
+    ARGS+=(--format png)
+  fi
+  PYTHONPATH="$ROOT${PYTHONPATH:+:$PYTHONPATH}" exec python3 -m opimg bit-crush "${ARGS[@]}"
+fi
+
+magick "$INPUT" -posterize "$LEVELS" "$TARGET"
 
 echo "${BITS}-bit crush (${LEVELS} levels) → $OUTPUT" >&2
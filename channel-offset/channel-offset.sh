@@ -1,21 +1,24 @@
 #!/bin/bash
 # channel-offset.sh — Shift RGB channels by independent pixel offsets
 #
-# Usage: ./channel-offset.sh <input> [output] [--r X,Y] [--g X,Y] [--b X,Y]
-#   input  - Source image (GIF, PNG, JPG, etc.)
-#   output - Output PNG path (default: <input>-offset.png)
+# Usage: ./channel-offset.sh <input> [output] [--r X,Y] [--g X,Y] [--b X,Y] [--format FMT]
+#   input  - Source image (GIF, PNG, JPG, etc.), or - for stdin
+#   output - Output PNG path, or - for stdout (default: <input>-offset.png; stdout when reading stdin)
 #   --r     - Red channel offset in pixels (default: 30,15)
 #   --g     - Green channel offset in pixels (default: 0,0)
 #   --b     - Blue channel offset in pixels (default: -25,-10)
+#   --format - Output format, e.g. png or jpg (default: from the output extension; png on stdout)
 #
 # Example:
 #   ./channel-offset.sh ~/Desktop/photo.png --r 10,0 --b -10,0
 #   ./channel-offset.sh ~/Desktop/photo.png ~/output/result.png --g 0,5
+#   curl -s https://example.com/photo.jpg | ./channel-offset.sh - --r 10,0 > result.png
 
 set -euo pipefail
 
 INPUT=""
 OUTPUT=""
+FORMAT=""
 R_OFF="30,15"
 G_OFF="0,0"
 B_OFF="-25,-10"
@@ -25,7 +28,8 @@ while [ $# -gt 0 ]; do
     --r) R_OFF="$2"; shift 2 ;;
     --g) G_OFF="$2"; shift 2 ;;
     --b) B_OFF="$2"; shift 2 ;;
-    -*)  echo "Unknown option: $1" >&2; exit 1 ;;
+    --format) FORMAT="$2"; shift 2 ;;
+    -?*) echo "Unknown option: $1" >&2; exit 1 ;;
     *)
       if [ -z "$INPUT" ]; then INPUT="$1"
       elif [ -z "$OUTPUT" ]; then OUTPUT="$1"
@@ -35,21 +39,44 @@ while [ $# -gt 0 ]; do
 done
 
 if [ -z "$INPUT" ]; then
-  echo "Usage: $0 <input> [output] [--r X,Y] [--g X,Y] [--b X,Y]" >&2
+  echo "Usage: $0 <input> [output] [--r X,Y] [--g X,Y] [--b X,Y] [--format FMT]" >&2
   exit 1
 fi
 
-if [ ! -f "$INPUT" ]; then
+if [ "$INPUT" != "-" ] && [ ! -f "$INPUT" ]; then
   echo "Error: File not found: $INPUT" >&2
   exit 1
 fi
 
+# Reading stdin writes to stdout unless an output is given
+if [ "$INPUT" = "-" ] && [ -z "$OUTPUT" ]; then
+  OUTPUT="-"
+fi
+
+TMPDIR=$(mktemp -d)
+trap 'rm -rf "$TMPDIR"' EXIT
+
+# stdin can only be read once, and the input is read more than once below
+if [ "$INPUT" = "-" ]; then
+  cat > "${TMPDIR}/input"
+  INPUT="${TMPDIR}/input"
+fi
+
 if [ -z "$OUTPUT" ]; then
   DIR=$(dirname "$INPUT")
   BASE=$(basename "$INPUT" | sed 's/\.[^.]*$//')
   OUTPUT="${DIR}/${BASE}-offset.png"
 fi
 
+# ImageMagick picks the format from a "png:" style prefix, and "-" is stdin/stdout
+if [ "$OUTPUT" = "-" ]; then
+  TARGET="${FORMAT:-png}:-"
+elif [ -n "$FORMAT" ]; then
+  TARGET="${FORMAT}:${OUTPUT}"
+else
+  TARGET="$OUTPUT"
+fi
+
 parse_offset() {
   local off="$1"
   local x="${off%%,*}"
@@ -61,9 +88,6 @@ RX="${R_OFF%%,*}"; RY="${R_OFF##*,}"
 GX="${G_OFF%%,*}"; GY="${G_OFF##*,}"
 BX="${B_OFF%%,*}"; BY="${B_OFF##*,}"
 
-TMPDIR=$(mktemp -d)
-trap 'rm -rf "$TMPDIR"' EXIT
-
 # Separate into channels, roll each, recombine
 magick "$INPUT" -channel R -separate "${TMPDIR}/r.png"
 magick "$INPUT" -channel G -separate "${TMPDIR}/g.png"
@@ -73,6 +97,6 @@ magick "${TMPDIR}/r.png" -roll "+${RX}+${RY}" "${TMPDIR}/r.png"
 magick "${TMPDIR}/g.png" -roll "+${GX}+${GY}" "${TMPDIR}/g.png"
 magick "${TMPDIR}/b.png" -roll "+${BX}+${BY}" "${TMPDIR}/b.png"
 
-magick "${TMPDIR}/r.png" "${TMPDIR}/g.png" "${TMPDIR}/b.png" -combine "$OUTPUT"
+magick "${TMPDIR}/r.png" "${TMPDIR}/g.png" "${TMPDIR}/b.png" -combine "$TARGET"
 
 echo "Channel offset (r:${R_OFF} g:${G_OFF} b:${B_OFF}) → $OUTPUT" >&2
@@ -1,53 +1,16 @@
 #!/usr/bin/env python3
 """Rearrange RGB channels of an image."""
 
-import argparse
 import os
 import sys
 
-import numpy as np
-from PIL import Image
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-CHANNEL_MAP = {"R": 0, "G": 1, "B": 2}
-
-
-def channel_swap(image: Image.Image, mapping: str) -> Image.Image:
-    """Rearrange RGB channels according to a comma-separated mapping string."""
-    channels = [ch.strip().upper() for ch in mapping.split(",")]
-    if len(channels) != 3 or any(ch not in CHANNEL_MAP for ch in channels):
-        raise ValueError(f"Invalid channel map '{mapping}'. Use comma-separated R,G,B values (e.g. B,G,R)")
-    indices = [CHANNEL_MAP[ch] for ch in channels]
-    arr = np.array(image)
-    result = arr[:, :, indices]
-    return Image.fromarray(result)
+from opimg.cli import run_patch  # noqa: E402
 
 
 def main() -> None:
-    parser = argparse.ArgumentParser(description="Rearrange RGB channels of an image.")
-    parser.add_argument("input", help="Input image path")
-    parser.add_argument("output", nargs="?", default=None, help="Output image path")
-    parser.add_argument(
-        "--map",
-        default="B,G,R",
-        help="Channel mapping as comma-separated R,G,B values (default: B,G,R)",
-    )
-    args = parser.parse_args()
-
-    img = Image.open(args.input).convert("RGB")
-
-    result = channel_swap(img, args.map)
-
-    if args.output:
-        out_path = args.output
-    else:
-        base, ext = os.path.splitext(args.input)
-        out_path = f"{base}-chswap{ext or '.png'}"
-
-    result.save(out_path)
-    print(
-        f"Saved channel-swapped image to {out_path} (map={args.map})",
-        file=sys.stderr,
-    )
+    run_patch("channel-swap")
 
 
 if __name__ == "__main__":
@@ -1,21 +1,24 @@
 #!/bin/bash
 # fold.sh — Fold an image along an axis by mirroring or repeating one half
 #
-# Usage: ./fold.sh <input> [output] [--axis x|y] [--position N] [--mode mirror|repeat]
-#   input     - Source image (GIF, PNG, JPG, etc.)
-#   output    - Output PNG path (default: <input>-fold.png)
+# Usage: ./fold.sh <input> [output] [--axis x|y] [--position N] [--mode mirror|repeat] [--format FMT]
+#   input     - Source image (GIF, PNG, JPG, etc.), or - for stdin
+#   output    - Output PNG path, or - for stdout (default: <input>-fold.png; stdout when reading stdin)
 #   --axis     - Fold axis: x (vertical fold) or y (horizontal fold) (default: x)
 #   --position - Pixel position of fold line (default: center)
 #   --mode     - mirror or repeat (default: mirror)
+#   --format   - Output format, e.g. png or jpg (default: from the output extension; png on stdout)
 #
 # Example:
 #   ./fold.sh ~/Desktop/photo.png
 #   ./fold.sh ~/Desktop/photo.png --axis y --position 200 --mode repeat
+#   curl -s https://example.com/photo.jpg | ./fold.sh - --axis y > result.png
 
 set -euo pipefail
 
 INPUT=""
 OUTPUT=""
+FORMAT=""
 AXIS="x"
 POSITION=""
 MODE="mirror"
@@ -25,7 +28,8 @@ while [ $# -gt 0 ]; do
     --axis)     AXIS="$2"; shift 2 ;;
     --position) POSITION="$2"; shift 2 ;;
     --mode)     MODE="$2"; shift 2 ;;
-    -*)         echo "Unknown option: $1" >&2; exit 1 ;;
+    --format)   FORMAT="$2"; shift 2 ;;
+    -?*)        echo "Unknown option: $1" >&2; exit 1 ;;
     *)
       if [ -z "$INPUT" ]; then INPUT="$1"
       elif [ -z "$OUTPUT" ]; then OUTPUT="$1"
@@ -35,15 +39,29 @@ while [ $# -gt 0 ]; do
 done
 
 if [ -z "$INPUT" ]; then
-  echo "Usage: $0 <input> [output] [--axis x|y] [--position N] [--mode mirror|repeat]" >&2
+  echo "Usage: $0 <input> [output] [--axis x|y] [--position N] [--mode mirror|repeat] [--format FMT]" >&2
   exit 1
 fi
 
-if [ ! -f "$INPUT" ]; then
+if [ "$INPUT" != "-" ] && [ ! -f "$INPUT" ]; then
   echo "Error: File not found: $INPUT" >&2
   exit 1
 fi
 
+# Reading stdin writes to stdout unless an output is given
+if [ "$INPUT" = "-" ] && [ -z "$OUTPUT" ]; then
+  OUTPUT="-"
+fi
+
+TMPDIR=$(mktemp -d)
+trap 'rm -rf "$TMPDIR"' EXIT
+
+# stdin can only be read once, and the input is read more than once below
+if [ "$INPUT" = "-" ]; then
+  cat > "${TMPDIR}/input"
+  INPUT="${TMPDIR}/input"
+fi
+
 DIMS=$(magick identify -format "%wx%h" "$INPUT[0]")
 W=$(echo "$DIMS" | cut -dx -f1)
 H=$(echo "$DIMS" | cut -dx -f2)
@@ -63,8 +81,14 @@ if [ -z "$OUTPUT" ]; then
   OUTPUT="${DIR}/${BASE}-fold.png"
 fi
 
-TMPDIR=$(mktemp -d)
-trap 'rm -rf "$TMPDIR"' EXIT
+# ImageMagick picks the format from a "png:" style prefix, and "-" is stdin/stdout
+if [ "$OUTPUT" = "-" ]; then
+  TARGET="${FORMAT:-png}:-"
+elif [ -n "$FORMAT" ]; then
+  TARGET="${FORMAT}:${OUTPUT}"
+else
+  TARGET="$OUTPUT"
+fi
 
 if [ "$AXIS" = "x" ]; then
   # Vertical fold: crop left half, flip/tile to fill right
@@ -80,7 +104,7 @@ if [ "$AXIS" = "x" ]; then
   magick -size "${W}x${H}" xc:black \
     "${TMPDIR}/left.png" -geometry "+0+0" -composite \
     "${TMPDIR}/right.png" -geometry "+${POSITION}+0" -composite \
-    "$OUTPUT"
+    "$TARGET"
 else
   # Horizontal fold: crop top half, flip/tile to fill bottom
   magick "$INPUT" -crop "${W}x${POSITION}+0+0" +repage "${TMPDIR}/top.png"
@@ -94,7 +118,7 @@ else
   magick -size "${W}x${H}" xc:black \
     "${TMPDIR}/top.png" -geometry "+0+0" -composite \
     "${TMPDIR}/bottom.png" -geometry "+0+${POSITION}" -composite \
-    "$OUTPUT"
+    "$TARGET"
 fi
 
 echo "Fold ${AXIS}-axis at ${POSITION}px (${MODE}) → $OUTPUT" >&2
@@ -1,44 +1,16 @@
 #!/usr/bin/env python3
 """Invert the lightness channel of an image in LAB color space."""
 
-import argparse
 import os
 import sys
 
-import numpy as np
-from PIL import Image
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-
-def invert_lightness(image: Image.Image) -> Image.Image:
-    """Convert to LAB, invert L channel, convert back to RGB."""
-    lab = image.convert("LAB")
-    arr = np.array(lab)
-    arr[:, :, 0] = 255 - arr[:, :, 0]
-    lab_out = Image.merge("LAB", [Image.fromarray(arr[:, :, c]) for c in range(3)])
-    return lab_out.convert("RGB")
+from opimg.cli import run_patch  # noqa: E402
 
 
 def main() -> None:
-    parser = argparse.ArgumentParser(description="Invert the lightness channel of an image in LAB color space.")
-    parser.add_argument("input", help="Input image path")
-    parser.add_argument("output", nargs="?", default=None, help="Output image path")
-    args = parser.parse_args()
-
-    img = Image.open(args.input).convert("RGB")
-
-    result = invert_lightness(img)
-
-    if args.output:
-        out_path = args.output
-    else:
-        base, ext = os.path.splitext(args.input)
-        out_path = f"{base}-invl{ext or '.png'}"
-
-    result.save(out_path)
-    print(
-        f"Saved lightness-inverted image to {out_path}",
-        file=sys.stderr,
-    )
+    run_patch("invert-lightness")
 
 
 if __name__ == "__main__":
@@ -2,16 +2,18 @@
 # isolate-threshold.sh — Extract dark pixels with transparent background
 # Uses nearest-neighbor upscaling for a crisp, pixelated aesthetic
 #
-# Usage: ./isolate-threshold.sh <input> [output] [--scale N] [--threshold N] [--color "#hex"]
-#   input      - Source image (GIF, PNG, JPG, etc.)
-#   output     - Output PNG path (default: <input>-threshold.png)
+# Usage: ./isolate-threshold.sh <input> [output] [--scale N] [--threshold N] [--color "#hex"] [--format FMT]
+#   input      - Source image (GIF, PNG, JPG, etc.), or - for stdin
+#   output     - Output PNG path, or - for stdout (default: <input>-threshold.png; stdout when reading stdin)
 #   --scale     - Upscale multiplier (default: 1)
 #   --threshold - Black/white cutoff percentage (default: 50)
 #   --color     - Fill color for dark pixels (default: black)
+#   --format    - Output format, e.g. png or jpg (default: from the output extension; png on stdout)
 #
 # Example:
 #   ./isolate-threshold.sh ~/Desktop/sketch.gif
 #   ./isolate-threshold.sh ~/Desktop/sketch.gif --scale 4 --color "#ff0000"
+#   curl -s https://example.com/sketch.gif | ./isolate-threshold.sh - --scale 4 > result.png
 
 set -euo pipefail
 
@@ -20,13 +22,15 @@ THRESHOLD=50
 COLOR="#ff0000"
 INPUT=""
 OUTPUT=""
+FORMAT=""
 
 while [ $# -gt 0 ]; do
   case "$1" in
     --scale)     SCALE="$2"; shift 2 ;;
     --threshold) THRESHOLD="$2"; shift 2 ;;
     --color)     COLOR="$2"; shift 2 ;;
-    -*)          echo "Unknown option: $1" >&2; exit 1 ;;
+    --format)    FORMAT="$2"; shift 2 ;;
+    -?*)         echo "Unknown option: $1" >&2; exit 1 ;;
     *)
       if [ -z "$INPUT" ]; then INPUT="$1"
       elif [ -z "$OUTPUT" ]; then OUTPUT="$1"
@@ -36,21 +40,43 @@ while [ $# -gt 0 ]; do
 done
 
 if [ -z "$INPUT" ]; then
-  echo "Usage: $0 <input> [output] [--scale N] [--threshold N] [--color \"#hex\"]" >&2
+  echo "Usage: $0 <input> [output] [--scale N] [--threshold N] [--color \"#hex\"] [--format FMT]" >&2
   exit 1
 fi
 
-if [ ! -f "$INPUT" ]; then
+if [ "$INPUT" != "-" ] && [ ! -f "$INPUT" ]; then
   echo "Error: File not found: $INPUT" >&2
   exit 1
 fi
 
+# Reading stdin writes to stdout unless an output is given
+if [ "$INPUT" = "-" ] && [ -z "$OUTPUT" ]; then
+  OUTPUT="-"
+fi
+
+# stdin can only be read once, and the input is read more than once below
+if [ "$INPUT" = "-" ]; then
+  TMPDIR=$(mktemp -d)
+  trap 'rm -rf "$TMPDIR"' EXIT
+  cat > "${TMPDIR}/input"
+  INPUT="${TMPDIR}/input"
+fi
+
 if [ -z "$OUTPUT" ]; then
   DIR=$(dirname "$INPUT")
   BASE=$(basename "$INPUT" | sed 's/\.[^.]*$//')
   OUTPUT="${DIR}/${BASE}-threshold.png"
 fi
 
+# ImageMagick picks the format from a "png:" style prefix, and "-" is stdin/stdout
+if [ "$OUTPUT" = "-" ]; then
+  TARGET="${FORMAT:-png}:-"
+elif [ -n "$FORMAT" ]; then
+  TARGET="${FORMAT}:${OUTPUT}"
+else
+  TARGET="$OUTPUT"
+fi
+
 # Get original dimensions
 DIMS=$(magick identify -format "%wx%h" "$INPUT")
 W=$(echo "$DIMS" | cut -dx -f1)
@@ -67,7 +93,7 @@ if [ -n "$COLOR" ]; then
     \( +clone -fill "$COLOR" -colorize 100% \) \
     +swap -compose copy-opacity -composite \
     -filter point -resize "${NEW_W}x${NEW_H}" \
-    "$OUTPUT"
+    "$TARGET"
 else
   # Original behavior: black on transparent
   magick "$INPUT" \
@@ -75,7 +101,7 @@ else
     \( +clone -negate \) \
     -alpha off -compose copy-opacity -composite \
     -filter point -resize "${NEW_W}x${NEW_H}" \
-    "$OUTPUT"
+    "$TARGET"
 fi
 
 COLOR_LABEL="${COLOR:-black}"
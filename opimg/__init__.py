@@ -0,0 +1,12 @@
+"""op-img as a library: every patch as an in-process ``ndarray -> ndarray`` effect.
+
+    >>> import opimg
+    >>> out = opimg.apply("pixel-sort", pixels, by="hue", threshold=150)
+
+Importing the package is cheap; effect modules (and NumPy/Pillow/SciPy) are
+only imported when an effect is first looked up.
+"""
+
+from .registry import Effect, Param, apply, get_effect, list_effects, register
+
+__all__ = ["Effect", "Param", "apply", "get_effect", "list_effects", "register"]
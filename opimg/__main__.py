@@ -0,0 +1,6 @@
+"""``python -m opimg <command|patch> ...`` -- the in-process side of the ``op`` dispatcher."""
+
+from .cli import main
+
+if __name__ == "__main__":
+    main()
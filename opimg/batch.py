@@ -0,0 +1,206 @@
+"""Apply one patch to many files with a pool of warm worker processes.
+
+    op pixel-sort --batch 'frames/*.png' --out-dir out/ --jobs 8 --by hue
+
+Each worker imports the effect module once, then pulls files off the shared
+work queue until it is empty. Outputs keep the patch's usual suffix naming
+(``frame-psort.png``). Under ``--out-dir`` they keep their path below the
+glob's leading directories, so ``'shots/**/*.png'`` mirrors the tree of
+``shots/``; inputs that would still write the same file are refused before
+anything renders. A failing file is reported and skipped; the run carries on.
+With ``--max-memory``, a file whose estimate is over the limit fails that way
+before it is decoded.
+"""
+
+import argparse
+import glob
+import multiprocessing
+import os
+import sys
+import time
+from typing import Any, Iterable, Iterator, Optional, Sequence
+
+from .cache import ResultCache, add_cache_arguments, cache_from_args
+from .memory import add_memory_argument, check_limit, estimate_file
+from .registry import Effect, get_effect
+from .render import output_path_for, render_file
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tif", ".tiff", ".webp"}
+
+Outcome = tuple[str, Optional[str], Optional[str], float]
+
+_worker_effect: Optional[Effect] = None
+_worker_params: dict[str, Any] = {}
+_worker_out_dir: Optional[str] = None
+_worker_root: Optional[str] = None
+_worker_cache: Optional[ResultCache] = None
+_worker_max_memory: Optional[int] = None
+
+
+def expand_inputs(pattern: str) -> list[str]:
+    """A directory means every image directly inside it; anything else is a glob."""
+    if os.path.isdir(pattern):
+        paths = [
+            os.path.join(pattern, name)
+            for name in os.listdir(pattern)
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+        ]
+    else:
+        paths = glob.glob(pattern, recursive=True)
+    return sorted(p for p in paths if os.path.isfile(p))
+
+
+def input_root(pattern: str) -> str:
+    """The directory every match of ``pattern`` is under: a directory itself, or a glob's literal prefix."""
+    if os.path.isdir(pattern):
+        return pattern
+    literal = []
+    for part in os.path.dirname(pattern).split(os.sep):
+        if glob.has_magic(part):
+            break
+        literal.append(part)
+    return os.sep.join(literal) or "."
+
+
+def batch_output_path(
+    effect: Effect, params: dict[str, Any], input_path: str, out_dir: Optional[str], root: Optional[str] = None
+) -> str:
+    """Where ``input_path`` renders to: next to it, or under ``out_dir`` at its path relative to ``root``."""
+    path = output_path_for(effect, params, input_path)
+    if out_dir is None:
+        return path
+    subdir = os.path.relpath(os.path.dirname(input_path), root) if root else ""
+    return os.path.normpath(os.path.join(out_dir, subdir, os.path.basename(path)))
+
+
+def output_clashes(
+    effect: Effect, params: dict[str, Any], inputs: Iterable[str], out_dir: Optional[str], root: Optional[str] = None
+) -> list[tuple[str, str, str]]:
+    """``(first input, other input, output)`` for every input whose output an earlier one already writes."""
+    writers: dict[str, str] = {}
+    clashes = []
+    for input_path in inputs:
+        out_path = batch_output_path(effect, params, input_path, out_dir, root)
+        if out_path in writers:
+            clashes.append((writers[out_path], input_path, out_path))
+        else:
+            writers[out_path] = input_path
+    return clashes
+
+
+def _init_worker(
+    name: str,
+    params: dict[str, Any],
+    out_dir: Optional[str],
+    cache: Optional[ResultCache],
+    max_memory: Optional[int],
+    root: Optional[str],
+) -> None:
+    global _worker_effect, _worker_params, _worker_out_dir, _worker_cache, _worker_max_memory, _worker_root
+    _worker_effect = get_effect(name)
+    _worker_params = params
+    _worker_out_dir = out_dir
+    _worker_cache = cache
+    _worker_max_memory = max_memory
+    _worker_root = root
+
+
+def _process(input_path: str) -> Outcome:
+    """Render one file in a worker; never raises, so one bad file cannot stop the pool."""
+    start = time.perf_counter()
+    try:
+        out_path = batch_output_path(_worker_effect, _worker_params, input_path, _worker_out_dir, _worker_root)
+        if _worker_max_memory is not None:
+            check_limit(estimate_file(_worker_effect, _worker_params, input_path), _worker_max_memory)
+        if _worker_out_dir is not None:
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        render_file(_worker_effect, _worker_params, input_path, out_path, _worker_cache)
+        return input_path, out_path, None, time.perf_counter() - start
+    except Exception as e:  # noqa: BLE001 -- reported per file
+        return input_path, None, f"{type(e).__name__}: {e}", time.perf_counter() - start
+
+
+def run_batch(
+    name: str,
+    params: dict[str, Any],
+    inputs: Iterable[str],
+    out_dir: Optional[str],
+    jobs: int,
+    cache: Optional[ResultCache] = None,
+    max_memory: Optional[int] = None,
+    root: Optional[str] = None,
+) -> Iterator[Outcome]:
+    """Yield one outcome per input as workers finish them (completion order).
+
+    Files estimated to need more than ``max_memory`` bytes fail without rendering.
+    Outputs under ``out_dir`` keep their path relative to ``root`` (see ``batch_output_path``).
+    """
+    initargs = (name, params, out_dir, cache, max_memory, root)
+    if jobs <= 1:
+        _init_worker(*initargs)
+        yield from map(_process, inputs)
+        return
+    with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=initargs) as pool:
+        yield from pool.imap_unordered(_process, inputs)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0].startswith("-"):
+        print("Usage: op <patch> --batch <glob|dir> [--out-dir DIR] [--jobs N] [--args]", file=sys.stderr)
+        sys.exit(1)
+
+    name, rest = argv[0], argv[1:]
+    try:
+        effect = get_effect(name)
+    except KeyError as e:
+        print(f"Error: {e.args[0]}", file=sys.stderr)
+        sys.exit(1)
+
+    parser = argparse.ArgumentParser(prog=f"op {name} --batch", description=effect.description)
+    parser.add_argument("--batch", required=True, metavar="PATTERN",
+                        help="Glob pattern (quote it) or directory of input images")
+    parser.add_argument("--out-dir", default=None,
+                        help="Directory for outputs, mirroring the inputs' subdirectories "
+                             "(default: next to each input)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: number of CPUs)")
+    add_cache_arguments(parser)
+    add_memory_argument(parser)
+    effect.add_arguments(parser)
+    args = parser.parse_args(rest)
+    params = {p.name: getattr(args, p.name) for p in effect.params}
+
+    inputs = expand_inputs(args.batch)
+    if not inputs:
+        print(f"Error: no input files match: {args.batch}", file=sys.stderr)
+        sys.exit(1)
+    root = input_root(args.batch)
+    clashes = output_clashes(effect, params, inputs, args.out_dir, root)
+    for first, other, out_path in clashes:
+        print(f"Error: {first} and {other} would both write {out_path}", file=sys.stderr)
+    if clashes:
+        sys.exit(1)
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+
+    jobs = max(1, min(args.jobs, len(inputs)))
+    cache = cache_from_args(args)
+    start = time.perf_counter()
+    failed = 0
+    for input_path, out_path, error, _ in run_batch(
+        name, params, inputs, args.out_dir, jobs, cache, args.max_memory, root
+    ):
+        if error:
+            failed += 1
+            print(f"FAILED {input_path}: {error}", file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    done = len(inputs) - failed
+    print(
+        f"{name}: {done}/{len(inputs)} files in {elapsed:.2f}s with {jobs} worker(s)"
+        + (f", {failed} failed" if failed else ""),
+        file=sys.stderr,
+    )
+    if failed:
+        sys.exit(1)
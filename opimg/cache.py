@@ -0,0 +1,120 @@
+"""Content-addressed on-disk cache of rendered outputs.
+
+An entry is keyed on the input file's bytes, the patch name and version, the
+fully resolved (defaults filled in) parameters and the output format, and holds
+the encoded output bytes. A hit therefore skips decode, kernel and encode.
+Entries are evicted least-recently-used first (by mtime, refreshed on every hit)
+once the directory grows past its size limit.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Optional
+
+from .registry import Effect
+
+DEFAULT_MAX_BYTES = 1 << 30
+
+CACHE_DIR_ENV = "OPIMG_CACHE_DIR"
+
+_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def parse_size(text: str) -> int:
+    """``"512M"`` -> 536870912; accepts plain bytes and K/M/G/T suffixes (optionally ``...B``)."""
+    spec = text.strip().upper().removesuffix("B")
+    unit = spec[-1:] if spec[-1:] in _UNITS else ""
+    return int(float(spec[: len(spec) - len(unit)]) * _UNITS[unit])
+
+
+def cache_key(data: bytes, effect: Effect, params: dict[str, Any], format: str) -> str:
+    h = hashlib.sha256()
+    h.update(data)
+    canonical = json.dumps(
+        {"patch": effect.name, "version": effect.version, "params": effect.resolve(params), "format": format},
+        sort_keys=True,
+    )
+    h.update(canonical.encode())
+    return h.hexdigest()
+
+
+class ResultCache:
+    """A directory of ``<key[:2]>/<key>`` files bounded to ``max_bytes``."""
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            pass  # evicted by a concurrent writer; the bytes are still good
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so concurrent readers never see a partial entry
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete least-recently-used entries until the cache fits in ``max_bytes``."""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.startswith(".tmp-"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def derived_store(name: str, max_bytes: int) -> Optional[ResultCache]:
+    """A cache of data derived once and reused by renders (palettes, textures).
+
+    It lives in ``<$OPIMG_CACHE_DIR>/<name>``, or is None if the variable is unset.
+    """
+    directory = os.environ.get(CACHE_DIR_ENV)
+    return ResultCache(os.path.join(directory, name), max_bytes) if directory else None
+
+
+def add_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--cache-dir", default=os.environ.get(CACHE_DIR_ENV),
+                        help="Reuse results cached in this directory (default: $OPIMG_CACHE_DIR, off if unset)")
+    parser.add_argument("--cache-size", type=parse_size, default=DEFAULT_MAX_BYTES, metavar="SIZE",
+                        help="Evict least-recently-used results beyond this size, e.g. 500M (default: 1G)")
+
+
+def cache_from_args(args: argparse.Namespace) -> Optional[ResultCache]:
+    return ResultCache(args.cache_dir, args.cache_size) if args.cache_dir else None
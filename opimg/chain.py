@@ -0,0 +1,134 @@
+"""Run several patches in one process: decode once, pass arrays stage to stage, encode once.
+
+    op chain input.jpg out.png bit-crush --bits 2 :: scan-glitch --seed 3 :: echo --count 6
+    fetch | op chain --format jpeg - - bit-crush :: echo | upload
+
+``--max-memory`` estimates every stage at the input's size (from its header,
+stdin included) and refuses the chain before decoding if any is over.
+"""
+
+import argparse
+import sys
+from typing import Any, Optional, Sequence
+
+import numpy as np
+
+from .cli import add_format_argument
+from .io import (
+    STDIO,
+    DecodeError,
+    encode_image,
+    image_info,
+    output_format,
+    read_input,
+    sniff_format,
+    to_mode,
+    write_output,
+)
+from .memory import add_memory_argument, check_limit, estimate
+from .profile import Profiler, add_profile_arguments, print_report, profiler_from_args
+from .registry import Effect, get_effect
+from .render import decode_timed
+
+SEPARATOR = "::"
+
+Stage = tuple[Effect, dict[str, Any]]
+
+
+def split_stages(argv: Sequence[str]) -> list[list[str]]:
+    """``["a", "--x", "1", "::", "b"]`` -> ``[["a", "--x", "1"], ["b"]]``."""
+    stages: list[list[str]] = [[]]
+    for token in argv:
+        if token == SEPARATOR:
+            stages.append([])
+        else:
+            stages[-1].append(token)
+    return stages
+
+
+def parse_stage(tokens: Sequence[str]) -> Stage:
+    """Parse ``<patch> [--options]`` against the patch's parameter schema."""
+    if not tokens:
+        raise ValueError(f"empty stage (check the '{SEPARATOR}' separators)")
+    name, *options = tokens
+    try:
+        effect = get_effect(name)
+    except KeyError as e:
+        raise ValueError(e.args[0]) from None
+    parser = argparse.ArgumentParser(prog=f"op chain ... {name}", description=effect.description)
+    effect.add_arguments(parser)
+    args = parser.parse_args(options)
+    return effect, {p.name: getattr(args, p.name) for p in effect.params}
+
+
+def parse_stages(argv: Sequence[str]) -> list[Stage]:
+    return [parse_stage(tokens) for tokens in split_stages(argv)]
+
+
+def run_stages(pixels: np.ndarray, stages: Sequence[Stage], profiler: Optional[Profiler] = None) -> np.ndarray:
+    """Feed each stage the previous stage's array, converting colour modes only when needed."""
+    profiler = profiler or Profiler()
+    for effect, params in stages:
+        with profiler.stage("convert"):
+            pixels = to_mode(pixels, effect.mode)
+        with profiler.stage(f"kernel:{effect.name}"):
+            pixels = effect(pixels, **params)
+    return pixels
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="op chain",
+        description=f"Run patches back to back in one process, separated by '{SEPARATOR}'.",
+        usage=f"op chain [--format FORMAT] [--profile] [--max-memory SIZE] <input> <output> <patch> [--args] [{SEPARATOR} <patch> [--args] ...]",
+    )
+    parser.add_argument("input", help="Input image path, or - for stdin")
+    parser.add_argument("output", help="Output image path, or - for stdout")
+    add_format_argument(parser)
+    add_profile_arguments(parser)
+    add_memory_argument(parser)
+    parser.add_argument("stages", nargs=argparse.REMAINDER, help="Patches and their options")
+    args = parser.parse_args(argv)
+
+    if not args.stages:
+        parser.error("at least one patch is required")
+    try:
+        stages = parse_stages(args.stages)
+    except ValueError as e:
+        parser.error(str(e))
+
+    profiler = profiler_from_args(args) or Profiler()
+    try:
+        with profiler.stage("read"):
+            data = read_input(args.input)
+    except FileNotFoundError:
+        print(f"Error: file not found: {args.input}", file=sys.stderr)
+        sys.exit(1)
+
+    last = stages[-1][0]
+    try:
+        if args.max_memory is not None:
+            (width, height), mode = image_info(data)
+            for effect, params in stages:
+                check_limit(estimate(effect, params, width, height, mode), args.max_memory)
+        if args.output == STDIO:
+            format = args.format or last.format or sniff_format(data) or "PNG"
+        else:
+            format = output_format(args.output, args.format or last.format)
+        result = run_stages(decode_timed(data, stages[0][0].mode, profiler), stages, profiler)
+    except DecodeError:
+        source = "stdin" if args.input == STDIO else args.input
+        print(f"Error: cannot decode image from {source}", file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        parser.error(str(e))
+
+    with profiler.stage("encode"):
+        encoded = encode_image(result, format)
+    with profiler.stage("write"):
+        write_output(args.output, encoded)
+    names = " → ".join(effect.name for effect, _ in stages)
+    output = "<stdout>" if args.output == STDIO else args.output
+    print(f"Chained {names} → {output}", file=sys.stderr)
+    if args.profile or args.profile_json:
+        print_report(profiler, args, patch=names, input=args.input)
@@ -0,0 +1,96 @@
+"""Generic command line driver: builds each patch's argparse CLI from its schema."""
+
+import argparse
+import importlib
+import os
+import sys
+from typing import Optional, Sequence
+
+from .cache import add_cache_arguments, cache_from_args
+from .io import STDIO, DecodeError, parse_format
+from .memory import add_memory_argument, check_limit, estimate_file
+from .profile import add_profile_arguments, print_report, profiler_from_args
+from .registry import Effect, get_effect
+from .render import render_file
+
+
+def _format_type(text: str) -> str:
+    try:
+        return parse_format(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def add_format_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--format", type=_format_type, default=None, metavar="FORMAT",
+                        help="Output format, e.g. png or jpeg (default: from the output extension, "
+                             "or the input's format when writing to stdout)")
+
+
+def build_parser(effect: Effect, prog: Optional[str] = None) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog=prog, description=effect.description)
+    parser.add_argument("input", help="Input image path, or - for stdin")
+    parser.add_argument("output", nargs="?", default=None,
+                        help="Output image path, or - for stdout (default: stdout when reading stdin)")
+    effect.add_arguments(parser)
+    add_format_argument(parser)
+    add_cache_arguments(parser)
+    add_profile_arguments(parser)
+    add_memory_argument(parser)
+    return parser
+
+
+def run_patch(name: str, argv: Optional[Sequence[str]] = None, prog: Optional[str] = None) -> None:
+    """Entry point of a patch script: ``<patch> <input> [output] [options]``."""
+    effect = get_effect(name)
+    parser = build_parser(effect, prog)
+    args = parser.parse_args(argv)
+    params = {p.name: getattr(args, p.name) for p in effect.params}
+    profiler = profiler_from_args(args)
+
+    if args.input != STDIO and not os.path.isfile(args.input):
+        print(f"Error: file not found: {args.input}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        if args.max_memory is not None and args.input != STDIO:
+            check_limit(estimate_file(effect, params, args.input), args.max_memory)
+        context = render_file(
+            effect, params, args.input, args.output, cache_from_args(args), args.format, profiler
+        )
+    except DecodeError:
+        source = "stdin" if args.input == STDIO else args.input
+        print(f"Error: cannot decode image from {source}", file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        parser.error(str(e))
+    print(effect.report(context) + (" (cached)" if context.get("cached") else ""), file=sys.stderr)
+    print_report(profiler, args, patch=name, input=context["input"], cached=bool(context.get("cached")))
+
+
+# Subcommands of ``python -m opimg``; anything else is treated as a patch name.
+COMMANDS = {
+    "batch": "opimg.batch",
+    "chain": "opimg.chain",
+    "estimate": "opimg.memory",
+    "run-jobs": "opimg.jobs",
+    "serve": "opimg.serve",
+}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv:
+        print(f"Usage: python -m opimg <{'|'.join(COMMANDS)}|patch> [args]", file=sys.stderr)
+        sys.exit(1)
+
+    command, rest = argv[0], argv[1:]
+    if command in COMMANDS:
+        importlib.import_module(COMMANDS[command]).main(rest)
+        return
+    try:
+        get_effect(command)
+    except KeyError as e:
+        print(f"Error: {e.args[0]}", file=sys.stderr)
+        sys.exit(1)
+    run_patch(command, rest, prog=f"op {command}")
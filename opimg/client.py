@@ -0,0 +1,121 @@
+"""Client side of the ``op serve`` daemon.
+
+Kept to the standard library, with no imports from the rest of the package, so
+``op`` can run this file directly (``python3 -S opimg/client.py ...``) and routing
+a request costs a bare interpreter start plus one socket round trip.
+
+    python3 -S opimg/client.py pixel-sort photo.jpg out.png --by hue
+"""
+
+import base64
+import json
+import os
+import socket
+import sys
+from typing import Any, Optional, Sequence
+
+# Exit status meaning "no daemon answered"; ``op`` falls back to running locally.
+EX_TEMPFAIL = 75
+
+# Environment variables of the caller a routed run sees, as it would locally
+ENV_PREFIX = "OPIMG_"
+
+
+def caller_env() -> dict[str, str]:
+    """The caller's ``OPIMG_*`` variables (cache directory, start time, ...)."""
+    return {k: v for k, v in os.environ.items() if k.startswith(ENV_PREFIX)}
+
+
+def socket_path() -> str:
+    """``$OPIMG_SOCKET``, else ``opimg-<uid>/op.sock`` in ``$XDG_RUNTIME_DIR`` (or /tmp).
+
+    ``op serve`` creates the ``opimg-<uid>`` directory private to its user,
+    so on a shared /tmp no one else can put a socket there first.
+    """
+    if os.environ.get("OPIMG_SOCKET"):
+        return os.environ["OPIMG_SOCKET"]
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or "/tmp"
+    return os.path.join(runtime_dir, f"opimg-{os.getuid()}", "op.sock")
+
+
+def owned_by_caller(path: str) -> bool:
+    """Whether ``path`` exists and belongs to this user: a socket anyone else owns is never trusted."""
+    try:
+        return os.stat(path).st_uid == os.getuid()
+    except OSError:
+        return False
+
+
+def send_message(sock: socket.socket, message: dict[str, Any]) -> None:
+    sock.sendall(json.dumps(message).encode() + b"\n")
+
+
+def read_message(sock: socket.socket) -> Optional[dict[str, Any]]:
+    """Read one newline-terminated JSON message; None if the peer closed first."""
+    chunks = []
+    while True:
+        chunk = sock.recv(1 << 16)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk.endswith(b"\n"):
+            break
+    data = b"".join(chunks)
+    return json.loads(data) if data.strip() else None
+
+
+def request(message: dict[str, Any], path: Optional[str] = None) -> dict[str, Any]:
+    """Send one request to the daemon and return its reply.
+
+    Raises OSError if it is not running, or if another user owns its socket.
+    """
+    path = path or socket_path()
+    if not owned_by_caller(path):
+        raise ConnectionRefusedError(f"{path} is missing or owned by another user")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        send_message(sock, message)
+        reply = read_message(sock)
+    if reply is None:
+        raise ConnectionError("daemon closed the connection without replying")
+    return reply
+
+
+def is_running(path: Optional[str] = None) -> bool:
+    try:
+        return request({"op": "ping"}, path).get("ok", False)
+    except OSError:
+        return False
+
+
+def render(patch: str, data: bytes, format: str = "PNG", path: Optional[str] = None, **params: Any) -> bytes:
+    """Run ``patch`` on encoded image bytes in the daemon and return the encoded result."""
+    reply = request(
+        {
+            "op": "render",
+            "patch": patch,
+            "params": params,
+            "format": format,
+            "data": base64.b64encode(data).decode("ascii"),
+        },
+        path,
+    )
+    if "error" in reply:
+        raise RuntimeError(reply["error"])
+    return base64.b64decode(reply["data"])
+
+
+def run(argv: Sequence[str], path: Optional[str] = None) -> int:
+    """Run ``op`` arguments (a patch or ``chain``) in the daemon, relaying its output."""
+    try:
+        message = {"op": "run", "argv": list(argv), "cwd": os.getcwd(), "env": caller_env()}
+        reply = request(message, path)
+    except OSError:
+        return EX_TEMPFAIL
+    sys.stdout.write(reply.get("stdout", ""))
+    sys.stderr.write(reply.get("stderr", ""))
+    return reply["returncode"]
+
+
+if __name__ == "__main__":
+    sys.exit(run(sys.argv[1:]))
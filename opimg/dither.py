@@ -0,0 +1,342 @@
+"""Dithering shared by the quantizing patches: error diffusion and ordered thresholds.
+
+    op closest-palette photo.jpg --palette "#000,#fff,#f00" --dither floyd-steinberg
+    op bit-crush photo.jpg --bits 2 --dither atkinson
+    op posterize-hsv photo.jpg --dither blue-noise
+
+``diffuse`` walks the image in raster order as far as each pixel can tell:
+every pixel sees the error of all its kernel neighbours above and to the left
+before it is quantized. Pixels are not visited one by one, though. With a
+kernel spreading error at most ``-dx`` columns back per row down, pixel
+(y, x) only depends on pixels of an earlier wavefront ``x + slope * y``, for
+a slope above every such ``-dx / dy``. All the pixels of one wavefront (one
+per row) are therefore quantized in a single vectorized step, and the image
+takes ``width + slope * height`` steps. Errors waiting for later wavefronts
+live in a small ring of per-row accumulators, one slot per step ahead.
+
+``ordered`` has no such dependency: a threshold pattern (a Bayer matrix or a
+blue-noise texture, see ``threshold_map``) is tiled over the image, added in
+one broadcast and the result quantized, a band of rows at a time. The same
+pixel always gets the same threshold, so video frames dither consistently.
+
+Quantizers are supplied by the patch: any function from (..., C) uint8
+colors to their uint8 replacements, e.g. a palette lookup or a level table.
+"""
+
+import functools
+import hashlib
+import io
+from typing import Callable
+
+import numpy as np
+
+from .cache import derived_store
+
+# Error-diffusion kernels: (dy, dx, weight) for each neighbour the error of a
+# pixel is spread to. Atkinson spreads only 6/8 of it.
+KERNELS: dict[str, tuple[tuple[int, int, float], ...]] = {
+    "floyd-steinberg": ((0, 1, 7 / 16), (1, -1, 3 / 16), (1, 0, 5 / 16), (1, 1, 1 / 16)),
+    "atkinson": ((0, 1, 1 / 8), (0, 2, 1 / 8), (1, -1, 1 / 8), (1, 0, 1 / 8), (1, 1, 1 / 8), (2, 0, 1 / 8)),
+    "jarvis": (
+        (0, 1, 7 / 48), (0, 2, 5 / 48),
+        (1, -2, 3 / 48), (1, -1, 5 / 48), (1, 0, 7 / 48), (1, 1, 5 / 48), (1, 2, 3 / 48),
+        (2, -2, 1 / 48), (2, -1, 3 / 48), (2, 0, 5 / 48), (2, 1, 3 / 48), (2, 2, 1 / 48),
+    ),
+}
+
+# Ordered-dithering patterns: Bayer matrices by side, and a blue-noise texture
+PATTERNS = ["bayer-2", "bayer-4", "bayer-8", "bayer-16", "blue-noise"]
+
+# ``--dither`` choices: no dithering, one of the kernels or one of the patterns
+DITHER_CHOICES = ["none", *KERNELS, *PATTERNS]
+
+Quantizer = Callable[[np.ndarray], np.ndarray]
+
+# Side of the blue-noise texture, and the void-and-cluster Gaussian's sigma
+BLUE_NOISE_SIZE = 64
+BLUE_NOISE_SIGMA = 1.5
+
+# Bump when the generated texture changes, so cached ones are not reused
+BLUE_NOISE_VERSION = 1
+
+TEXTURE_STORE_BYTES = 4 << 20
+
+# Pixels ``ordered`` thresholds and quantizes at once
+BAND_PIXELS = 1 << 20
+
+# Wavefronts between shifts of the pending-error ring
+RING_STEPS = 256
+
+
+def wavefront_slope(taps: tuple[tuple[int, int, float], ...]) -> int:
+    """Smallest ``s`` such that every tap lands on a later wavefront ``x + s * y``."""
+    return max([1] + [-dx // dy + 1 for dy, dx, _ in taps if dy > 0])
+
+
+def diffusion_memory(width: int, height: int, channels: int, kernel: str) -> int:
+    """Bytes ``diffuse`` allocates: the result, the pending-error ring and one wavefront's buffers."""
+    rows = spread_rows(KERNELS[kernel], wavefront_slope(KERNELS[kernel]))
+    reach = max(last for _, _, last, _ in rows) + 1
+    max_dy = max(dy for dy, _, _, _ in rows)
+    ring = (reach + RING_STEPS) * (height + max_dy) * channels * 4
+    # Values and their rounding, rounded and quantized colors, and the spread
+    # errors of a wavefront
+    wavefront = height * channels * (8 + 2 + 4 * reach)
+    return width * height * channels + ring + wavefront
+
+
+def quantize_dithered(pixels: np.ndarray, quantize: Quantizer, method: str, spread: float) -> np.ndarray:
+    """``pixels`` quantized with ``method``, one of ``DITHER_CHOICES``.
+
+    ``spread`` is the distance between neighbouring quantization levels in
+    channel values; ordered patterns scale their thresholds to it.
+    """
+    if method == "none":
+        return quantize(pixels)
+    if method in KERNELS:
+        return diffuse(pixels, quantize, method)
+    return ordered(pixels, quantize, method, spread)
+
+
+def quantized_at_once(width: int, height: int, method: str) -> int:
+    """Most pixels ``quantize_dithered`` hands ``quantize`` in one call."""
+    if method == "none":
+        return width * height
+    if method in KERNELS:
+        return height
+    return min(height, _band_rows(width, pattern_size(method))) * width
+
+
+def dither_memory(width: int, height: int, channels: int, method: str) -> int:
+    """Bytes ``quantize_dithered`` allocates besides what ``quantize`` does (see ``quantized_at_once``)."""
+    if method == "none":
+        return 0
+    if method in KERNELS:
+        return diffusion_memory(width, height, channels, method)
+    return ordered_memory(width, height, channels, method)
+
+
+def bayer_matrix(size: int) -> np.ndarray:
+    """(size, size) Bayer index matrix holding 0 .. size**2 - 1; ``size`` is a power of two."""
+    matrix = np.zeros((1, 1), dtype=np.int64)
+    while len(matrix) < size:
+        matrix = np.block([[4 * matrix, 4 * matrix + 2], [4 * matrix + 3, 4 * matrix + 1]])
+    return matrix
+
+
+def void_and_cluster(size: int, sigma: float, seed: int = 0) -> np.ndarray:
+    """(size, size) blue-noise ranks 0 .. size**2 - 1 by Ulichney's void-and-cluster method.
+
+    Ranks follow the order in which pixels join a binary pattern that is kept
+    as even as possible: each new pixel fills the largest void, measured by a
+    Gaussian energy that wraps around the edges, so the texture tiles.
+    """
+    n = size * size
+    offsets = np.minimum(np.arange(size), size - np.arange(size))
+    kernel = np.exp(-(offsets[:, None] ** 2 + offsets[None, :] ** 2) / (2 * sigma**2))
+
+    def energy_of(pattern):
+        return np.fft.irfft2(np.fft.rfft2(pattern) * np.fft.rfft2(kernel), s=pattern.shape)
+
+    def tightest_cluster(pattern, energy):
+        return np.argmax(np.where(pattern, energy, -np.inf))
+
+    def largest_void(pattern, energy):
+        return np.argmin(np.where(pattern, np.inf, energy))
+
+    def toggle(pattern, energy, index, on):
+        y, x = divmod(int(index), size)
+        pattern[y, x] = on
+        energy += np.roll(kernel, (y, x), axis=(0, 1)) if on else -np.roll(kernel, (y, x), axis=(0, 1))
+
+    # Initial pattern: a tenth of the pixels at random, then evened out by
+    # moving the tightest cluster's pixel to the largest void
+    rng = np.random.default_rng(seed)
+    pattern = np.zeros((size, size), dtype=bool)
+    pattern.flat[rng.choice(n, n // 10, replace=False)] = True
+    energy = energy_of(pattern)
+    while True:
+        cluster = tightest_cluster(pattern, energy)
+        toggle(pattern, energy, cluster, False)
+        void = largest_void(pattern, energy)
+        if void == cluster:
+            toggle(pattern, energy, cluster, True)
+            break
+        toggle(pattern, energy, void, True)
+
+    ranks = np.empty(n, dtype=np.int64)
+    ones = int(pattern.sum())
+    # Ranks below the initial pattern: its pixels, tightest cluster first out
+    removing, removing_energy = pattern.copy(), energy.copy()
+    for rank in range(ones - 1, -1, -1):
+        cluster = tightest_cluster(removing, removing_energy)
+        toggle(removing, removing_energy, cluster, False)
+        ranks[cluster] = rank
+    # Ranks above it: fill the largest void until every pixel is in
+    for rank in range(ones, n):
+        void = largest_void(pattern, energy)
+        toggle(pattern, energy, void, True)
+        ranks[void] = rank
+    return ranks.reshape(size, size)
+
+
+@functools.lru_cache(maxsize=None)
+def blue_noise() -> np.ndarray:
+    """The blue-noise rank texture, generated once and kept under ``$OPIMG_CACHE_DIR`` if set."""
+    store = derived_store("textures", TEXTURE_STORE_BYTES)
+    key = hashlib.sha256(
+        f"void-and-cluster-{BLUE_NOISE_VERSION}:{BLUE_NOISE_SIZE}:{BLUE_NOISE_SIGMA}".encode()
+    ).hexdigest()
+    cached = store.get(key) if store else None
+    if cached is not None:
+        return np.load(io.BytesIO(cached))
+    ranks = void_and_cluster(BLUE_NOISE_SIZE, BLUE_NOISE_SIGMA)
+    if store:
+        buffer = io.BytesIO()
+        np.save(buffer, ranks)
+        store.put(key, buffer.getvalue())
+    return ranks
+
+
+def pattern_size(pattern: str) -> int:
+    """Side of ``pattern``'s threshold map, without building it."""
+    return BLUE_NOISE_SIZE if pattern == "blue-noise" else int(pattern.removeprefix("bayer-"))
+
+
+def threshold_map(pattern: str) -> np.ndarray:
+    """(n, n) float32 thresholds of ``pattern`` (see ``PATTERNS``), evenly spread over (0, 1)."""
+    ranks = blue_noise() if pattern == "blue-noise" else bayer_matrix(pattern_size(pattern))
+    return ((ranks + 0.5) / ranks.size).astype(np.float32)
+
+
+def tile_thresholds(pattern: str, height: int, width: int) -> np.ndarray:
+    """(height, width) float32 thresholds of ``pattern`` tiled from the top-left corner."""
+    thresholds = threshold_map(pattern)
+    n = len(thresholds)
+    return np.tile(thresholds, (-(-height // n), -(-width // n)))[:height, :width]
+
+
+def ordered_memory(width: int, height: int, channels: int, pattern: str) -> int:
+    """Bytes ``ordered`` allocates besides what ``quantize`` does: the result and one band's temporaries."""
+    band = quantized_at_once(width, height, pattern)
+    # Tiled offsets, the values and the rounded colors
+    return width * height * channels + band * (4 + 5 * channels)
+
+
+def _band_rows(width: int, n: int) -> int:
+    # Whole tiles of rows, so every band starts at the top of a tile
+    return max(1, BAND_PIXELS // (width * n)) * n
+
+
+def ordered(pixels: np.ndarray, quantize: Quantizer, pattern: str, spread: float) -> np.ndarray:
+    """``pixels`` (H, W[, C]) uint8 quantized after adding ``pattern``'s thresholds.
+
+    Thresholds are centred on zero and scaled to ``spread``, the distance
+    between neighbouring quantization levels, so a value a quarter of the
+    way from one level to the next is rounded up on a quarter of the pixels.
+    """
+    h, w = pixels.shape[:2]
+    rows = min(h, _band_rows(w, pattern_size(pattern)))
+    offsets = tile_thresholds(pattern, rows, w)
+    offsets -= 0.5
+    offsets *= spread
+    if pixels.ndim == 3:
+        offsets = offsets[:, :, None]
+
+    out = np.empty_like(pixels)
+    for top in range(0, h, rows):
+        band = pixels[top:top + rows]
+        values = band + offsets[:len(band)]
+        np.clip(values, 0, 255, out=values)
+        np.rint(values, out=values)
+        out[top:top + rows] = quantize(values.astype(np.uint8))
+    return out
+
+
+def diffuse(pixels: np.ndarray, quantize: Quantizer, kernel: str) -> np.ndarray:
+    """``pixels`` (H, W[, C]) uint8 quantized with error diffusion by ``kernel`` (see ``KERNELS``).
+
+    Error is measured after clipping to 0..255, so it cannot run away in
+    saturated areas. ``quantize`` is given each wavefront's rounded colors.
+    """
+    taps = KERNELS[kernel]
+    shape = pixels.shape
+    h, w = shape[:2]
+    src = pixels.reshape(h * w, -1)
+    channels = src.shape[1]
+    out = np.empty_like(src)
+
+    slope = wavefront_slope(taps)
+    # Wavefront t meets row y at x = t - slope * y: flat index t + y * stride
+    stride = w - slope
+    if stride <= 0:
+        # Narrower than the slope: a view cannot step backwards past the start
+        return _diffuse_pixels(src, quantize, taps, h, w).reshape(shape)
+    rows = spread_rows(taps, slope)
+    reach = max(last for _, _, last, _ in rows) + 1
+    max_dy = max(dy for dy, _, _, _ in rows)
+    # Pending error by (step - base, row); shifted back to the start when full
+    ring = np.zeros((reach + RING_STEPS, h + max_dy, channels), dtype=np.float32)
+    values_buffer = np.empty((h, channels), dtype=np.float32)
+    spread_buffer = np.empty((reach, h, channels), dtype=np.float32)
+    base = 0
+
+    for t in range(w + slope * (h - 1)):
+        if t - base + reach > len(ring):
+            kept = len(ring) - (t - base)
+            ring[:kept] = ring[t - base:]
+            ring[kept:] = 0
+            base = t
+        # Rows whose pixel on this wavefront is inside the image
+        lo = max(0, -((w - 1 - t) // slope))
+        hi = min(h, t // slope + 1)
+        wavefront = slice(t + lo * stride, t + (hi - 1) * stride + 1, stride)
+        here = t - base
+
+        values = values_buffer[:hi - lo]
+        np.add(src[wavefront], ring[here, lo:hi], out=values)
+        np.minimum(values, 255, out=values)
+        np.maximum(values, 0, out=values)
+        quantized = quantize(np.rint(values).astype(np.uint8))
+        out[wavefront] = quantized
+        values -= quantized
+        for dy, first, last, weights in rows:
+            spread = np.multiply(weights, values, out=spread_buffer[:last + 1 - first, :hi - lo])
+            ring[here + first:here + last + 1, lo + dy:hi + dy] += spread
+
+    return out.reshape(shape)
+
+
+def spread_rows(
+    taps: tuple[tuple[int, int, float], ...], slope: int
+) -> list[tuple[int, int, int, np.ndarray]]:
+    """Taps grouped by row: ``(dy, first, last, weights)``.
+
+    A row's taps land ``first`` to ``last`` wavefronts ahead, and ``weights``
+    (one per wavefront in between, shaped to broadcast) spreads the error over
+    all of them in one multiply-add.
+    """
+    rows = []
+    for dy in sorted({dy for dy, _, _ in taps}):
+        row = {dx + slope * dy: weight for ty, dx, weight in taps if ty == dy}
+        first, last = min(row), max(row)
+        weights = np.array([row.get(a, 0.0) for a in range(first, last + 1)], dtype=np.float32)
+        rows.append((dy, first, last, weights[:, None, None]))
+    return rows
+
+
+def _diffuse_pixels(
+    src: np.ndarray, quantize: Quantizer, taps: tuple[tuple[int, int, float], ...], h: int, w: int
+) -> np.ndarray:
+    """``diffuse`` one pixel at a time, for images only a few columns wide."""
+    pending = src.reshape(h, w, -1).astype(np.float32)
+    out = np.empty_like(src).reshape(pending.shape)
+    for y in range(h):
+        for x in range(w):
+            value = np.clip(pending[y, x], 0, 255)
+            out[y, x] = quantize(np.rint(value).astype(np.uint8)[None])[0]
+            error = value - out[y, x]
+            for dy, dx, weight in taps:
+                if y + dy < h and 0 <= x + dx < w:
+                    pending[y + dy, x + dx] += error * np.float32(weight)
+    return out.reshape(src.shape)
@@ -0,0 +1 @@
+"""One module per patch; each registers its kernel with ``opimg.registry.register``."""
@@ -0,0 +1,66 @@
+"""Reduce color depth by posterizing to N bits per channel.
+
+In-process counterpart of ``bit-crush/bit-crush.sh`` (``magick -posterize``).
+``--dither`` diffuses the rounding error or adds an ordered threshold pattern
+first (see ``opimg.dither``); the script hands dithered renders to this port.
+"""
+
+import numpy as np
+
+from ..dither import DITHER_CHOICES, dither_memory, quantize_dithered, quantized_at_once
+from ..registry import Param, register
+
+
+def level_table(levels: int) -> np.ndarray:
+    """(256,) uint8 table of every channel value's nearest of ``levels`` evenly spaced levels."""
+    if levels < 2:
+        return np.zeros(256, dtype=np.uint8)
+    step = 255.0 / (levels - 1)
+    return (np.round(np.round(np.arange(256) / step) * step)).astype(np.uint8)
+
+
+def posterize(pixels: np.ndarray, levels: int) -> np.ndarray:
+    """Snap every channel value to the nearest of ``levels`` evenly spaced levels."""
+    return level_table(levels)[pixels]
+
+
+def posterize_dithered(pixels: np.ndarray, levels: int, method: str) -> np.ndarray:
+    """``posterize`` dithered by ``method``, one of ``opimg.dither.DITHER_CHOICES``."""
+    if method == "none":
+        return posterize(pixels, levels)
+    spread = 255.0 / (levels - 1) if levels > 1 else 255.0
+    # Indexing with the uint8 values directly, as np.take would copy them to intp
+    return quantize_dithered(pixels, level_table(levels).__getitem__, method, spread)
+
+
+def posterize_memory(width: int, height: int, channels: int, method: str) -> int:
+    """Bytes ``posterize_dithered`` allocates."""
+    # The levels of every pixel quantized at once
+    return dither_memory(width, height, channels, method) + quantized_at_once(width, height, method) * channels
+
+
+def _memory(width: int, height: int, params: dict) -> int:
+    return posterize_memory(width, height, 3, params["dither"])
+
+
+def _report(ctx: dict) -> str:
+    dither = f", {ctx['dither']} dither" if ctx["dither"] != "none" else ""
+    return f"{ctx['bits']}-bit crush ({1 << ctx['bits']} levels{dither}) → {ctx['output']}"
+
+
+@register(
+    "bit-crush",
+    description="Reduce color depth by posterizing an image.",
+    suffix="-crush-{bits}bit",
+    params=[
+        Param("--bits", type=int, default=3, help="Bit depth per channel (default: 3)"),
+        Param("--dither", default="none", choices=DITHER_CHOICES,
+              help="Error-diffusion kernel or ordered threshold pattern to dither with instead of "
+                   "hard banding (default: none)"),
+    ],
+    format="PNG",
+    message=_report,
+    memory=_memory,
+)
+def bit_crush(pixels: np.ndarray, *, bits: int, dither: str) -> np.ndarray:
+    return posterize_dithered(pixels, 1 << bits, dither)
@@ -0,0 +1,36 @@
+"""Shift RGB channels by independent pixel offsets (wrapping around the edges).
+
+In-process counterpart of ``channel-offset/channel-offset.sh`` (``magick -roll``).
+"""
+
+import numpy as np
+
+from ..registry import Param, per_pixel, register
+
+
+def parse_offset(spec: str) -> tuple[int, int]:
+    """``"30,15"`` -> (30, 15); a missing component defaults to 0."""
+    x, _, y = spec.partition(",")
+    return int(x or 0), int(y or 0)
+
+
+@register(
+    "channel-offset",
+    description="Shift R, G, B channels by independent pixel offsets.",
+    suffix="-offset",
+    params=[
+        Param("--r", default="30,15", help="Red channel offset X,Y in pixels (default: 30,15)"),
+        Param("--g", default="0,0", help="Green channel offset X,Y in pixels (default: 0,0)"),
+        Param("--b", default="-25,-10", help="Blue channel offset X,Y in pixels (default: -25,-10)"),
+    ],
+    format="PNG",
+    message="Channel offset (r:{r} g:{g} b:{b}) → {output}",
+    # The result plus one rolled channel
+    memory=per_pixel(4),
+)
+def channel_offset(pixels: np.ndarray, *, r: str, g: str, b: str) -> np.ndarray:
+    result = np.empty_like(pixels)
+    for c, spec in enumerate((r, g, b)):
+        dx, dy = parse_offset(spec)
+        result[:, :, c] = np.roll(pixels[:, :, c], (dy, dx), axis=(0, 1))
+    return result
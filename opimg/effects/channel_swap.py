@@ -0,0 +1,26 @@
+"""Rearrange RGB channels of an image."""
+
+import numpy as np
+
+from ..registry import Param, register
+
+CHANNEL_MAP = {"R": 0, "G": 1, "B": 2}
+
+
+@register(
+    "channel-swap",
+    description="Rearrange RGB channels of an image.",
+    suffix="-chswap",
+    params=[
+        Param("--map", default="B,G,R",
+              help="Channel mapping as comma-separated R,G,B values (default: B,G,R)"),
+    ],
+    message="Saved channel-swapped image to {output} (map={map})",
+)
+def channel_swap(pixels: np.ndarray, *, map: str) -> np.ndarray:
+    """Rearrange RGB channels according to a comma-separated mapping string."""
+    channels = [ch.strip().upper() for ch in map.split(",")]
+    if len(channels) != 3 or any(ch not in CHANNEL_MAP for ch in channels):
+        raise ValueError(f"Invalid channel map '{map}'. Use comma-separated R,G,B values (e.g. B,G,R)")
+    indices = [CHANNEL_MAP[ch] for ch in channels]
+    return pixels[:, :, indices]
@@ -0,0 +1,635 @@
+"""Map every pixel in an image to the nearest color in a given palette.
+
+Nearest colors come from a lookup cube holding a palette index for each of the
+2**24 RGB colors (``PaletteCube``). The cube is filled lazily: only colors not
+met before are searched, by chunked exact distances, and snapping an image is
+then one gather over its packed pixels. Distances are measured in RGB, CIELAB
+or OKLab (``--metric``); only the search converts colors, so a perceptual
+metric costs nothing once a color is in the cube. Cubes are cached per palette
+and metric, so later images (``--batch``, ``op serve``) and other patches
+mostly reuse what earlier ones filled in. Fully filled cubes are also kept on
+disk when ``$OPIMG_CACHE_DIR`` is set, so other processes start from them.
+
+``--dither`` diffuses the error of each snapped pixel to its neighbours, or
+adds an ordered threshold pattern first (see ``opimg.dither``), looking colors
+up in the same cube. Diffused errors scatter an image over millions of
+colors, so before diffusing a large image the whole cube is filled in one
+pass (``PaletteCube.fill``), and the wavefronts only look colors up.
+``--bits`` snaps to a uniform palette, one channel at a time, like bit-crush.
+
+``--from-image`` extracts the palette with mini-batch k-means. With ``--seed``
+it is reproducible and cached by the reference image's contents (see
+``reference_palette``), so a brand palette is extracted once.
+"""
+
+import functools
+import hashlib
+import zlib
+from typing import Optional
+
+import numpy as np
+
+from ..cache import derived_store
+from ..dither import DITHER_CHOICES, KERNELS, dither_memory, quantize_dithered, quantized_at_once
+from ..io import decode_image
+from ..registry import Param, register
+from .bit_crush import posterize_dithered, posterize_memory
+
+# Budget for the per-color temporaries of the nearest-color search; more
+# colors are searched in chunks that fit it
+CHUNK_BYTES = 64 << 20
+
+# Bytes of one cube: an index per 24-bit color (uint8 below 255 colors)
+CUBE_SIZE = 1 << 24
+
+# New colors searched as they come, duplicates included: cheaper than
+# deduplicating them for the few a dithered wavefront brings at a time
+SEARCH_COLORS = 1 << 12
+
+# More new colors deduplicated by sorting; more are marked in a bitmap the size of
+# the cube, which only pays off for large batches
+SORT_COLORS = 1 << 16
+
+# ``PaletteCube.fill``: side of the blocks it starts from, and how many of
+# them it splits down to single colors at a time
+FILL_BLOCK = 32
+FILL_GROUP = 8
+
+# Bytes ``PaletteCube.fill`` needs per palette color a block still keeps
+FILL_BYTES_PER_COLOR = 96
+
+# Images error-diffused to a palette with at least this many pixels fill the
+# whole cube first; smaller ones search the few colors they meet as they go
+FILL_PIXELS = 1 << 20
+
+# Mini-batch k-means: pixels sampled from the image, samples per step, the
+# most steps and the centroid move (in 8-bit levels) that ends them, and the
+# most full passes over the sample that polish the result
+KMEANS_SAMPLES = 50000
+KMEANS_BATCH = 4096
+KMEANS_STEPS = 200
+KMEANS_TOLERANCE = 0.05
+KMEANS_PASSES = 10
+
+# sRGB -> CIELAB (D65) and sRGB -> OKLab constants
+_SRGB_TO_LINEAR = np.where(
+    np.arange(256) <= 10, np.arange(256) / 255 / 12.92, ((np.arange(256) / 255 + 0.055) / 1.055) ** 2.4
+)
+_SRGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+])
+_D65_WHITE = np.array([0.95047, 1.0, 1.08883])
+_LAB_EPSILON = 216 / 24389
+_LAB_KAPPA = 24389 / 27
+_OKLAB_LMS = np.array([
+    [0.4122214708, 0.5363325363, 0.0514459929],
+    [0.2119034982, 0.6806995451, 0.1073969566],
+    [0.0883024619, 0.2817188376, 0.6299787005],
+])
+_OKLAB_LAB = np.array([
+    [0.2104542553, 0.7936177850, -0.0040720468],
+    [1.9779984951, -2.4285922050, 0.4505937099],
+    [0.0259040371, 0.7827717662, -0.8086757660],
+])
+# CIELAB from f(X/Xn), f(Y/Yn), f(Z/Zn), as a matrix and offset
+_LAB_FROM_F = np.array([[0, 116, 0], [500, -500, 0], [0, 200, -200]])
+_LAB_OFFSET = np.array([-16, 0, 0])
+
+# Bump when extracted palettes change, so cached ones are not reused
+KMEANS_VERSION = 1
+
+PALETTE_STORE_BYTES = 16 << 20
+
+# Bump when filled cubes change, so stored ones are not reused
+CUBE_VERSION = 1
+
+# Filled cubes compress to a few hundred KiB to a few MiB each
+CUBE_STORE_BYTES = 64 << 20
+
+# Extracted palettes ("#rrggbb,...") by cache key, for this process
+_palettes: dict[str, str] = {}
+
+
+def hex_to_rgb(h: str) -> tuple[int, int, int]:
+    h = h.lstrip("#")
+    if len(h) == 3:
+        h = h[0] * 2 + h[1] * 2 + h[2] * 2
+    return (int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16))
+
+
+def parse_palette(spec: str) -> np.ndarray:
+    """``"#000,#fff,#f00"`` -> (K, 3) uint8 palette."""
+    return np.array([hex_to_rgb(c.strip()) for c in spec.split(",")], dtype=np.uint8)
+
+
+def kmeans_plus_plus(samples: np.ndarray, n_colors: int, rng: np.random.Generator) -> np.ndarray:
+    """``n_colors`` initial centroids picked from ``samples`` (N, 3) float64 by k-means++."""
+    centroids = np.empty((n_colors, 3), dtype=np.float64)
+    centroids[0] = samples[rng.integers(len(samples))]
+    dists = np.sum((samples - centroids[0]) ** 2, axis=1)
+    for k in range(1, n_colors):
+        total = dists.sum()
+        # Fewer distinct colors than centroids: the rest repeat a sample
+        pick = rng.choice(len(samples), p=dists / total) if total > 0 else rng.integers(len(samples))
+        centroids[k] = samples[pick]
+        np.minimum(dists, np.sum((samples - centroids[k]) ** 2, axis=1), out=dists)
+    return centroids
+
+
+def nearest_centroids(samples: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the nearest centroid for each of ``samples`` (N, 3) float64."""
+    # |x - c|^2 without the |x|^2 term, which is the same for every centroid
+    dists = samples @ (-2 * centroids.T)
+    dists += np.sum(centroids**2, axis=1)
+    return np.argmin(dists, axis=1)
+
+
+def _cluster_sums(samples: np.ndarray, labels: np.ndarray, n_colors: int) -> tuple[np.ndarray, np.ndarray]:
+    """Per-cluster sample counts and (K, 3) channel sums."""
+    counts = np.bincount(labels, minlength=n_colors)
+    sums = np.stack([np.bincount(labels, weights=samples[:, c], minlength=n_colors) for c in range(3)], axis=1)
+    return counts, sums
+
+
+def extract_palette_kmeans(pixels: np.ndarray, n_colors: int, seed: Optional[int] = None) -> np.ndarray:
+    """Extract dominant colors from an RGB array using mini-batch k-means.
+
+    Centroids start from k-means++ over a random sample of pixels. Each
+    mini-batch step moves the centroids to the running mean of every sample
+    assigned to them so far. A few full passes over the sample then polish
+    the result. The same ``seed`` always gives the same palette.
+    """
+    flat = pixels.reshape(-1, 3)
+    rng = np.random.default_rng(seed)
+    samples = flat[rng.integers(len(flat), size=min(len(flat), KMEANS_SAMPLES))].astype(np.float64)
+    centroids = kmeans_plus_plus(samples, n_colors, rng)
+
+    seen = np.zeros(n_colors, dtype=np.int64)
+    for _ in range(KMEANS_STEPS):
+        batch = samples[rng.integers(len(samples), size=KMEANS_BATCH)]
+        counts, sums = _cluster_sums(batch, nearest_centroids(batch, centroids), n_colors)
+        seen += counts
+        hit = counts > 0
+        moved = (sums[hit] - counts[hit, None] * centroids[hit]) / seen[hit, None]
+        centroids[hit] += moved
+        if np.abs(moved).max(initial=0.0) < KMEANS_TOLERANCE:
+            break
+
+    for _ in range(KMEANS_PASSES):
+        counts, sums = _cluster_sums(samples, nearest_centroids(samples, centroids), n_colors)
+        hit = counts > 0
+        means = sums[hit] / counts[hit, None]
+        converged = np.allclose(centroids[hit], means, atol=0.5)
+        centroids[hit] = means
+        if converged:
+            break
+
+    return np.clip(np.round(centroids), 0, 255).astype(np.uint8)
+
+
+def format_palette(palette: np.ndarray) -> str:
+    """Inverse of ``parse_palette``."""
+    return ",".join("#%02x%02x%02x" % tuple(color) for color in palette.tolist())
+
+
+def reference_palette(path: str, n_colors: int, seed: Optional[int] = None) -> np.ndarray:
+    """The ``n_colors`` palette k-means extracts from the image at ``path``.
+
+    With a seed the palette is reproducible, so it is cached by the image's
+    contents, ``n_colors`` and ``seed``: in this process, and on disk when
+    ``$OPIMG_CACHE_DIR`` is set. A cached palette skips decoding the image.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if seed is None:
+        return extract_palette_kmeans(decode_image(data), n_colors)
+
+    digest = hashlib.sha256(data).hexdigest()
+    key = hashlib.sha256(f"{digest}:kmeans-{KMEANS_VERSION}:{n_colors}:{seed}".encode()).hexdigest()
+    if key not in _palettes:
+        store = derived_store("palettes", PALETTE_STORE_BYTES)
+        cached = store.get(key) if store else None
+        if cached is None:
+            cached = format_palette(extract_palette_kmeans(decode_image(data), n_colors, seed)).encode()
+            if store:
+                store.put(key, cached)
+        _palettes[key] = cached.decode()
+    return parse_palette(_palettes[key])
+
+
+def rgb_coordinates(colors: np.ndarray) -> np.ndarray:
+    """(N, 3) uint8 sRGB -> int32 coordinates for exact integer distances."""
+    return colors.astype(np.int32)
+
+
+def _linear(colors: np.ndarray) -> np.ndarray:
+    return _SRGB_TO_LINEAR[colors]
+
+
+def _lab_f(linear: np.ndarray) -> np.ndarray:
+    # Linear sRGB -> CIELAB's f(X/Xn), f(Y/Yn), f(Z/Zn), each increasing in every channel
+    xyz = linear @ _SRGB_TO_XYZ.T
+    xyz /= _D65_WHITE
+    return np.where(xyz > _LAB_EPSILON, np.cbrt(xyz), (_LAB_KAPPA * xyz + 16) / 116)
+
+
+def lab_coordinates(colors: np.ndarray) -> np.ndarray:
+    """(N, 3) uint8 sRGB -> float64 CIELAB (D65)."""
+    f = _lab_f(_linear(colors))
+    lab = np.empty_like(f)
+    lab[:, 0] = 116 * f[:, 1] - 16
+    lab[:, 1] = 500 * (f[:, 0] - f[:, 1])
+    lab[:, 2] = 200 * (f[:, 1] - f[:, 2])
+    return lab
+
+
+def oklab_coordinates(colors: np.ndarray) -> np.ndarray:
+    """(N, 3) uint8 sRGB -> float64 OKLab."""
+    return np.cbrt(_linear(colors) @ _OKLAB_LMS.T) @ _OKLAB_LAB.T
+
+
+# Color spaces palettes are matched in, by --metric name
+COLOR_SPACES = {"rgb": rgb_coordinates, "lab": lab_coordinates, "oklab": oklab_coordinates}
+
+
+def box_bounds(low: np.ndarray, high: np.ndarray, metric: str = "rgb") -> tuple[np.ndarray, np.ndarray]:
+    """Per-channel bounds, in the ``metric`` space, of every color in the boxes ``low`` .. ``high`` (N, 3) uint8.
+
+    Each conversion is increasing in every channel up to its last linear map,
+    so the bounds come from the two corners and that map's positive and
+    negative coefficients. Perceptual bounds are slightly loose, never tight.
+    """
+    if metric == "rgb":
+        return rgb_coordinates(low), rgb_coordinates(high)
+    if metric == "lab":
+        low, high = _lab_f(_linear(low)), _lab_f(_linear(high))
+        mix, offset = _LAB_FROM_F, _LAB_OFFSET
+    else:
+        low, high = np.cbrt(_linear(low) @ _OKLAB_LMS.T), np.cbrt(_linear(high) @ _OKLAB_LMS.T)
+        mix, offset = _OKLAB_LAB, 0
+    positive, negative = np.maximum(mix, 0).T, np.minimum(mix, 0).T
+    return low @ positive + high @ negative + offset, high @ positive + low @ negative + offset
+
+
+def _snap_bytes_per_pixel(n_colors: int, metric: str = "rgb") -> int:
+    if metric == "rgb":
+        # The int32 color, one channel's differences to every palette color and
+        # the running squared distances, plus the index of the nearest
+        return 20 + 8 * n_colors
+    # The same in float64, plus the conversion's linear, transformed and
+    # cube-rooted colors
+    return 104 + 16 * n_colors
+
+
+def chunk_pixels(n_colors: int, metric: str = "rgb") -> int:
+    """Colors ``nearest_colors`` searches at once for a palette of ``n_colors``."""
+    return max(1, CHUNK_BYTES // _snap_bytes_per_pixel(n_colors, metric))
+
+
+def nearest_colors(colors: np.ndarray, palette: np.ndarray, metric: str = "rgb") -> np.ndarray:
+    """Index of the nearest palette color for each of ``colors`` (N, 3).
+
+    Distances are Euclidean in the ``metric`` color space (see
+    ``COLOR_SPACES``). RGB squared distances are exact integers, so ties go
+    to the first palette color as with ``np.argmin`` over Euclidean distances.
+    """
+    convert = COLOR_SPACES[metric]
+    reference = convert(palette)
+    nearest = np.empty(len(colors), dtype=np.intp)
+    step = min(len(colors), chunk_pixels(len(palette), metric))
+    # Buffers for one chunk, reused by every chunk
+    dists_buffer = np.empty((step, len(palette)), dtype=reference.dtype)
+    diff_buffer = np.empty_like(dists_buffer)
+    for start in range(0, len(colors), step):
+        chunk = convert(colors[start:start + step])
+        dists, diff = dists_buffer[:len(chunk)], diff_buffer[:len(chunk)]
+        dists.fill(0)
+        for c in range(3):
+            np.subtract(chunk[:, c, None], reference[:, c], out=diff)
+            diff *= diff
+            dists += diff
+        nearest[start:start + step] = np.argmin(dists, axis=1)
+    return nearest
+
+
+def pack_colors(pixels: np.ndarray) -> np.ndarray:
+    """(..., 3) uint8 -> (...) 24-bit color codes, ``r | g << 8 | b << 16``."""
+    codes = pixels[..., 2].astype("<u4")
+    codes <<= 8
+    codes |= pixels[..., 1]
+    codes <<= 8
+    codes |= pixels[..., 0]
+    return codes
+
+
+def unpack_colors(codes: np.ndarray) -> np.ndarray:
+    """Inverse of ``pack_colors``."""
+    return codes.astype("<u4").view(np.uint8).reshape(codes.shape + (4,))[..., :3]
+
+
+class PaletteCube:
+    """Nearest palette index of every 24-bit color, searched the first time it is looked up.
+
+    ``metric`` names the color space distances are measured in (see
+    ``COLOR_SPACES``); only the search depends on it, never the lookup.
+    """
+
+    def __init__(self, palette: np.ndarray, metric: str = "rgb"):
+        self.palette = palette
+        self.metric = metric
+        dtype = np.uint8 if len(palette) < 255 else np.uint16
+        self.unknown = np.iinfo(dtype).max
+        self.index = np.full(CUBE_SIZE, self.unknown, dtype=dtype)
+        # Every color searched (``fill``), so lookups need not check
+        self.full = False
+
+    def lookup(self, pixels: np.ndarray) -> np.ndarray:
+        """Palette indices of ``pixels`` (..., 3)."""
+        codes = pack_colors(pixels)
+        found = self.index[codes]
+        if self.full:
+            return found
+        missing = found == self.unknown
+        if missing.any():
+            missing_codes = codes[missing]
+            if len(missing_codes) <= SEARCH_COLORS:
+                # Few enough to search duplicates and all
+                nearest = nearest_colors(unpack_colors(missing_codes), self.palette, self.metric)
+                self.index[missing_codes] = nearest
+                found[missing] = nearest
+                return found
+            if len(missing_codes) < SORT_COLORS:
+                new = np.unique(missing_codes)
+            else:
+                # Deduplicate through a mark per color, which is cheaper than sorting
+                marks = np.zeros(CUBE_SIZE, dtype=bool)
+                marks[missing_codes] = True
+                new = np.flatnonzero(marks).astype("<u4")
+                del marks
+            self.index[new] = nearest_colors(unpack_colors(new), self.palette, self.metric)
+            found[missing] = self.index[missing_codes]
+        return found
+
+    def snap(self, pixels: np.ndarray) -> np.ndarray:
+        """Every pixel replaced with its nearest palette color."""
+        return np.take(self.palette, self.lookup(pixels), axis=0)
+
+    def _store_key(self) -> str:
+        return hashlib.sha256(f"{format_palette(self.palette)}:{self.metric}:cube-{CUBE_VERSION}".encode()).hexdigest()
+
+    def restore(self) -> bool:
+        """Load this palette's filled cube from ``$OPIMG_CACHE_DIR``, if one was stored there; True if so."""
+        store = derived_store("cubes", CUBE_STORE_BYTES)
+        cached = store.get(self._store_key()) if store else None
+        if cached is None:
+            return False
+        index = np.frombuffer(bytearray(zlib.decompress(cached)), dtype=self.index.dtype)
+        if len(index) != CUBE_SIZE:
+            return False
+        self.index = index
+        self.full = True
+        return True
+
+    def fill(self) -> None:
+        """Search every color of the cube at once, leaving lookups nothing to search.
+
+        The cube is cut into blocks, and each block only keeps the palette
+        colors that may be nearest to something in it: those no farther from
+        the block than the farthest point of the block is from some color.
+        A block left with one color is filled whole; the others are cut in
+        eight, down to single colors, which are matched exactly among what
+        their block kept. Duplicate palette colors keep the first, and kept
+        colors stay in palette order, so the result is ``nearest_colors``'s.
+        The filled cube is stored under ``$OPIMG_CACHE_DIR`` if set (see ``restore``).
+        """
+        if self.full or self.restore():
+            return
+        reference = COLOR_SPACES[self.metric](self.palette)
+        _, first = np.unique(self.palette, axis=0, return_index=True)
+        colors = np.sort(first).astype(np.int32)
+        corners = np.arange(0, 256, FILL_BLOCK)
+        origins = np.stack(np.meshgrid(corners, corners, corners, indexing="ij"), axis=-1).reshape(-1, 3)
+        for start in range(0, len(origins), FILL_GROUP):
+            group = origins[start:start + FILL_GROUP]
+            self._fill_blocks(group, np.broadcast_to(colors, (len(group), len(colors))), FILL_BLOCK, reference)
+        self.full = True
+        store = derived_store("cubes", CUBE_STORE_BYTES)
+        if store:
+            store.put(self._store_key(), zlib.compress(self.index.tobytes(), 1))
+
+    def _fill_blocks(self, origins: np.ndarray, candidates: np.ndarray, size: int, reference: np.ndarray) -> None:
+        # Blocks of side ``size`` at ``origins`` (N, 3), with the palette
+        # indices (N, K) each may be nearest to, -1 past the last
+        children = np.stack(np.meshgrid(*[[0, 1]] * 3, indexing="ij"), axis=-1).reshape(-1, 3)
+        while len(origins):
+            split_origins, split_candidates = [], []
+            step = max(1, CHUNK_BYTES // (candidates.shape[1] * FILL_BYTES_PER_COLOR))
+            for start in range(0, len(origins), step):
+                block, kept = origins[start:start + step], candidates[start:start + step]
+                if size == 1:
+                    self._fill_colors(block, kept, reference)
+                    continue
+                keep = self._may_be_nearest(block, kept, size, reference)
+                count = keep.sum(axis=1)
+                single = count == 1
+                self._fill_whole(block[single], kept[single][keep[single]], size)
+                split = ~single
+                if split.any():
+                    # Kept colors to the front, in palette order
+                    order = np.argsort(~keep[split], axis=1, kind="stable")[:, :count[split].max()]
+                    kept = np.take_along_axis(np.where(keep[split], kept[split], -1), order, axis=1)
+                    split_origins.append((block[split, None] + children * (size // 2)).reshape(-1, 3))
+                    split_candidates.append(np.repeat(kept, len(children), axis=0))
+            if not split_origins:
+                return
+            width = max(kept.shape[1] for kept in split_candidates)
+            origins = np.concatenate(split_origins)
+            candidates = np.concatenate([
+                np.pad(kept, ((0, 0), (0, width - kept.shape[1])), constant_values=-1) for kept in split_candidates
+            ])
+            size //= 2
+
+    def _may_be_nearest(
+        self, origins: np.ndarray, candidates: np.ndarray, size: int, reference: np.ndarray
+    ) -> np.ndarray:
+        # (N, K) mask of the candidates whose nearest distance to their block
+        # is within every candidate's farthest
+        low, high = box_bounds(origins.astype(np.uint8), (origins + size - 1).astype(np.uint8), self.metric)
+        colors = reference[np.maximum(candidates, 0)]
+        near = np.zeros(candidates.shape, dtype=reference.dtype)
+        far = np.zeros_like(near)
+        for c in range(3):
+            below = low[:, c, None] - colors[..., c]
+            above = high[:, c, None] - colors[..., c]
+            gap = np.maximum(below, 0) - np.minimum(above, 0)
+            near += gap * gap
+            gap = np.maximum(np.abs(below), np.abs(above))
+            far += gap * gap
+        unused = candidates < 0
+        if self.metric == "rgb":
+            far[unused] = np.iinfo(far.dtype).max
+            return (near <= far.min(axis=1, keepdims=True)) & ~unused
+        # Allow for rounding in the conversions
+        far[unused] = np.inf
+        return (near <= far.min(axis=1, keepdims=True) * (1 + 1e-9) + 1e-12) & ~unused
+
+    def _fill_whole(self, origins: np.ndarray, nearest: np.ndarray, size: int) -> None:
+        offsets = np.arange(size, dtype="<u4")
+        r, g, b = (origins[:, c, None].astype("<u4") + offsets for c in range(3))
+        codes = r[:, None, None, :] | (g << 8)[:, None, :, None] | (b << 16)[:, :, None, None]
+        self.index[codes] = nearest[:, None, None, None]
+
+    def _fill_colors(self, colors: np.ndarray, candidates: np.ndarray, reference: np.ndarray) -> None:
+        # The same distances as ``nearest_colors``, among each color's candidates
+        colors = colors.astype(np.uint8)
+        chunk = COLOR_SPACES[self.metric](colors)
+        kept = reference[np.maximum(candidates, 0)]
+        dists = np.zeros(candidates.shape, dtype=reference.dtype)
+        for c in range(3):
+            diff = chunk[:, c, None] - kept[..., c]
+            diff *= diff
+            dists += diff
+        dists[candidates < 0] = np.iinfo(dists.dtype).max if self.metric == "rgb" else np.inf
+        nearest = np.take_along_axis(candidates, np.argmin(dists, axis=1)[:, None], axis=1)[:, 0]
+        self.index[pack_colors(colors)] = nearest
+
+
+@functools.lru_cache(maxsize=4)
+def _cube(palette: bytes, metric: str) -> PaletteCube:
+    cube = PaletteCube(np.frombuffer(palette, dtype=np.uint8).reshape(-1, 3), metric)
+    cube.restore()
+    return cube
+
+
+def palette_cube(palette: np.ndarray, metric: str = "rgb") -> PaletteCube:
+    """The cube of ``palette`` under ``metric``, shared by every image snapped to it in this process.
+
+    It starts from the filled cube stored under ``$OPIMG_CACHE_DIR``, if any.
+    Any patch that needs nearest palette colors can look them up here.
+    """
+    return _cube(np.ascontiguousarray(palette, dtype=np.uint8).tobytes(), metric)
+
+
+def snap_to_palette(pixels: np.ndarray, palette: np.ndarray, metric: str = "rgb") -> np.ndarray:
+    """Replace every pixel with the nearest palette color (Euclidean in the ``metric`` space)."""
+    return palette_cube(palette, metric).snap(pixels)
+
+
+def palette_spread(palette: np.ndarray) -> float:
+    """Typical gap between neighbouring palette colors, in channel values, for ordered dithering.
+
+    The median over colors of the largest channel difference to the nearest
+    other color: 255 for black and white, the level step for uniform grids.
+    """
+    colors = np.unique(palette, axis=0).astype(np.int32)
+    if len(colors) < 2:
+        return 255.0
+    gaps = np.abs(colors[:, None] - colors[None]).max(axis=2)
+    np.fill_diagonal(gaps, 255 * 2)
+    return float(np.median(gaps.min(axis=1)))
+
+
+def _palette_size(params: dict) -> int:
+    if params["palette"]:
+        return len(params["palette"].split(","))
+    if params["bits"] is not None:
+        return (1 << params["bits"]) ** 3
+    return params["colors"]
+
+
+def _report(ctx: dict) -> str:
+    dither = f", {ctx['dither']} dither" if ctx["dither"] != "none" else ""
+    return f"Saved palette-mapped image to {ctx['output']} ({_palette_size(ctx)} colors{dither})"
+
+
+def _memory(width: int, height: int, params: dict) -> int:
+    dither = params["dither"]
+    if params["bits"] is not None and not params["palette"]:
+        return posterize_memory(width, height, 3, dither)
+    n_colors = _palette_size(params)
+    cube = CUBE_SIZE * (1 if n_colors < 255 else 2)
+    # Packed colors, their indices, the mask of new colors and the result; at
+    # worst (every color new) the new codes, the distinct ones and their
+    # nearest indices, a mark per cube color, and one chunk of the search.
+    # Dithering looks up fewer pixels at a time.
+    looked_up = quantized_at_once(width, height, dither)
+    per_pixel = 14 + 32
+    metric = params["metric"]
+    chunk = min(looked_up, chunk_pixels(n_colors, metric)) * _snap_bytes_per_pixel(n_colors, metric)
+    if dither in KERNELS and width * height >= FILL_PIXELS:
+        # Filling the cube instead: a chunk of blocks' bounds and kept colors,
+        # and the blocks left to split
+        chunk = max(chunk, 2 * CHUNK_BYTES)
+    snap = looked_up * per_pixel + 2 * cube + chunk + dither_memory(width, height, 3, dither)
+    if params["palette"]:
+        return snap
+    # The float samples with k-means++ distances, and a full pass's distances,
+    # labels and weights; the --from-image source itself is not counted
+    return snap + KMEANS_SAMPLES * (64 + 8 * n_colors)
+
+
+def _cacheable(params: dict) -> bool:
+    # The key holds the --from-image path, not the image, which may change
+    # under it; extracted palettes are cached by contents instead
+    return not params["from_image"]
+
+
+@register(
+    "closest-palette",
+    description="Snap image pixels to nearest palette color.",
+    suffix="-palette",
+    version="2",
+    params=[
+        Param("--palette", help='Comma-separated hex colors, e.g. "#ff0000,#00ff00,#0000ff"'),
+        Param("--from-image", help="Extract palette from this image"),
+        Param("--colors", type=int, default=6,
+              help="Number of colors to extract when using --from-image (default: 6)"),
+        Param("--seed", type=int,
+              help="k-means seed for --from-image; seeded palettes are reproducible and cached"),
+        Param("--bits", type=int, metavar="N",
+              help="Use the uniform palette of 2**N levels per channel, as bit-crush --bits does"),
+        Param("--metric", default="rgb", choices=sorted(COLOR_SPACES),
+              help="Color space distances are measured in; lab and oklab are perceptual (default: rgb)"),
+        Param("--dither", default="none", choices=DITHER_CHOICES,
+              help="Error-diffusion kernel or ordered threshold pattern to dither with instead of "
+                   "hard color boundaries (default: none)"),
+    ],
+    message=_report,
+    cacheable=_cacheable,
+    memory=_memory,
+)
+def closest_palette(
+    pixels: np.ndarray,
+    *,
+    palette: Optional[str],
+    from_image: Optional[str],
+    colors: int,
+    seed: Optional[int],
+    bits: Optional[int],
+    metric: str,
+    dither: str,
+) -> np.ndarray:
+    if bits is not None:
+        if palette or from_image:
+            raise ValueError("--bits is a palette of its own; drop --palette and --from-image")
+        if not 0 <= bits <= 8:
+            raise ValueError(f"--bits must be between 0 and 8, got {bits}")
+        if metric != "rgb":
+            raise ValueError("--bits rounds each channel on its own, so it only supports --metric rgb")
+        return posterize_dithered(pixels, 1 << bits, dither)
+
+    if palette:
+        colors_arr = parse_palette(palette)
+    elif from_image:
+        colors_arr = reference_palette(from_image, colors, seed)
+    else:
+        raise ValueError("Provide --palette, --from-image or --bits")
+
+    cube = palette_cube(colors_arr, metric)
+    if dither in KERNELS and pixels.shape[0] * pixels.shape[1] >= FILL_PIXELS:
+        # Diffused errors reach colors all over the cube: search them up front,
+        # so each wavefront only looks colors up
+        cube.fill()
+    return quantize_dithered(pixels, cube.snap, dither, palette_spread(colors_arr))
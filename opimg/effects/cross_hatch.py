@@ -0,0 +1,96 @@
+"""cross-hatch -- Convert an image to a cross-hatching pattern.
+
+Multiple layers of lines at different angles, drawn in areas darker than
+per-layer brightness thresholds. Black on transparent.
+"""
+
+import math
+from typing import Optional
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+from ..registry import Param, per_pixel, register
+
+
+def draw_hatch_layer(draw, img, w, h, angle_deg, spacing, threshold):
+    """Draw lines at the given angle only where the image is darker than threshold."""
+    pixels = img.load()
+    angle_rad = math.radians(angle_deg)
+    cos_a = math.cos(angle_rad)
+    sin_a = math.sin(angle_rad)
+
+    diag = math.hypot(w, h)
+    num_lines = int(diag / spacing) + 2
+    num_samples = int(diag / spacing) + 2
+    step = spacing
+
+    cx, cy = w / 2.0, h / 2.0
+
+    for li in range(-num_lines, num_lines + 1):
+        perp_offset = li * spacing
+        line_cx = cx + perp_offset * (-sin_a)
+        line_cy = cy + perp_offset * cos_a
+
+        for si in range(-num_samples, num_samples + 1):
+            along_offset = si * step
+            px = line_cx + along_offset * cos_a
+            py = line_cy + along_offset * sin_a
+            nx = line_cx + (along_offset + step) * cos_a
+            ny = line_cy + (along_offset + step) * sin_a
+
+            mx, my = (px + nx) / 2.0, (py + ny) / 2.0
+            xi, yi = int(round(mx)), int(round(my))
+            if xi < 0 or xi >= w or yi < 0 or yi >= h:
+                continue
+
+            brightness = pixels[xi, yi]
+            if brightness < threshold:
+                draw.line([(px, py), (nx, ny)], fill=(208, 101, 33, 255), width=1)
+
+
+def layer_thresholds(layers: int, thresholds: Optional[str]) -> list[int]:
+    """Parse ``--thresholds`` or space them evenly from 200 down to 50."""
+    if thresholds:
+        values = [int(x.strip()) for x in thresholds.split(",")]
+        if len(values) != layers:
+            raise ValueError(f"expected {layers} thresholds, got {len(values)}")
+        return values
+    if layers == 1:
+        return [128]
+    return [int(200 - i * (150 / (layers - 1))) for i in range(layers)]
+
+
+@register(
+    "cross-hatch",
+    description="Generate a cross-hatch pattern from an image.",
+    suffix="-hatch",
+    params=[
+        Param("--layers", type=int, default=3, help="Number of hatch angle passes (default: 3)"),
+        Param("--spacing", type=int, default=12, help="Pixels between lines (default: 12)"),
+        Param("--thresholds", help="Comma-separated brightness cutoffs 0-255, one per layer "
+                                   "(default: evenly spaced from 200 down to 50)"),
+    ],
+    mode="L",
+    format="PNG",
+    message="cross-hatch: {input_name} -> {output_name} (layers={layers}, spacing={spacing})",
+    # Grey and blurred images, the RGBA canvas and its array (made through a bytes copy)
+    memory=per_pixel(16),
+)
+def cross_hatch(gray: np.ndarray, *, layers: int, spacing: int, thresholds: Optional[str]) -> np.ndarray:
+    cutoffs = layer_thresholds(layers, thresholds)
+
+    # Compute angles evenly spaced across 180 degrees
+    angles = [i * 180.0 / layers for i in range(layers)]
+
+    blur_radius = max(1, spacing // 3)
+    img = Image.fromarray(gray).filter(ImageFilter.GaussianBlur(radius=blur_radius))
+    w, h = img.size
+
+    out = Image.new("RGBA", (w, h), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(out)
+
+    for angle, threshold in zip(angles, cutoffs):
+        draw_hatch_layer(draw, img, w, h, angle, spacing, threshold)
+
+    return np.array(out)
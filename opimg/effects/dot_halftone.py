@@ -0,0 +1,318 @@
+"""dot-halftone -- Convert an image to a halftone dot pattern.
+
+Black dots on a transparent background, sized by local brightness.
+
+Dots are rasterized in one NumPy pass per band of rows rather than drawn one
+by one: each pixel is rotated into grid space, where its nearest dot center is
+a rounding away, and it is inked if it lies within that dot (or a neighbouring
+one, when dots are large enough to reach past their cell). Pillow draws each
+dot in its bounding box truncated to whole pixels (``dot_boxes``), and the
+rows it fills depend only on the box's size, so they are taken from Pillow
+once per size (``ellipse_spans``) and the output matches ``ImageDraw.ellipse``
+pixel for pixel. ``--supersample N`` averages N x N samples per pixel into the
+alpha channel for smooth dot edges, testing each sample against the ellipse
+inscribed in the box (``dot_shapes``).
+"""
+
+import math
+from typing import Optional
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+from ..registry import Param, register
+
+INK = (208, 101, 33)
+
+MAX_SUPERSAMPLE = 16
+
+# Pixels rasterized at once; bounds the float64 grid-space temporaries
+BAND_PIXELS = 1 << 18
+
+# How far a sample may lie outside a dot's truncated bounding box and still be
+# inked, to match Pillow's filled ellipses on average
+ELLIPSE_PAD = 0.4
+
+# First column of a row no dot fills: past any column it is compared with
+NO_SPAN = 1 << 30
+
+# Bound on how much further than its radius a dot inks from its grid point:
+# truncation moves the ellipse's center under a pixel in x and y, and grows
+# its semi-axes by up to half a pixel besides the pad
+SHAPE_SLACK = 3
+
+
+def dot_radius(brightness: np.ndarray, min_dot: float, max_dot: float) -> np.ndarray:
+    """Dot radius for each 0 (black) .. 255 (white) brightness: black -> max_dot, white -> min_dot."""
+    return min_dot + (1.0 - brightness / 255.0) * (max_dot - min_dot)
+
+
+def dot_boxes(ix: np.ndarray, iy: np.ndarray, radius: np.ndarray) -> tuple[np.ndarray, ...]:
+    """x0, y0, x1, y1 of the box Pillow draws each dot in: ``[ix - radius, ix + radius]`` truncated."""
+    return np.trunc(ix - radius), np.trunc(iy - radius), np.trunc(ix + radius), np.trunc(iy + radius)
+
+
+def dot_shapes(x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray) -> np.ndarray:
+    """(..., 4) center x, y and inverse squared semi-axes of the ellipse inscribed in each box."""
+    return np.stack([
+        (x0 + x1) / 2,
+        (y0 + y1) / 2,
+        ((x1 - x0) / 2 + ELLIPSE_PAD) ** -2,
+        ((y1 - y0) / 2 + ELLIPSE_PAD) ** -2,
+    ], axis=-1)
+
+
+def ellipse_spans(a: int, b: int) -> np.ndarray:
+    """(b + 1, 2) first and last column of each row ``ImageDraw.ellipse`` fills in the box (0, 0, a, b).
+
+    Rows it leaves empty get ``(NO_SPAN, -1)``.
+    """
+    canvas = Image.new("L", (a + 1, b + 1))
+    ImageDraw.Draw(canvas).ellipse([0, 0, a, b], fill=255)
+    filled = np.asarray(canvas) > 0
+    any_filled = filled.any(axis=1)
+    first = np.where(any_filled, filled.argmax(axis=1), NO_SPAN)
+    last = np.where(any_filled, a - filled[:, ::-1].argmax(axis=1), -1)
+    return np.stack([first, last], axis=-1)
+
+
+def span_extent(spans: np.ndarray, a: int, b: int) -> float:
+    """Furthest pixel ``spans`` (see ``ellipse_spans``) fill from the center of their (a, b) box."""
+    rows = np.flatnonzero(spans[:, 1] >= 0)
+    if not len(rows):
+        return 0.0
+    dx = np.maximum(np.abs(spans[rows, 0] - a / 2), np.abs(spans[rows, 1] - a / 2))
+    return float(np.hypot(dx, rows - b / 2).max())
+
+
+def dot_reach(ix: np.ndarray, iy: np.ndarray, center_x: np.ndarray, center_y: np.ndarray, extent: np.ndarray) -> float:
+    """Furthest any dot inks from its grid point (ix, iy), given how far it inks from its center; 0 without dots."""
+    reach = np.hypot(center_x - ix, center_y - iy) + extent
+    return float(np.max(reach[~np.isnan(reach)], initial=0))
+
+
+def neighbour_cells(spacing: int, reach: float) -> list[tuple[int, int]]:
+    """Cell offsets whose dots can cover a pixel, given the cell it is nearest the center of."""
+    k = math.ceil(reach / spacing + 0.5)
+    return [
+        (di, dj) for di in range(-k, k + 1) for dj in range(-k, k + 1)
+        if spacing * math.hypot(max(abs(di) - 0.5, 0), max(abs(dj) - 0.5, 0)) <= reach
+    ]
+
+
+def grid_bounds(width: int, height: int, spacing: int, angle: float, reach: float) -> tuple[range, range]:
+    """Grid indices along and across the rotated grid of every cell a pixel may look up.
+
+    Dots are centred on ``spacing``-spaced grid points rotated by ``angle``
+    about the image center, and reach ``reach`` pixels from their center.
+    """
+    cos_a, sin_a = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    corners = [(x - width / 2.0, y - height / 2.0) for x in (0, width) for y in (0, height)]
+    us = [cos_a * x + sin_a * y for x, y in corners]
+    vs = [-sin_a * x + cos_a * y for x, y in corners]
+    k = math.ceil(reach / spacing + 0.5)
+
+    def indices(lo: float, hi: float) -> range:
+        return range(math.floor(lo / spacing - 0.5) - k, math.ceil(hi / spacing + 0.5) + k + 1)
+
+    return indices(min(us), max(us)), indices(min(vs), max(vs))
+
+
+class DotGrid:
+    """The dots of a rotated halftone grid over ``blurred``, sized by its brightness.
+
+    Cells are numbered by their grid indices (``rows`` along the rotated x
+    axis, ``cols`` along y), and ``neighbours`` holds the cell offsets whose
+    dots can reach a sample. With ``antialiased``, ``shapes`` holds the
+    ellipse of each cell's dot for ``covered`` (NaN where there is none:
+    centers outside the image, radius 0). Otherwise ``first`` and ``last``
+    hold the rows Pillow fills in a box of each size (size 0: no dot), and
+    ``x0`` and ``row_base`` place each cell's box over them, for ``filled``.
+    """
+
+    def __init__(
+        self, blurred: np.ndarray, spacing: int, min_dot: float, max_dot: float, angle: float, antialiased: bool
+    ):
+        h, w = blurred.shape
+        self.spacing = spacing
+        self.cos_a = math.cos(math.radians(angle))
+        self.sin_a = math.sin(math.radians(angle))
+        self.cx, self.cy = w / 2.0, h / 2.0
+        self.rows, self.cols = grid_bounds(w, h, spacing, angle, max(min_dot, max_dot) + SHAPE_SLACK)
+
+        gx = np.arange(self.rows.start, self.rows.stop, dtype=np.float64)[:, None] * spacing
+        gy = np.arange(self.cols.start, self.cols.stop, dtype=np.float64)[None, :] * spacing
+        ix = self.cos_a * gx - self.sin_a * gy + self.cx
+        iy = self.sin_a * gx + self.cos_a * gy + self.cy
+        xi, yi = np.rint(ix).astype(np.int64), np.rint(iy).astype(np.int64)
+        inside = (xi >= 0) & (xi < w) & (yi >= 0) & (yi < h)
+        radius = dot_radius(blurred[np.where(inside, yi, 0), np.where(inside, xi, 0)], min_dot, max_dot)
+        radius[~(inside & (radius > 0))] = np.nan
+        x0, y0, x1, y1 = dot_boxes(ix, iy, radius)
+        center_x, center_y = (x0 + x1) / 2, (y0 + y1) / 2
+        if antialiased:
+            extent = np.maximum(x1 - x0, y1 - y0) / 2 + ELLIPSE_PAD
+            self.neighbours = neighbour_cells(spacing, dot_reach(ix, iy, center_x, center_y, extent))
+            # float32 halves the gathers; centers are whole or half pixels either way
+            self.shapes = dot_shapes(x0, y0, x1, y1).reshape(-1, 4).astype(np.float32)
+            return
+
+        dot = ~np.isnan(radius)
+        sizes, size_index = np.unique(
+            np.stack([x1[dot] - x0[dot], y1[dot] - y0[dot]], axis=-1).astype(np.int64), axis=0, return_inverse=True
+        )
+        size_index = size_index.reshape(-1)
+        size_spans = [ellipse_spans(int(a), int(b)) for a, b in sizes]
+        extent = np.full(radius.shape, np.nan)
+        extent[dot] = np.array([span_extent(spans, a, b) for spans, (a, b) in zip(size_spans, sizes)])[size_index]
+        self.neighbours = neighbour_cells(spacing, dot_reach(ix, iy, center_x, center_y, extent))
+
+        # Each size's rows, padded with empty ones above and below so that
+        # any pixel a cell is tested against lands in them: samples are
+        # within reach of its grid point, and the box's top within a pixel
+        # of the dot's radius
+        reach = spacing * (math.sqrt(0.5) + max(math.hypot(di, dj) for di, dj in self.neighbours))
+        pad = math.ceil(reach + max(min_dot, max_dot)) + 2
+        span_rows = 2 * pad + 1
+        spans = np.tile(np.array([NO_SPAN, -1], dtype=np.int32), (len(sizes) + 1, span_rows, 1))
+        for k, (size_rows, (_, b)) in enumerate(zip(size_spans, sizes), 1):
+            spans[k, pad:pad + b + 1] = size_rows
+        self.first, self.last = spans.reshape(-1, 2).T.copy()
+        # Per cell: its box's left column, and where the rows of its size
+        # start in ``first`` and ``last`` for a pixel's y; cells without a dot
+        # look up the empty rows of size 0 from their grid point
+        top = np.where(dot, y0, np.trunc(iy))
+        self.x0 = np.where(dot, x0, 0).reshape(-1).astype(np.int32)
+        rows = np.zeros(radius.shape, dtype=np.int64)
+        rows[dot] = (size_index + 1) * span_rows
+        self.row_base = (rows + pad - top).reshape(-1).astype(np.int32)
+
+    def nearest_cells(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Index of the cell whose grid point is nearest each sample at image coordinates (x, y)."""
+        u = self.cos_a * (x - self.cx) + self.sin_a * (y - self.cy)
+        v = -self.sin_a * (x - self.cx) + self.cos_a * (y - self.cy)
+        nearest = np.rint(u / self.spacing).astype(np.int64)
+        nearest += -self.rows.start
+        nearest *= len(self.cols)
+        nearest += np.rint(v / self.spacing).astype(np.int64)
+        nearest += -self.cols.start
+        return nearest
+
+    def filled(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Whether Pillow fills each pixel (x, y), int32 arrays broadcast together, drawing every dot."""
+        nearest = self.nearest_cells(x, y)
+        n_cols = len(self.cols)
+        filled = np.zeros(nearest.shape, dtype=bool)
+        for di, dj in self.neighbours:
+            cell = nearest + (di * n_cols + dj)
+            row = y + np.take(self.row_base, cell)
+            column = x - np.take(self.x0, cell)
+            filled |= (column >= np.take(self.first, row)) & (column <= np.take(self.last, row))
+        return filled
+
+    def covered(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Whether each sample at image coordinates (x, y), broadcast together, falls inside a dot's ellipse."""
+        nearest = self.nearest_cells(x, y)
+        n_cols = len(self.cols)
+        x, y = x.astype(np.float32), y.astype(np.float32)
+        covered = np.zeros(nearest.shape, dtype=bool)
+        for di, dj in self.neighbours:
+            shape = np.take(self.shapes, nearest + (di * n_cols + dj), axis=0)
+            center_x, center_y, inv_a, inv_b = np.moveaxis(shape, -1, 0)
+            dx = x - center_x
+            dx *= dx
+            dx *= inv_a
+            dy = y - center_y
+            dy *= dy
+            dy *= inv_b
+            dx += dy
+            covered |= dx <= 1
+        return covered
+
+
+def _memory(width: int, height: int, params: dict) -> int:
+    spacing = params["spacing"]
+    max_dot = params["max_dot"] if params["max_dot"] is not None else spacing / 2.0
+    radius = max(params["min_dot"], max_dot)
+    reach = radius + SHAPE_SLACK
+    rows, cols = grid_bounds(width, height, spacing, params["angle"], reach)
+    n = width * height
+    cells = len(rows) * len(cols)
+    band = min(n, max(1, BAND_PIXELS // width) * width)
+    # The padded rows of every box size for hard edges, built and split
+    sizes = min(cells, (2 * math.ceil(radius) + 2) ** 2) + 1
+    span_rows = 2 * math.ceil(spacing * math.sqrt(2) + reach + radius + 2) + 1
+    spans = sizes * span_rows * 8 * 2
+    # Grey and blurred images, the sample count, the RGBA result and the mask
+    # of inked pixels; per grid cell its dot's box or shape and the arrays it
+    # is worked out from; per band pixel its grid coordinates, nearest and
+    # neighbouring cells, a neighbour's box or shape, distance and coverage.
+    return n * (1 + 1 + 2 + 4 + 1) + cells * (8 * 14) + spans + band * 8 * 7
+
+
+@register(
+    "dot-halftone",
+    description="Generate a halftone dot pattern from an image.",
+    suffix="-halftone",
+    version="3",
+    params=[
+        Param("--spacing", type=int, default=8, help="Pixels between dot centers (default: 8)"),
+        Param("--min-dot", type=float, default=0, help="Minimum dot radius (default: 0)"),
+        Param("--max-dot", type=float, help="Maximum dot radius (default: spacing/2)"),
+        Param("--angle", type=float, default=0, help="Grid rotation in degrees (default: 0)"),
+        Param("--supersample", type=int, default=1, metavar="N",
+              help="Antialias dot edges by averaging N x N samples per pixel (default: 1, hard edges)"),
+    ],
+    mode="L",
+    format="PNG",
+    message="dot-halftone: {input_name} -> {output_name} (spacing={spacing}, angle={angle})",
+    memory=_memory,
+)
+def dot_halftone(
+    gray: np.ndarray,
+    *,
+    spacing: int,
+    min_dot: float,
+    max_dot: Optional[float],
+    angle: float,
+    supersample: int,
+) -> np.ndarray:
+    if max_dot is None:
+        max_dot = spacing / 2.0
+    if not 1 <= supersample <= MAX_SUPERSAMPLE:
+        raise ValueError(f"--supersample must be between 1 and {MAX_SUPERSAMPLE}, got {supersample}")
+
+    # Slight blur to smooth sampling
+    blur_radius = max(1, spacing // 4)
+    blurred = np.asarray(Image.fromarray(gray).filter(ImageFilter.GaussianBlur(radius=blur_radius)))
+    h, w = blurred.shape
+    grid = DotGrid(blurred, spacing, min_dot, max_dot, angle, antialiased=supersample > 1)
+
+    # Samples spread evenly over each pixel, around its integer coordinate
+    offsets = (np.arange(supersample) + 0.5) / supersample - 0.5
+    count = np.zeros((h, w), dtype=np.uint16)
+    band_rows = max(1, BAND_PIXELS // w)
+    for top in range(0, h, band_rows):
+        if supersample == 1:
+            x = np.arange(w, dtype=np.int32)[None, :]
+            y = np.arange(top, min(h, top + band_rows), dtype=np.int32)[:, None]
+            count[top:top + len(y)] = grid.filled(x, y)
+            continue
+        x = np.arange(w, dtype=np.float64)[None, :]
+        y = np.arange(top, min(h, top + band_rows), dtype=np.float64)[:, None]
+        for oy in offsets:
+            for ox in offsets:
+                count[top:top + len(y)] += grid.covered(x + ox, y + oy)
+
+    out = np.zeros((h, w, 4), dtype=np.uint8)
+    inked = count > 0
+    out[inked, :3] = INK
+    if supersample == 1:
+        out[..., 3] = inked * np.uint8(255)
+    else:
+        # Coverage to alpha, rounded; 255 * 16**2 still fits in uint16
+        count *= 255
+        count += supersample**2 // 2
+        count //= supersample**2
+        out[..., 3] = count
+    return out
@@ -0,0 +1,80 @@
+"""Composite image on itself offset and faded N times for a ghosting/echo effect."""
+
+import numpy as np
+
+from ..registry import Param, register
+
+
+def _memory(width: int, height: int, params: dict) -> int:
+    # float64 source, accumulator, one placed layer and a temporary of its size;
+    # multiply also holds the normalised layer and its masked copies
+    per_pixel = 152 if params["blend"] == "multiply" else 96
+    return (per_pixel + 3) * width * height
+
+
+@register(
+    "echo",
+    description="Create a ghosting/echo effect by compositing offset faded copies.",
+    suffix="-echo",
+    params=[
+        Param("--count", type=int, default=12, help="Number of echo copies (default: 12)"),
+        Param("--offset-x", type=int, default=30, help="Horizontal offset per echo (default: 30)"),
+        Param("--offset-y", type=int, default=12, help="Vertical offset per echo (default: 12)"),
+        Param("--decay", type=float, default=0.6, help="Opacity multiplier per step (default: 0.6)"),
+        Param("--blend", choices=["additive", "screen", "multiply"], default="additive",
+              help="Blend mode for echo layers (default: additive)"),
+    ],
+    message="Saved echo image to {output} (count={count}, offset=({offset_x},{offset_y}), decay={decay})",
+    memory=_memory,
+)
+def echo(
+    pixels: np.ndarray, *, count: int, offset_x: int, offset_y: int, decay: float, blend: str
+) -> np.ndarray:
+    h, w, _ = pixels.shape
+    src = pixels.astype(np.float64)
+
+    def place_layer(i):
+        """Return an (h, w, 3) float64 array with src at offset, scaled by decay."""
+        ox = i * offset_x
+        oy = i * offset_y
+        opacity = decay ** i
+        layer = np.zeros((h, w, 3), dtype=np.float64)
+        src_x0 = max(0, -ox)
+        src_y0 = max(0, -oy)
+        dst_x0 = max(0, ox)
+        dst_y0 = max(0, oy)
+        cw = min(w - src_x0, w - dst_x0)
+        ch = min(h - src_y0, h - dst_y0)
+        if cw > 0 and ch > 0:
+            layer[dst_y0:dst_y0+ch, dst_x0:dst_x0+cw] = (
+                src[src_y0:src_y0+ch, src_x0:src_x0+cw] * opacity
+            )
+        return layer
+
+    if blend == "additive":
+        # Sum all layers — bright, saturated trails that glow
+        acc = np.zeros((h, w, 3), dtype=np.float64)
+        for i in range(count, -1, -1):
+            acc += place_layer(i)
+        result = acc
+
+    elif blend == "screen":
+        # Screen: 1 - prod(1 - layer/255) — always brightens, softer than additive
+        complement = np.ones((h, w, 3), dtype=np.float64)
+        for i in range(count, -1, -1):
+            complement *= (1.0 - place_layer(i) / 255.0)
+        result = (1.0 - complement) * 255.0
+
+    else:
+        # Multiply: prod(layer/255) — darkens, moody trails
+        acc = np.ones((h, w, 3), dtype=np.float64)
+        for i in range(count, -1, -1):
+            layer = place_layer(i)
+            # Only multiply where layer has content, otherwise treat as white (1.0)
+            mask = layer.sum(axis=2) > 0
+            normed = np.ones((h, w, 3), dtype=np.float64)
+            normed[mask] = layer[mask] / 255.0
+            acc *= normed
+        result = acc * 255.0
+
+    return np.clip(result, 0, 255).astype(np.uint8)
@@ -0,0 +1,48 @@
+"""Fold an image along an axis by mirroring or repeating one half.
+
+In-process counterpart of ``fold/fold.sh``.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from ..registry import Param, register
+
+
+def _report(ctx: dict) -> str:
+    size = ctx["src_width"] if ctx["axis"] == "x" else ctx["src_height"]
+    position = ctx["position"] if ctx["position"] is not None else size // 2
+    return f"Fold {ctx['axis']}-axis at {position}px ({ctx['mode']}) → {ctx['output']}"
+
+
+@register(
+    "fold",
+    description="Fold an image by mirroring or repeating one half across a fold line.",
+    suffix="-fold",
+    params=[
+        Param("--axis", choices=["x", "y"], default="x",
+              help="Fold axis: x (vertical fold) or y (horizontal fold) (default: x)"),
+        Param("--position", type=int, help="Pixel position of fold line (default: center)"),
+        Param("--mode", choices=["mirror", "repeat"], default="mirror",
+              help="mirror or repeat (default: mirror)"),
+    ],
+    format="PNG",
+    message=_report,
+)
+def fold(pixels: np.ndarray, *, axis: str, position: Optional[int], mode: str) -> np.ndarray:
+    # Work on columns; a horizontal fold is the same operation on the transposed view.
+    view = pixels if axis == "x" else pixels.swapaxes(0, 1)
+    w = view.shape[1]
+    if position is None:
+        position = w // 2
+    position = max(0, min(position, w))
+
+    kept = view[:, :position]
+    copy = kept[:, ::-1] if mode == "mirror" else kept
+
+    result = np.zeros_like(view)
+    result[:, :position] = kept
+    span = min(position, w - position)
+    result[:, position:position + span] = copy[:, :span]
+    return result if axis == "x" else result.swapaxes(0, 1)
@@ -0,0 +1,23 @@
+"""Invert the lightness channel of an image in LAB color space."""
+
+import numpy as np
+from PIL import Image
+
+from ..registry import per_pixel, register
+
+
+@register(
+    "invert-lightness",
+    description="Invert the lightness channel of an image in LAB color space.",
+    suffix="-invl",
+    message="Saved lightness-inverted image to {output}",
+    # Pillow LAB/RGB images (4 bytes per pixel), split bands and the arrays in between
+    memory=per_pixel(24),
+)
+def invert_lightness(pixels: np.ndarray) -> np.ndarray:
+    """Convert to LAB, invert L channel, convert back to RGB."""
+    lab = Image.fromarray(pixels).convert("LAB")
+    arr = np.array(lab)
+    arr[:, :, 0] = 255 - arr[:, :, 0]
+    lab_out = Image.merge("LAB", [Image.fromarray(arr[:, :, c]) for c in range(3)])
+    return np.array(lab_out.convert("RGB"))
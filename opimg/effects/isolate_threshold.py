@@ -0,0 +1,44 @@
+"""Extract dark pixels with a transparent background, recolored and upscaled.
+
+In-process counterpart of ``isolate-threshold/isolate-threshold.sh``.
+"""
+
+import numpy as np
+
+from ..registry import Param, register
+from .closest_palette import hex_to_rgb
+
+
+def _memory(width: int, height: int, params: dict) -> int:
+    n, scale = width * height, max(1, params["scale"])
+    # Mask, its (y, x) indices and the RGBA result, then the row- and column-repeated
+    # copies; the upscaled result is copied once more by the encoder, so count it twice
+    base = n * (1 + 16 + 4)
+    return base + (4 * n * scale + 8 * n * scale * scale if scale > 1 else 0)
+
+
+@register(
+    "isolate-threshold",
+    description="Extract dark pixels onto a transparent background.",
+    suffix="-threshold",
+    params=[
+        Param("--scale", type=int, default=1, help="Upscale multiplier (default: 1)"),
+        Param("--threshold", type=float, default=50, help="Black/white cutoff percentage (default: 50)"),
+        Param("--color", default="#ff0000", help='Fill color for dark pixels (default: "#ff0000")'),
+    ],
+    mode="L",
+    format="PNG",
+    message=(
+        "Isolate threshold {threshold}% {color} at {scale}x ({width}x{height}) → {output}"
+    ),
+    memory=_memory,
+)
+def isolate_threshold(gray: np.ndarray, *, scale: int, threshold: float, color: str) -> np.ndarray:
+    h, w = gray.shape
+    dark = gray <= threshold * 255.0 / 100.0
+
+    result = np.zeros((h, w, 4), dtype=np.uint8)
+    result[dark] = (*hex_to_rgb(color), 255)
+    if scale > 1:
+        result = np.repeat(np.repeat(result, scale, axis=0), scale, axis=1)
+    return result
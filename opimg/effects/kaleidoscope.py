@@ -0,0 +1,78 @@
+"""Extract a wedge from the image and mirror/rotate it N times around the center."""
+
+import numpy as np
+from scipy.ndimage import map_coordinates
+
+from ..registry import Param, per_pixel, register
+
+
+@register(
+    "kaleidoscope",
+    description="Create a kaleidoscope effect by mirroring wedges around center.",
+    suffix="-kaleido",
+    params=[
+        Param("--segments", type=int, default=6, help="Number of kaleidoscope segments (default: 6)"),
+        Param("--angle", type=float, default=90.0, help="Rotation offset in degrees (default: 90.0)"),
+    ],
+    message="Saved kaleidoscope image to {output} (segments={segments}, angle={angle})",
+    # float64 source and result, ~14 float64 coordinate grids, the per-channel sampling buffers
+    memory=per_pixel(172),
+)
+def kaleidoscope(pixels: np.ndarray, *, segments: int, angle: float) -> np.ndarray:
+    arr = pixels.astype(np.float64)
+    h, w, _ = arr.shape
+
+    cx, cy = w / 2.0, h / 2.0
+
+    # Create output coordinate grid
+    yy, xx = np.mgrid[0:h, 0:w]
+
+    # Convert to relative coordinates from center
+    dx = xx - cx
+    dy = yy - cy
+
+    # Compute angle and radius in polar coordinates
+    theta = np.arctan2(dy, dx)
+    radius = np.sqrt(dx ** 2 + dy ** 2)
+
+    # Add angle offset (convert degrees to radians)
+    theta = theta - np.radians(angle)
+
+    # Map theta into a single wedge
+    wedge_angle = 2.0 * np.pi / segments
+
+    # Normalize theta to [0, 2*pi)
+    theta = theta % (2.0 * np.pi)
+
+    # Determine which segment we're in
+    segment_idx = (theta / wedge_angle).astype(int)
+
+    # Map into single wedge
+    theta_mapped = theta % wedge_angle
+
+    # Mirror odd segments
+    odd_mask = (segment_idx % 2) == 1
+    theta_mapped[odd_mask] = wedge_angle - theta_mapped[odd_mask]
+
+    # Add back the angle offset for sampling
+    theta_source = theta_mapped + np.radians(angle)
+
+    # Convert back to cartesian source coordinates
+    src_x = cx + radius * np.cos(theta_source)
+    src_y = cy + radius * np.sin(theta_source)
+
+    # Clamp to image bounds
+    src_x = np.clip(src_x, 0, w - 1)
+    src_y = np.clip(src_y, 0, h - 1)
+
+    # Sample each channel using map_coordinates
+    result = np.zeros_like(arr)
+    for c in range(3):
+        result[:, :, c] = map_coordinates(
+            arr[:, :, c],
+            [src_y, src_x],
+            order=1,
+            mode='reflect',
+        )
+
+    return result.astype(np.uint8)
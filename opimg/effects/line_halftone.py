@@ -0,0 +1,94 @@
+"""line-halftone -- Convert an image to a variable-width line pattern.
+
+Black lines on a transparent background, width varies with brightness.
+"""
+
+import math
+from typing import Optional
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+from ..registry import Param, per_pixel, register
+
+
+@register(
+    "line-halftone",
+    description="Generate a halftone line pattern from an image.",
+    suffix="-lines",
+    params=[
+        Param("--spacing", type=int, default=14, help="Pixels between line centers (default: 14)"),
+        Param("--min-width", type=float, default=0, help="Minimum line width (default: 0)"),
+        Param("--max-width", type=float, help="Maximum line width (default: spacing)"),
+        Param("--angle", type=float, default=0,
+              help="Line angle in degrees, 0=horizontal 90=vertical (default: 0)"),
+    ],
+    mode="L",
+    format="PNG",
+    message="line-halftone: {input_name} -> {output_name} (spacing={spacing}, angle={angle})",
+    # Grey and blurred images, the RGBA canvas and its array (made through a bytes copy)
+    memory=per_pixel(16),
+)
+def line_halftone(
+    gray: np.ndarray, *, spacing: int, min_width: float, max_width: Optional[float], angle: float
+) -> np.ndarray:
+    if max_width is None:
+        max_width = float(spacing)
+
+    blur_radius = max(1, spacing // 3)
+    img = Image.fromarray(gray).filter(ImageFilter.GaussianBlur(radius=blur_radius))
+    w, h = img.size
+    pixels = img.load()
+
+    out = Image.new("RGBA", (w, h), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(out)
+
+    angle_rad = math.radians(angle)
+    cos_a = math.cos(angle_rad)
+    sin_a = math.sin(angle_rad)
+
+    # Direction along the line and perpendicular (for spacing)
+    # Lines run along the angle direction; spacing is perpendicular.
+    # "Along" vector: (cos_a, sin_a)
+    # "Perp" vector: (-sin_a, cos_a)
+
+    diag = math.hypot(w, h)
+    num_lines = int(diag / spacing) + 2
+    # Number of sample points along each line
+    num_samples = int(diag / spacing) + 2
+
+    cx, cy = w / 2.0, h / 2.0
+
+    for li in range(-num_lines, num_lines + 1):
+        # Line center in image space: offset perpendicular from center
+        perp_offset = li * spacing
+        line_cx = cx + perp_offset * (-sin_a)
+        line_cy = cy + perp_offset * cos_a
+
+        # Walk along the line and draw segments with variable width
+        step = spacing
+        for si in range(-num_samples, num_samples + 1):
+            along_offset = si * step
+            # Current point
+            px = line_cx + along_offset * cos_a
+            py = line_cy + along_offset * sin_a
+            # Next point
+            nx = line_cx + (along_offset + step) * cos_a
+            ny = line_cy + (along_offset + step) * sin_a
+
+            # Sample brightness at midpoint of this segment
+            mx, my = (px + nx) / 2.0, (py + ny) / 2.0
+            xi, yi = int(round(mx)), int(round(my))
+            if xi < 0 or xi >= w or yi < 0 or yi >= h:
+                continue
+
+            brightness = pixels[xi, yi]
+            t = 1.0 - brightness / 255.0
+            line_w = min_width + t * (max_width - min_width)
+
+            if line_w < 0.5:
+                continue
+
+            draw.line([(px, py), (nx, ny)], fill=(208, 101, 33, 255), width=max(1, int(round(line_w))))
+
+    return np.array(out)
@@ -0,0 +1,442 @@
+"""Sort contiguous runs of pixels by brightness, hue, or saturation.
+
+Lines (rows, or columns) are sorted many at a time, with no Python loop over
+runs: the metric is computed once per chunk of lines, the runs of pixels below
+the threshold are numbered by a cumulative sum, and one segmented sort keyed by
+(run, metric) reorders every run. Equal values keep their order, so results do
+not depend on the platform's sorting algorithm.
+
+Lines never share pixels, so with ``--workers`` the image is put in shared
+memory once and worker processes sort bands of lines in place
+(``sort_parallel``); the output is byte-identical to one process.
+"""
+
+import functools
+import math
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+from typing import Any, Optional
+
+import numpy as np
+
+from ..registry import Param, register
+
+# Pixels sorted at once; bounds the metric's float64 temporaries
+CHUNK_PIXELS = 1 << 18
+
+
+def pixel_brightness(rgb: np.ndarray) -> np.ndarray:
+    """Perceived brightness (ITU-R BT.601)."""
+    return 0.299 * rgb[:, 0] + 0.587 * rgb[:, 1] + 0.114 * rgb[:, 2]
+
+
+def pixel_hue(rgb: np.ndarray) -> np.ndarray:
+    """Hue component (0-360) from RGB."""
+    r, g, b = rgb[:, 0] / 255.0, rgb[:, 1] / 255.0, rgb[:, 2] / 255.0
+    cmax = np.maximum(np.maximum(r, g), b)
+    cmin = np.minimum(np.minimum(r, g), b)
+    delta = cmax - cmin
+
+    hue = np.zeros(len(rgb), dtype=np.float64)
+    mask_r = (cmax == r) & (delta > 0)
+    mask_g = (cmax == g) & (delta > 0)
+    mask_b = (cmax == b) & (delta > 0)
+
+    hue[mask_r] = 60.0 * (((g[mask_r] - b[mask_r]) / delta[mask_r]) % 6)
+    hue[mask_g] = 60.0 * (((b[mask_g] - r[mask_g]) / delta[mask_g]) + 2)
+    hue[mask_b] = 60.0 * (((r[mask_b] - g[mask_b]) / delta[mask_b]) + 4)
+
+    return hue
+
+
+def pixel_saturation(rgb: np.ndarray) -> np.ndarray:
+    """HSV saturation component (0-255 scale)."""
+    r, g, b = rgb[:, 0] / 255.0, rgb[:, 1] / 255.0, rgb[:, 2] / 255.0
+    cmax = np.maximum(np.maximum(r, g), b)
+    cmin = np.minimum(np.minimum(r, g), b)
+    delta = cmax - cmin
+
+    sat = np.zeros(len(rgb), dtype=np.float64)
+    nonzero = cmax > 0
+    sat[nonzero] = (delta[nonzero] / cmax[nonzero]) * 255.0
+    return sat
+
+
+METRIC_FN = {
+    "brightness": pixel_brightness,
+    "hue": pixel_hue,
+    "saturation": pixel_saturation,
+}
+
+
+def segmented_order(values: np.ndarray, runs: np.ndarray) -> np.ndarray:
+    """Order sorting ``values`` within each of the nondecreasing ``runs``, like ``np.lexsort((values, runs))``.
+
+    Values are replaced by their dense rank and each one by a unique integer
+    key of (run, rank, position), so that a plain integer sort, much faster
+    than a stable sort of floats, gives the same order.
+    """
+    n = len(values)
+    by_value = np.argsort(values)
+    ordered = values[by_value]
+    rank = np.empty(n, dtype=np.int64)
+    rank[by_value] = np.concatenate([[0], np.cumsum(ordered[1:] != ordered[:-1])])
+    distinct = int(rank[by_value[-1]]) + 1
+    if (int(runs[-1]) + 1) * distinct * n >= 1 << 63:
+        # Keys would overflow int64 (lines of millions of pixels)
+        return np.lexsort((values, runs))
+    key = runs * distinct
+    key += rank
+    key *= n
+    key += np.arange(n)
+    key.sort()
+    return key % n
+
+
+def sort_sequence(
+    pixels: np.ndarray,
+    line_starts: np.ndarray,
+    metric_fn,
+    lower: float,
+    upper: float,
+    descending: bool = False,
+    min_run: int = 1,
+    max_run: int = 0,
+) -> np.ndarray:
+    """Sort the runs of pixels with values in [``lower``, ``upper``) along lines of a (N, 3) sequence.
+
+    ``line_starts`` holds the position of each line's first pixel; runs never
+    cross from one line to the next. Runs shorter than ``min_run`` are left
+    alone and, with ``max_run``, longer ones are sorted in pieces of that many
+    pixels. The metric is computed once, runs are numbered with a cumulative
+    sum and one segmented sort keyed by (run, metric) orders all of them.
+    Equal values keep their order.
+    """
+    values = metric_fn(pixels).astype(np.float64)
+    inside = np.flatnonzero((values >= lower) & (values < upper))
+    result = pixels.copy()
+    first = np.zeros(len(pixels), dtype=bool)
+    first[line_starts] = True
+    # A run starts after a pixel outside any run, and at the start of every line
+    starts = np.ones(len(inside), dtype=bool)
+    starts[1:] = (np.diff(inside) != 1) | first[inside[1:]]
+    if min_run > 1:
+        runs = np.cumsum(starts)
+        long_enough = np.bincount(runs)[runs] >= min_run
+        inside, starts = inside[long_enough], starts[long_enough]
+    if not len(inside):
+        return result
+    if max_run > 0:
+        # Offset of every pixel in its run: a new piece every max_run pixels
+        heads = np.flatnonzero(starts)
+        offsets = np.arange(len(inside)) - np.repeat(heads, np.diff(heads, append=len(inside)))
+        starts = offsets % max_run == 0
+    keys = values[inside]
+    if descending:
+        np.negative(keys, out=keys)
+    order = segmented_order(keys, np.cumsum(starts))
+    # Moved as whole 3-byte items, several times faster than (N, 3) rows
+    pixel = np.dtype((np.void, 3))
+    result.view(pixel)[inside, 0] = pixels.view(pixel)[inside[order], 0]
+    return result
+
+
+def sort_runs(lines: np.ndarray, metric_fn, lower: float, upper: float, **options) -> np.ndarray:
+    """``sort_sequence`` over each line of ``lines`` (N, L, 3) at once."""
+    n, length, _ = lines.shape
+    flat = np.ascontiguousarray(lines).reshape(-1, 3)
+    line_starts = np.arange(0, n * length, length)
+    return sort_sequence(flat, line_starts, metric_fn, lower, upper, **options).reshape(n, length, 3)
+
+
+def sort_line(line: np.ndarray, metric_fn, threshold: float) -> np.ndarray:
+    """Sort contiguous runs of pixels that meet the threshold condition."""
+    return sort_runs(line[None], metric_fn, 0, threshold)[0]
+
+
+def sort_lines(pixels: np.ndarray, out: np.ndarray, columns: bool, **options) -> None:
+    """Sort the rows (or columns) of ``pixels`` into ``out``, a chunk of lines at a time.
+
+    Columns are sorted as lines of a transposed view and written straight back
+    into place.
+    """
+    axis = 1 if columns else 0
+    length = pixels.shape[1 - axis]
+    step = max(1, CHUNK_PIXELS // length)
+    for start in range(0, pixels.shape[axis], step):
+        index = (slice(None), slice(start, start + step)) if axis else slice(start, start + step)
+        lines = pixels[index].swapaxes(0, 1) if axis else pixels[index]
+        sorted_lines = sort_runs(lines, **options)
+        out[index] = sorted_lines.swapaxes(0, 1) if axis else sorted_lines
+
+
+@functools.lru_cache(maxsize=2)
+def line_map(height: int, width: int, angle: float) -> tuple[np.ndarray, np.ndarray]:
+    """The pixels of a ``width`` x ``height`` image along parallel lines at ``angle`` degrees.
+
+    Returns the flat index of every pixel, line after line, and the position
+    where each line starts. ``angle`` turns clockwise from left-to-right rows
+    (90 runs down the columns); each line takes one pixel per column, or per
+    row when steeper than 45 degrees, so the lines tile the image. The map
+    depends on the size and angle only, so it is cached (read-only) and reused
+    for every image of that size.
+    """
+    theta = math.radians(angle)
+    dx, dy = math.cos(theta), math.sin(theta)
+    rows, cols = np.ogrid[:height, :width]
+    if abs(dx) >= abs(dy):
+        along, across, slope, forward, length = cols, rows, dy / dx, dx > 0, width
+    else:
+        along, across, slope, forward, length = rows, cols, dx / dy, dy > 0, height
+    # Lines are numbered by where they cross the first column (or row)
+    shift = np.floor(np.arange(length) * slope + 0.5).astype(np.int64)
+    line = across - shift[along]
+    line -= line.min()
+    key = line * length
+    key += along if forward else length - 1 - along
+    index = np.argsort(key, axis=None).astype(np.int32 if height * width < 1 << 31 else np.int64)
+    counts = np.bincount(line.reshape(-1))
+    line_starts = np.cumsum(counts[counts > 0]) - counts[counts > 0]
+    index.setflags(write=False)
+    line_starts.setflags(write=False)
+    return index, line_starts
+
+
+def sort_mapped(
+    pixels: np.ndarray,
+    out: np.ndarray,
+    index: np.ndarray,
+    line_starts: np.ndarray,
+    lines: Optional[range] = None,
+    **options,
+) -> None:
+    """Sort ``pixels`` into ``out`` along the lines of a ``line_map``, a chunk of lines at a time.
+
+    ``lines`` picks a range of the map's lines (default: all of them).
+    """
+    pixel = np.dtype((np.void, 3))
+    source = np.ascontiguousarray(pixels).view(pixel).reshape(-1)
+    target = out.view(pixel).reshape(-1)
+    longest = max(pixels.shape[:2])
+    step = max(1, CHUNK_PIXELS // longest)
+    bounds = np.append(line_starts, len(index))
+    lines = range(len(line_starts)) if lines is None else lines
+    for first in range(lines.start, lines.stop, step):
+        last = min(first + step, lines.stop)
+        at = index[bounds[first]:bounds[last]]
+        sequence = source[at].view(np.uint8).reshape(-1, 3)
+        starts = line_starts[first:last] - bounds[first]
+        target[at] = sort_sequence(sequence, starts, **options).view(pixel).reshape(-1)
+
+
+# What a line is: a flip of the image and whether lines are its columns, or a
+# line map (index, line_starts) for other angles
+Layout = tuple[Any, bool, Optional[np.ndarray], Optional[np.ndarray]]
+
+
+def line_count(shape: tuple[int, ...], layout: Layout) -> int:
+    _, columns, _, line_starts = layout
+    return len(line_starts) if line_starts is not None else shape[1 if columns else 0]
+
+
+def sort_band(pixels: np.ndarray, layout: Layout, lines: range, **options) -> None:
+    """Sort the lines in ``lines`` of ``pixels``, in place.
+
+    Bands of lines share no pixel, so any number of them can be sorted at once.
+    """
+    flip, columns, index, line_starts = layout
+    if index is not None:
+        sort_mapped(pixels, pixels, index, line_starts, lines, **options)
+        return
+    band = (slice(None), slice(lines.start, lines.stop)) if columns else slice(lines.start, lines.stop)
+    view = pixels[flip][band]
+    sort_lines(view, view, columns, **options)
+
+
+# State of a --workers process: the shared blocks, the image in them, and the sort
+_worker: dict[str, Any] = {}
+
+
+def _share(array: np.ndarray, blocks: list) -> np.ndarray:
+    """A copy of ``array`` in a new shared-memory block, appended to ``blocks``."""
+    block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    blocks.append(block)
+    shared = np.ndarray(array.shape, array.dtype, buffer=block.buf)
+    shared[...] = array
+    return shared
+
+
+def _attach(pixels: tuple, index: Optional[tuple], layout: Layout, options: dict) -> None:
+    """Pool initializer: map the shared image (and line map) without copying it."""
+    blocks = []
+    for name, shape, dtype in filter(None, (pixels, index)):
+        blocks.append(shared_memory.SharedMemory(name=name))
+    _worker["blocks"] = blocks
+    _worker["pixels"] = np.ndarray(pixels[1], pixels[2], buffer=blocks[0].buf)
+    if index is not None:
+        layout = layout[:2] + (np.ndarray(index[1], index[2], buffer=blocks[1].buf), layout[3])
+    _worker["layout"] = layout
+    _worker["options"] = options
+
+
+def _sort_shared_band(lines: range) -> None:
+    sort_band(_worker["pixels"], _worker["layout"], lines, **_worker["options"])
+
+
+def sort_parallel(pixels: np.ndarray, layout: Layout, workers: int, **options) -> np.ndarray:
+    """Sorted copy of ``pixels``, bands of lines sorted in place by ``workers`` processes.
+
+    The image (and line map) go to shared memory once: tasks name bands of
+    lines, and no pixel data is pickled. The result is the same as one
+    ``sort_band`` over every line.
+    """
+    lines = line_count(pixels.shape, layout)
+    flip, columns, index, line_starts = layout
+    blocks: list = []
+    shared = None
+    try:
+        shared = _share(pixels, blocks)
+        spec = (blocks[0].name, shared.shape, shared.dtype.str)
+        index_spec = None
+        if index is not None:
+            _share(index, blocks)
+            index_spec = (blocks[1].name, index.shape, index.dtype.str)
+        # A few bands per worker, so uneven ones even out
+        bounds = np.linspace(0, lines, min(lines, 4 * workers) + 1).astype(int)
+        bands = [range(a, b) for a, b in zip(bounds[:-1], bounds[1:])]
+        initargs = (spec, index_spec, (flip, columns, None, line_starts), options)
+        with multiprocessing.Pool(workers, initializer=_attach, initargs=initargs) as pool:
+            for _ in pool.imap_unordered(_sort_shared_band, bands):
+                pass
+        return shared.copy()
+    finally:
+        shared = None  # a block cannot close while an array still maps it
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+def _memory(width: int, height: int, params: dict) -> int:
+    n = width * height
+    workers = params["workers"] or os.cpu_count() or 1
+    # Per pixel of a chunk: the metric, run numbering, sort keys and copies, and
+    # the run lengths and offsets when runs are limited
+    per_pixel = 97 + (24 if params["min_run"] > 1 or params["max_run"] else 0)
+    if params["angle"] is not None and params["angle"] % 90:
+        # The cached line map, and the line numbers, keys and order it is built from;
+        # chunks are whole lines of up to the longer side, gathered and scattered
+        length = max(width, height)
+        chunk = min(n, max(1, CHUNK_PIXELS // length) * length)
+        shared = 7 * n if workers > 1 else 0
+        return 3 * n + 4 * n + max(28 * n, shared + workers * chunk * (per_pixel + 5))
+    length, lines = (height, width) if params["direction"] == "column" else (width, height)
+    chunk = min(lines, max(1, CHUNK_PIXELS // length)) * length
+    if workers > 1:
+        # The shared copy of the image, and one chunk in every worker
+        return 3 * n + 3 * n + workers * chunk * per_pixel
+    return 3 * n + chunk * per_pixel
+
+
+def _report(ctx: dict) -> str:
+    details = [f"by={ctx['by']}"]
+    if ctx["lower"] or ctx["upper"] is not None:
+        upper = ctx["threshold"] if ctx["upper"] is None else ctx["upper"]
+        details.append(f"range={ctx['lower']:g}-{upper:g}")
+    else:
+        details.append(f"threshold={ctx['threshold']}")
+    if ctx["angle"] is not None:
+        details.append(f"angle={ctx['angle']:g}")
+    else:
+        details.append(f"direction={ctx['direction']}")
+    if ctx["order"] != "ascending":
+        details.append(ctx["order"])
+    if ctx["min_run"] > 1:
+        details.append(f"min-run={ctx['min_run']}")
+    if ctx["max_run"]:
+        details.append(f"max-run={ctx['max_run']}")
+    if ctx["workers"] != 1:
+        details.append(f"workers={ctx['workers'] or os.cpu_count()}")
+    return f"Saved pixel-sorted image to {ctx['output']} ({', '.join(details)})"
+
+
+@register(
+    "pixel-sort",
+    description="Pixel-sort an image by brightness, hue, or saturation.",
+    suffix="-psort",
+    version="2",
+    params=[
+        Param("--by", choices=["brightness", "hue", "saturation"], default="brightness",
+              help="Sort metric (default: brightness)"),
+        Param("--threshold", type=int, default=200,
+              help="Pixels below this value get sorted (0-255, default: 200)"),
+        Param("--direction", choices=["row", "column"], default="row",
+              help="Sort direction (default: row)"),
+        Param("--angle", type=float,
+              help="Sort along parallel lines at this angle in degrees, clockwise from "
+                   "left-to-right rows, e.g. 90 for columns or 30; overrides --direction"),
+        Param("--lower", type=float, default=0.0,
+              help="Only pixels at or above this value get sorted (default: 0)"),
+        Param("--upper", type=float,
+              help="Only pixels below this value get sorted (default: --threshold)"),
+        Param("--order", choices=["ascending", "descending"], default="ascending",
+              help="Sort order along each line (default: ascending)"),
+        Param("--min-run", type=int, default=1,
+              help="Leave runs shorter than this many pixels unsorted (default: 1)"),
+        Param("--max-run", type=int, default=0,
+              help="Sort longer runs in pieces of at most this many pixels (default: 0, no limit)"),
+        Param("--workers", type=int, default=1,
+              help="Processes sorting bands of lines in parallel, through shared memory; "
+                   "same output (0 = one per CPU, default: 1)"),
+    ],
+    message=_report,
+    memory=_memory,
+)
+def pixel_sort(
+    pixels: np.ndarray,
+    *,
+    by: str,
+    threshold: int,
+    direction: str,
+    angle: Optional[float],
+    lower: float,
+    upper: Optional[float],
+    order: str,
+    min_run: int,
+    max_run: int,
+    workers: int,
+) -> np.ndarray:
+    upper = threshold if upper is None else upper
+    if lower > upper:
+        raise ValueError(f"--lower ({lower:g}) must not be above --upper ({upper:g})")
+    if max_run < 0:
+        raise ValueError(f"--max-run must be 0 (no limit) or more, got {max_run}")
+    if workers < 0:
+        raise ValueError(f"--workers must be 0 (one per CPU) or more, got {workers}")
+    options = {
+        "metric_fn": METRIC_FN[by],
+        "lower": lower,
+        "upper": upper,
+        "descending": order == "descending",
+        "min_run": min_run,
+        "max_run": max_run,
+    }
+    if angle is None:
+        layout = (np.s_[:], direction == "column", None, None)
+    else:
+        turns, rest = divmod(angle % 360, 90)
+        if rest:
+            layout = (np.s_[:], False, *line_map(pixels.shape[0], pixels.shape[1], angle % 360))
+        else:
+            # Rows or columns, read backwards from 180 degrees on
+            flip = {2: np.s_[:, ::-1], 3: np.s_[::-1]}.get(int(turns), np.s_[:])
+            layout = (flip, turns % 2 == 1, None, None)
+
+    workers = workers or os.cpu_count() or 1
+    lines = line_count(pixels.shape, layout)
+    # Pool workers (op serve, --batch) cannot start processes of their own
+    if workers > 1 and lines > 1 and not multiprocessing.current_process().daemon:
+        return sort_parallel(pixels, layout, min(workers, lines), **options)
+    result = pixels.copy()
+    sort_band(result, layout, range(lines), **options)
+    return result
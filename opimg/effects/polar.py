@@ -0,0 +1,66 @@
+"""Remap image from Cartesian to polar coordinates (or vice versa)."""
+
+import numpy as np
+from scipy.ndimage import map_coordinates
+
+from ..registry import Param, per_pixel, register
+
+
+@register(
+    "polar",
+    description="Transform image between Cartesian and polar coordinates.",
+    suffix="-polar",
+    params=[
+        Param("--mode", choices=["to-polar", "from-polar"], default="to-polar",
+              help="Direction of transformation (default: to-polar)"),
+    ],
+    message="Saved polar image to {output} (mode={mode})",
+    # float64 source and result, ~11 float64 coordinate grids, the per-channel sampling buffers
+    memory=per_pixel(140),
+)
+def polar(pixels: np.ndarray, *, mode: str) -> np.ndarray:
+    arr = pixels.astype(np.float64)
+    h, w, _ = arr.shape
+
+    cx, cy = w / 2.0, h / 2.0
+    max_radius = np.sqrt(cx ** 2 + cy ** 2)
+
+    # Create output coordinate grid
+    yy, xx = np.mgrid[0:h, 0:w]
+
+    if mode == "to-polar":
+        # Output (x, y) maps to source at:
+        # angle = x * 2*pi / width
+        # radius = y * max_radius / height
+        angle = xx.astype(np.float64) * (2.0 * np.pi) / w
+        radius = yy.astype(np.float64) * max_radius / h
+
+        src_x = cx + radius * np.cos(angle)
+        src_y = cy + radius * np.sin(angle)
+    else:
+        # from-polar: inverse mapping
+        # Source pixel at (x, y) in polar output came from angle and radius
+        dx = xx.astype(np.float64) - cx
+        dy = yy.astype(np.float64) - cy
+        angle = np.arctan2(dy, dx) % (2.0 * np.pi)
+        radius = np.sqrt(dx ** 2 + dy ** 2)
+
+        src_x = angle * w / (2.0 * np.pi)
+        src_y = radius * h / max_radius
+
+    # Clamp to image bounds
+    src_x = np.clip(src_x, 0, w - 1)
+    src_y = np.clip(src_y, 0, h - 1)
+
+    # Sample each channel
+    result = np.zeros_like(arr)
+    for c in range(3):
+        result[:, :, c] = map_coordinates(
+            arr[:, :, c],
+            [src_y, src_x],
+            order=1,
+            mode='constant',
+            cval=0.0,
+        )
+
+    return result.astype(np.uint8)
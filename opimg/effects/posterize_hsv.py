@@ -0,0 +1,62 @@
+"""Quantize H, S, V channels independently for a posterization effect.
+
+``--dither`` adds an ordered threshold pattern (see ``opimg.dither``) to each
+channel before it is rounded to its levels, so smooth gradients become
+patterned mixtures of neighbouring levels instead of hard bands.
+"""
+
+import numpy as np
+from PIL import Image
+
+from ..dither import PATTERNS, tile_thresholds
+from ..registry import Param, register
+
+
+def _memory(width: int, height: int, params: dict) -> int:
+    # float64 HSV array and per-channel temporaries, plus the Pillow HSV/RGB
+    # images; dithering adds the float32 thresholds and a float64 channel.
+    per_pixel = 52 if params["dither"] == "none" else 52 + 4 + 8
+    return width * height * per_pixel
+
+
+@register(
+    "posterize-hsv",
+    description="Posterize an image by quantizing HSV channels.",
+    suffix="-posterize",
+    params=[
+        Param("--h-levels", type=int, default=8, help="Number of hue levels (default: 8)"),
+        Param("--s-levels", type=int, default=4, help="Number of saturation levels (default: 4)"),
+        Param("--v-levels", type=int, default=4, help="Number of value/brightness levels (default: 4)"),
+        Param("--dither", default="none", choices=["none", *PATTERNS],
+              help="Ordered threshold pattern to dither each channel with (default: none)"),
+    ],
+    message="Saved posterized image to {output} (h={h_levels}, s={s_levels}, v={v_levels})",
+    memory=_memory,
+)
+def posterize_hsv(
+    pixels: np.ndarray, *, h_levels: int, s_levels: int, v_levels: int, dither: str,
+) -> np.ndarray:
+    """Quantize each HSV channel to the specified number of levels."""
+    hsv = Image.fromarray(pixels).convert("HSV")
+    arr = np.array(hsv, dtype=np.float64)
+    thresholds = tile_thresholds(dither, *arr.shape[:2]) if dither != "none" else None
+
+    levels = [h_levels, s_levels, v_levels]
+    for ch in range(3):
+        n = levels[ch]
+        if n <= 1:
+            arr[:, :, ch] = 0
+        elif thresholds is None:
+            arr[:, :, ch] = np.floor(arr[:, :, ch] / 256.0 * n) * (255.0 / (n - 1))
+        else:
+            # A value a quarter of the way to the next level rounds up on a
+            # quarter of the pixels
+            steps = arr[:, :, ch] * ((n - 1) / 255.0)
+            steps += thresholds
+            np.floor(steps, out=steps)
+            steps *= 255.0 / (n - 1)
+            arr[:, :, ch] = steps
+
+    arr = np.clip(arr, 0, 255).astype(np.uint8)
+    hsv_out = Image.merge("HSV", [Image.fromarray(arr[:, :, c]) for c in range(3)])
+    return np.array(hsv_out.convert("RGB"))
@@ -0,0 +1,68 @@
+"""Treat pixel data as a raw audio-like signal and apply distortion effects."""
+
+import numpy as np
+
+from ..registry import Param, register
+
+
+def _memory(width: int, height: int, params: dict) -> int:
+    # float64 signal-length arrays (3 samples per pixel): up to ten alive during
+    # the chorus mix, five through the echo
+    arrays = 10 if params["chorus"] > 0 else 5
+    return arrays * 8 * 3 * width * height
+
+
+@register(
+    "raw-bend",
+    description="Raw-bend image data with audio-style effects.",
+    suffix="-rawbend",
+    params=[
+        Param("--echo-strength", type=float, default=0.5, help="Echo mix amount 0-1 (default: 0.5)"),
+        Param("--echo-delay", type=int, default=500, help="Echo delay in samples/bytes (default: 500)"),
+        Param("--chorus", type=float, default=0.3, help="Chorus effect amount 0-1 (default: 0.3)"),
+        Param("--bitcrush", type=int, default=0,
+              help="If >0, reduce bit depth of signal (default: 0 = off)"),
+    ],
+    message=(
+        "Saved raw-bent image to {output} (echo={echo_strength}, delay={echo_delay}, "
+        "chorus={chorus}, bitcrush={bitcrush})"
+    ),
+    memory=_memory,
+)
+def raw_bend(
+    pixels: np.ndarray, *, echo_strength: float, echo_delay: int, chorus: float, bitcrush: int
+) -> np.ndarray:
+    original_shape = pixels.shape
+
+    # Convert to flat byte array, then to float signal in -1 to 1 range
+    raw = pixels.flatten().astype(np.float64)
+    signal = (raw / 127.5) - 1.0
+
+    # 1. Echo: signal[i] += echo_strength * signal[i - echo_delay]
+    if echo_strength > 0 and echo_delay > 0:
+        delay = min(echo_delay, len(signal) - 1)
+        echo = np.zeros_like(signal)
+        echo[delay:] = signal[:-delay] * echo_strength
+        signal = signal + echo
+
+    # 2. Chorus: mix signal with a pitch-shifted copy (offset by sin wave)
+    if chorus > 0:
+        n = len(signal)
+        indices = np.arange(n, dtype=np.float64)
+        # Create a sinusoidal offset for chorus effect
+        offset = np.sin(indices * 2.0 * np.pi / 1000.0) * 20.0
+        shifted_indices = np.clip((indices + offset).astype(np.int64), 0, n - 1)
+        chorus_signal = signal[shifted_indices]
+        signal = signal * (1.0 - chorus) + chorus_signal * chorus
+
+    # 3. Bitcrush: quantize to fewer levels
+    if bitcrush > 0:
+        levels = 2 ** bitcrush
+        signal = np.round(signal * levels) / levels
+
+    # Clip to valid range and convert back to uint8
+    signal = np.clip(signal, -1.0, 1.0)
+    raw_out = ((signal + 1.0) * 127.5).astype(np.uint8)
+
+    # Reshape back to original image dimensions
+    return raw_out.reshape(original_shape)
@@ -0,0 +1,34 @@
+"""Downscale to a tiny resolution and upscale back with nearest-neighbor.
+
+In-process counterpart of ``res-crush/res-crush.sh`` (``magick -sample``).
+"""
+
+import numpy as np
+
+from ..registry import Param, register
+
+
+def sample_indices(src: int, dst: int) -> np.ndarray:
+    """Point-sample positions mapping ``dst`` output cells onto ``src`` input cells."""
+    return ((np.arange(dst) + 0.5) * src / dst).astype(np.intp)
+
+
+@register(
+    "res-crush",
+    description="Pixelate by point-sampling down to N px and scaling back up.",
+    suffix="-pixelate-{size}",
+    params=[
+        Param("--size", type=int, default=64, help="Longest side of the crushed image (default: 64)"),
+    ],
+    format="PNG",
+    message="Pixelated to {size}px → {output}",
+)
+def res_crush(pixels: np.ndarray, *, size: int) -> np.ndarray:
+    h, w = pixels.shape[:2]
+    # Fit inside size x size, preserving aspect ratio (like an ImageMagick geometry)
+    scale = min(size / w, size / h)
+    sw = max(1, int(round(w * scale)))
+    sh = max(1, int(round(h * scale)))
+
+    small = pixels[sample_indices(h, sh)][:, sample_indices(w, sw)]
+    return small[sample_indices(sh, h)][:, sample_indices(sw, w)]
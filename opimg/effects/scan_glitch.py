@@ -0,0 +1,49 @@
+"""Apply a scan-glitch effect by shifting random horizontal slices."""
+
+from typing import Optional
+
+import numpy as np
+
+from ..registry import Param, per_pixel, register, seeded
+
+
+def glitch(pixels: np.ndarray, severity: int, rng: np.random.Generator) -> np.ndarray:
+    """Divide image into random horizontal slices and shift them."""
+    h, w, _ = pixels.shape
+
+    # Number of slices scales with severity (roughly 5-50 slices)
+    n_slices = int(5 * severity)
+
+    # Max horizontal shift scales with severity (roughly 2%-20% of width)
+    max_shift = int(w * severity * 0.02)
+
+    # Pick random split points to define slices
+    splits = sorted(rng.choice(range(1, h), size=min(n_slices, h - 1), replace=False))
+    splits = [0] + list(splits) + [h]
+
+    result = pixels.copy()
+    for i in range(len(splits) - 1):
+        y0, y1 = splits[i], splits[i + 1]
+        shift = int(rng.integers(-max_shift, max_shift + 1))
+        if shift != 0:
+            result[y0:y1] = np.roll(result[y0:y1], shift, axis=1)
+
+    return result
+
+
+@register(
+    "scan-glitch",
+    description="Apply a scan-glitch effect to an image.",
+    suffix="-glitch",
+    params=[
+        Param("--severity", type=int, default=8, choices=range(1, 11), metavar="N",
+              help="Glitch severity 1-10 (default: 8)"),
+        Param("--seed", type=int, help="RNG seed for reproducible output"),
+    ],
+    message="Saved glitched image to {output} (severity={severity}, seed={seed})",
+    cacheable=seeded,
+    # The result plus a rolled copy of one slice (at most the whole image)
+    memory=per_pixel(6),
+)
+def scan_glitch(pixels: np.ndarray, *, severity: int, seed: Optional[int]) -> np.ndarray:
+    return glitch(pixels, severity, np.random.default_rng(seed))
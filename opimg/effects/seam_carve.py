@@ -0,0 +1,619 @@
+"""Content-aware seam removal using dynamic programming for energy minimization.
+
+Removing a seam only changes the energy of the pixels next to it, so
+``SeamCarver`` keeps the energy and cumulative-energy maps between seams:
+after each removal it recomputes the energy in a few columns around the
+seam and redoes the dynamic programming only where the cumulative energy
+actually changed. Every seam is the one a full recomputation would find.
+
+Carving can also record the order in which pixels were removed, a "seam
+index map" (``seam_order``). Any width down to the carved one is then a single
+gather from the original image (``retarget``), so one carve serves every
+target width, and the map can be saved as ``.npy`` for later runs (``--map``),
+with the energy and a digest of the image it was carved from beside it.
+The same map widens an image: the pixels of its first k seams are doubled
+in one pass (``insert_seams``). Horizontal seams are vertical seams of the
+transposed image (``resize_axis``); both energies are symmetric under
+transposition, so nothing else changes.
+
+For very large images, ``carve_pyramid`` (``--pyramid``) trades exactness for
+speed: it finds many disjoint seams at once on a downscaled copy, refines each
+within a narrow corridor at full resolution and removes them in one pass.
+"""
+
+import hashlib
+import json
+import os
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+from PIL import Image
+
+from ..registry import Param, register
+
+
+def compute_energy_gradient(img: np.ndarray) -> np.ndarray:
+    """Compute energy map using absolute differences between neighboring pixels."""
+    h, w, c = img.shape
+    img_f = img.astype(np.float64)
+
+    # Horizontal differences: |img[y,x] - img[y,x+1]|
+    horiz = np.zeros((h, w), dtype=np.float64)
+    horiz[:, :-1] = np.sum(np.abs(img_f[:, :-1] - img_f[:, 1:]), axis=2)
+    if w > 1:
+        horiz[:, -1] = horiz[:, -2]  # replicate last column
+
+    # Vertical differences: |img[y,x] - img[y+1,x]|
+    vert = np.zeros((h, w), dtype=np.float64)
+    vert[:-1, :] = np.sum(np.abs(img_f[:-1, :] - img_f[1:, :]), axis=2)
+    if h > 1:
+        vert[-1, :] = vert[-2, :]  # replicate last row
+
+    return horiz + vert
+
+
+def grayscale(img: np.ndarray) -> np.ndarray:
+    """Weighted (BT.601) grey levels the Sobel energy is computed on."""
+    # The same products added in the same order as summing over the channel
+    # axis, so bit-identical to that, but without the float64 copy of the image
+    gray = img[..., 0] * 0.299
+    gray += img[..., 1] * 0.587
+    gray += img[..., 2] * 0.114
+    return gray
+
+
+def compute_energy_sobel(img: np.ndarray) -> np.ndarray:
+    """Compute energy map using Sobel filter magnitude."""
+    gray = grayscale(img)
+
+    # Sobel kernels applied via numpy operations
+    # Horizontal gradient
+    gx = np.zeros_like(gray)
+    gx[:, 1:-1] = -gray[:, :-2] + gray[:, 2:]
+    if gray.shape[1] > 1:  # a single column has no horizontal gradient
+        gx[:, 0] = gray[:, 1] - gray[:, 0]
+        gx[:, -1] = gray[:, -1] - gray[:, -2]
+
+    # Vertical gradient
+    gy = np.zeros_like(gray)
+    gy[1:-1, :] = -gray[:-2, :] + gray[2:, :]
+    if gray.shape[0] > 1:
+        gy[0, :] = gray[1, :] - gray[0, :]
+        gy[-1, :] = gray[-1, :] - gray[-2, :]
+
+    return np.sqrt(gx ** 2 + gy ** 2)
+
+
+ENERGY_FN = {
+    "gradient": compute_energy_gradient,
+    "sobel": compute_energy_sobel,
+}
+
+
+def cumulative_energy(energy: np.ndarray) -> np.ndarray:
+    """Minimum energy of any seam ending at each pixel, padded with a column of inf on each side."""
+    h, w = energy.shape
+    cost = np.full((h, w + 2), np.inf)
+    cost[0, 1:-1] = energy[0]
+    for r in range(1, h):
+        above = cost[r - 1]
+        row = cost[r, 1:-1]
+        np.minimum(above[:-2], above[1:-1], out=row)
+        np.minimum(row, above[2:], out=row)
+        row += energy[r]
+    return cost
+
+
+def trace_seam(cost: np.ndarray, width: int) -> np.ndarray:
+    """Backtrack the lowest-energy seam through a padded ``cumulative_energy`` map."""
+    h = cost.shape[0]
+    seam = np.empty(h, dtype=np.int64)
+    j = int(np.argmin(cost[-1, 1:width + 1]))
+    seam[-1] = j
+    for r in range(h - 2, -1, -1):
+        # Padded columns j..j+2 are image columns j-1..j+1; ties go left
+        j += int(np.argmin(cost[r, j:j + 3])) - 1
+        seam[r] = j
+    return seam
+
+
+def find_seam(energy: np.ndarray) -> np.ndarray:
+    """Find lowest-energy vertical seam using dynamic programming."""
+    return trace_seam(cumulative_energy(energy), energy.shape[1])
+
+
+def remove_seam(img: np.ndarray, seam: np.ndarray) -> np.ndarray:
+    """Remove a vertical seam from the image, reducing width by 1."""
+    h, w = img.shape[:2]
+    keep = np.ones((h, w), dtype=bool)
+    keep[np.arange(h), seam] = False
+    return compact(img, keep, w - 1)
+
+
+def compact(img: np.ndarray, keep: np.ndarray, width: int) -> np.ndarray:
+    """The pixels of ``img`` where ``keep`` is set, ``width`` to a row.
+
+    Whole pixels are moved as single items, which gathers several times faster
+    than indexing the channels.
+    """
+    h = img.shape[0]
+    flat = np.ascontiguousarray(img).reshape(keep.size, -1)
+    items = flat.view(np.dtype((np.void, flat.shape[1] * flat.itemsize)))[:, 0]
+    return items[keep.reshape(-1)].view(img.dtype).reshape((h, width) + img.shape[2:])
+
+
+def _window_energy(energy: str, pixels: np.ndarray, seam: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """Energy at ``cols`` (one row of columns per image row) once ``seam`` is removed.
+
+    Read from the arrays as they are before the removal, with the arithmetic of
+    ``ENERGY_FN``, so the values equal those of a full recomputation.
+    """
+    h, w = seam.shape[0], pixels.shape[1]
+    last = w - 2  # last column after the removal
+    rows = np.arange(h)[:, None]
+    up, down = np.maximum(rows - 1, 0), np.minimum(rows + 1, h - 1)
+
+    def at(r, c):
+        # Column c of row r after the removal, as a column before it
+        c = np.clip(c, 0, last)
+        return c + (c >= seam[r])
+
+    if energy == "sobel":
+        def gray(r, c):
+            return grayscale(pixels[r, at(r, c)])
+
+        gx = gray(rows, cols + 1) - gray(rows, cols - 1)
+        gy = gray(down, cols) - gray(up, cols)
+        return np.sqrt(gx ** 2 + gy ** 2)
+
+    def diff(r1, c1, r2, c2):
+        a = pixels[r1, at(r1, c1)].astype(np.float64)
+        return np.sum(np.abs(a - pixels[r2, at(r2, c2)]), axis=2)
+
+    # The last column and row repeat the differences before them
+    left = np.minimum(cols, last - 1)
+    top = np.clip(rows, 0, h - 2)
+    return diff(rows, left, rows, left + 1) + diff(top, cols, np.minimum(top + 1, h - 1), cols)
+
+
+class SeamCarver:
+    """Removes vertical seams from an image one at a time.
+
+    The image, its energy and its cumulative energy live in full-width buffers
+    whose first ``width`` columns are valid; a removal shifts the rest of each
+    row left by one.
+    """
+
+    def __init__(self, pixels: np.ndarray, energy: str = "sobel", record: bool = False):
+        h, w = pixels.shape[:2]
+        self.energy = energy
+        self.width = w
+        self.removed = 0
+        self._pixels = pixels.copy()
+        self._energy = ENERGY_FN[energy](pixels)
+        self._cost = cumulative_energy(self._energy)
+        # With ``record``: the original column of every current pixel, and the
+        # seam that removed each original pixel
+        self._columns = np.tile(np.arange(w, dtype=np.min_scalar_type(w - 1)), (h, 1)) if record else None
+        self._order = np.zeros((h, w), dtype=np.int32) if record else None
+
+    @property
+    def pixels(self) -> np.ndarray:
+        return self._pixels[:, :self.width]
+
+    def find_seam(self) -> np.ndarray:
+        return trace_seam(self._cost, self.width)
+
+    def seam_order(self) -> np.ndarray:
+        """Seam index map of the seams removed so far (needs ``record=True``); see ``retarget``."""
+        if self._order is None:
+            raise ValueError("seam order is only recorded with record=True")
+        order = self._order.astype(np.min_scalar_type(self.removed))
+        order[np.arange(order.shape[0])[:, None], self._columns[:, :self.width]] = self.removed
+        return order
+
+    def remove_seam(self) -> np.ndarray:
+        """Remove the lowest-energy seam and return it."""
+        seam = self.find_seam()
+        self._remove(seam)
+        return seam
+
+    def _remove(self, seam: np.ndarray) -> None:
+        pixels, energy, cost, columns = self._pixels, self._energy, self._cost, self._columns
+        h, w = energy.shape[0], self.width
+        new_w = w - 1
+        if columns is not None:
+            self._order[np.arange(h), columns[np.arange(h), seam]] = self.removed
+
+        # Fixed windows of up to four columns, from two left of the seam to one
+        # right of it, hold every pixel whose energy or whose neighbours change
+        k = min(4, new_w)
+        starts = np.clip(seam - 2, 0, new_w - k)
+        fresh = _window_energy(
+            self.energy, pixels[:, :w], seam, starts[:, None] + np.arange(k)
+        )
+
+        changed_lo = changed_hi = 0
+        for r, j, start in zip(range(h), seam.tolist(), starts.tolist()):
+            pixels[r, j:new_w] = pixels[r, j + 1:w]
+            energy[r, j:new_w] = energy[r, j + 1:w]
+            # Shifts the right inf padding along too
+            cost[r, j + 1:w + 1] = cost[r, j + 2:w + 2]
+            if columns is not None:
+                columns[r, j:new_w] = columns[r, j + 1:w]
+
+            lo, hi = start, start + k
+            energy[r, lo:hi] = fresh[r]
+            # Cells below a changed cumulative energy may change too
+            if changed_hi > changed_lo:
+                lo, hi = min(lo, max(changed_lo - 1, 0)), max(hi, min(changed_hi + 1, new_w))
+            if r:
+                above = cost[r - 1, lo:hi + 2]
+                row = np.minimum(above[:-2], above[1:-1])
+                np.minimum(row, above[2:], out=row)
+                row += energy[r, lo:hi]
+            else:
+                row = energy[r, lo:hi]
+            old = cost[r, lo + 1:hi + 1]
+            changed = (row != old).nonzero()[0]
+            if changed.size:
+                changed_lo, changed_hi = lo + int(changed[0]), lo + int(changed[-1]) + 1
+                old[:] = row
+            else:
+                changed_lo = changed_hi = 0
+        self.width = new_w
+        self.removed += 1
+
+
+def seam_order(pixels: np.ndarray, seams: int, energy: str = "sobel") -> np.ndarray:
+    """Carve ``seams`` seams and return the seam index map of the image.
+
+    Each pixel holds the index of the seam that removed it, or ``seams`` if it
+    survives, in the smallest unsigned integer type that fits.
+    """
+    carver = SeamCarver(pixels, energy, record=True)
+    for _ in range(seams):
+        carver.remove_seam()
+    return carver.seam_order()
+
+
+def retarget(pixels: np.ndarray, order: np.ndarray, width: int) -> np.ndarray:
+    """``pixels`` with the seams of a seam index map removed down to ``width`` columns."""
+    w = order.shape[1]
+    seams = w - width
+    if not 0 <= seams <= int(order.max()):
+        raise ValueError(f"the seam map covers widths {w - int(order.max())}-{w}, not {width}")
+    return compact(pixels, order >= seams, width)
+
+
+def retarget_widths(pixels: np.ndarray, order: np.ndarray, widths: Iterable[int]) -> Iterator[np.ndarray]:
+    """``retarget`` to each of ``widths`` in turn, for several sizes from one carve."""
+    for width in widths:
+        yield retarget(pixels, order, width)
+
+
+def downscale(pixels: np.ndarray, factor: int) -> np.ndarray:
+    """Mean of each ``factor`` x ``factor`` block; partial blocks at the edges average what they hold."""
+    return np.asarray(Image.fromarray(pixels).reduce(factor))
+
+
+def disjoint_seams(energy: np.ndarray, count: int) -> np.ndarray:
+    """Up to ``count`` seams sharing no pixel, each the lowest-energy one avoiding those before it.
+
+    Returns their columns, one seam per column of the (h, n) result. Fewer
+    come back once no seam can get past the ones taken.
+    """
+    h, w = energy.shape
+    energy = energy.copy()
+    seams = []
+    for _ in range(count):
+        cost = cumulative_energy(energy)
+        if np.isinf(cost[-1, 1:-1].min()):
+            break
+        seam = trace_seam(cost, w)
+        energy[np.arange(h), seam] = np.inf
+        seams.append(seam)
+    return np.stack(seams, axis=1)
+
+
+def refine_seams(energy: np.ndarray, blocks: np.ndarray, factor: int, margin: int = 0) -> np.ndarray:
+    """Full-resolution seams through ``energy``, each the best one in a corridor around one coarse seam.
+
+    ``blocks`` holds the columns of disjoint coarse seams (see ``disjoint_seams``)
+    on the image downscaled by ``factor``. A corridor is the blocks its coarse
+    seam crosses, widened by ``margin`` pixels on each side but split halfway
+    with its neighbours, so the refined seams cannot meet. All seams are
+    searched together, over their corridors only; the result holds one per column.
+    """
+    h, w = energy.shape
+    n = blocks.shape[1]
+    size = factor + 2 * margin
+    offsets = np.arange(size)
+    seam_rows = np.arange(n)[:, None]
+    # Taken left to right in each row, the k-th coarse seam moves by at most one
+    # block per row even where seams cross, so corridors join up row to row
+    starts = np.sort(blocks, axis=1)[np.arange(h) // factor] * factor
+    lo, hi = starts - margin, starts + factor + margin
+    if n > 1:
+        middle = (starts[:, :-1] + factor + starts[:, 1:]) // 2
+        lo[:, 1:] = np.maximum(lo[:, 1:], middle)
+        hi[:, :-1] = np.minimum(hi[:, :-1], middle)
+    lo, hi = np.maximum(lo, 0), np.minimum(hi, w)
+    cols = lo[:, :, None] + offsets
+    band = energy[np.arange(h)[:, None, None], np.minimum(cols, w - 1)]
+    band[cols >= hi[:, :, None]] = np.inf
+
+    cost = np.empty_like(band)
+    cost[0] = band[0]
+    # The row above, placed so that cell j's neighbours are at size+j .. size+j+2;
+    # a corridor moves by at most ``factor`` columns from one row to the next
+    above = np.empty((n, 3 * size + 2))
+    for r in range(1, h):
+        above.fill(np.inf)
+        above[seam_rows, (size + 1 + lo[r - 1] - lo[r])[:, None] + offsets] = cost[r - 1]
+        row = np.minimum(above[:, size:2 * size], above[:, size + 1:2 * size + 1])
+        np.minimum(row, above[:, size + 2:2 * size + 2], out=row)
+        np.add(row, band[r], out=cost[r])
+
+    seams = np.empty((h, n), dtype=np.int64)
+    x = lo[-1] + np.argmin(cost[-1], axis=1)
+    seams[-1] = x
+    for r in range(h - 2, -1, -1):
+        local = (x - lo[r])[:, None] + np.arange(-1, 2)
+        inside = (local >= 0) & (local < size)
+        candidates = np.where(inside, cost[r][seam_rows, np.clip(local, 0, size - 1)], np.inf)
+        x = x - 1 + np.argmin(candidates, axis=1)
+        seams[r] = x
+    return seams
+
+
+def carve_pyramid(
+    pixels: np.ndarray, count: int, energy: str = "sobel", levels: int = 2, quality: float = 0.5
+) -> np.ndarray:
+    """Remove ``count`` vertical seams, searching for them on a copy downscaled by ``2 ** levels``.
+
+    Seams are removed in batches of up to an eighth of the downscaled width.
+    Each batch takes disjoint seams from one energy map of the downscaled copy,
+    refines them at full resolution within the blocks they cross and removes
+    them in one compaction. ``quality`` (0-1) widens each corridor by up to
+    ``2 * 2 ** levels`` pixels per side: 0 keeps refined seams inside their
+    blocks, 1 lets them stray furthest from the coarse path. Results
+    approximate ``SeamCarver``'s.
+    """
+    if not 0 <= quality <= 1:
+        raise ValueError(f"--quality must be between 0 and 1, got {quality}")
+    factor = 2 ** levels
+    while count > 0:
+        h, w = pixels.shape[:2]
+        coarse = downscale(pixels, factor)
+        coarse_w = coarse.shape[1]
+        if coarse_w < 2:
+            break
+        batch = min(count, coarse_w - 1, max(1, coarse_w // 8))
+        blocks = disjoint_seams(ENERGY_FN[energy](coarse), batch)
+        seams = refine_seams(ENERGY_FN[energy](pixels), blocks, factor, round(2 * factor * quality))
+        keep = np.ones((h, w), dtype=bool)
+        keep[np.arange(h)[:, None], seams] = False
+        pixels = compact(pixels, keep, w - seams.shape[1])
+        count -= seams.shape[1]
+
+    if count:
+        # Too narrow to downscale any further: finish exactly
+        pixels = resize_axis(pixels, pixels.shape[1] - count, 1, energy)
+    return pixels
+
+
+def insert_seams(pixels: np.ndarray, order: np.ndarray, count: int) -> np.ndarray:
+    """``pixels`` widened by ``count`` columns along the first ``count`` seams of a seam index map.
+
+    Each seam pixel is followed by a copy blended half-and-half with its right
+    neighbour. All seams are inserted in one gather.
+    """
+    h, w = order.shape
+    if not 0 <= count <= int(order.max()):
+        raise ValueError(f"the seam map can insert up to {int(order.max())} seams, not {count}")
+    right = np.concatenate([pixels[:, 1:], pixels[:, -1:]], axis=1)
+    blend = ((pixels.astype(np.uint16) + right + 1) // 2).astype(pixels.dtype)
+    # Every pixel followed by its blend, keeping the blends of seam pixels only
+    pairs = np.stack([pixels, blend], axis=2).reshape((h, 2 * w) + pixels.shape[2:])
+    keep = np.stack([np.ones((h, w), dtype=bool), order < count], axis=2).reshape(h, 2 * w)
+    return compact(pairs, keep, w + count)
+
+
+def resize_axis(
+    pixels: np.ndarray, size: int, axis: int = 1, energy: str = "sobel", pyramid: int = 0, quality: float = 0.5
+) -> np.ndarray:
+    """Remove or insert seams until ``pixels`` is ``size`` long along ``axis`` (1: width, 0: height).
+
+    With ``pyramid`` levels, seams are removed by ``carve_pyramid``.
+    """
+    if axis == 0:
+        # Horizontal seams: carve the transposed view, which the carver copies into its own buffer
+        carved = resize_axis(pixels.swapaxes(0, 1), size, 1, energy, pyramid, quality)
+        return np.ascontiguousarray(carved.swapaxes(0, 1))
+    w = pixels.shape[1]
+    if not 1 <= size < 2 * w:
+        raise ValueError(f"a side of {w} pixels can be carved to 1-{2 * w - 1} pixels, not {size}")
+    if size > w:
+        return insert_seams(pixels, seam_order(pixels, size - w, energy), size - w)
+    if pyramid:
+        return carve_pyramid(pixels, w - size, energy, pyramid, quality)
+    carver = SeamCarver(pixels, energy)
+    for _ in range(w - size):
+        carver.remove_seam()
+    return np.ascontiguousarray(carver.pixels)
+
+
+def parse_target(spec: str, width: int, height: int) -> tuple[int, int]:
+    """``"WxH"`` -> (W, H); either side may be left out to keep it, e.g. ``"800x"``."""
+    target_w, sep, target_h = spec.lower().partition("x")
+    try:
+        if not sep:
+            raise ValueError
+        return int(target_w or width), int(target_h or height)
+    except ValueError:
+        raise ValueError(f"--size must be WIDTHxHEIGHT, e.g. 800x600 or 800x, got '{spec}'") from None
+
+
+def image_digest(pixels: np.ndarray) -> str:
+    """SHA-256 of an image's shape and pixels, to tell which image a seam map was carved from."""
+    h = hashlib.sha256(repr(pixels.shape).encode())
+    h.update(np.ascontiguousarray(pixels).data)
+    return h.hexdigest()
+
+
+def _seam_map_info(path: str) -> str:
+    return path + ".json"
+
+
+def load_seam_map(path: str, pixels: np.ndarray, energy: str) -> np.ndarray:
+    """Read a seam index map written by ``save_seam_map``, checking it belongs to ``pixels``.
+
+    The map must be a seam index map of an image of the same size: in every
+    row, seams 0 .. n-1 once each and ``n`` for each surviving pixel. If the
+    ``.json`` written beside it is there, the map must also have been carved
+    from these very pixels with ``energy``; a bare ``.npy`` (e.g. saved from
+    ``seam_order`` in Python) is trusted to belong to them.
+    """
+    order = np.load(path, allow_pickle=False)
+    if order.ndim != 2 or order.dtype.kind not in "ui":
+        raise ValueError(f"{path} is not a seam map")
+    shape = pixels.shape[:2]
+    if order.shape != shape:
+        raise ValueError(
+            f"{path} is a seam map for a {order.shape[1]}x{order.shape[0]} image, not {shape[1]}x{shape[0]}"
+        )
+    seams = int(order.max())
+    ranks = np.minimum(np.arange(shape[1]), seams)
+    if not (np.sort(order, axis=1) == ranks).all():
+        raise ValueError(f"{path} is not a seam map: some row does not remove seams 0-{seams - 1} once each")
+
+    info_path = _seam_map_info(path)
+    if os.path.exists(info_path):
+        with open(info_path) as f:
+            info = json.load(f)
+        if info.get("energy") != energy:
+            raise ValueError(f"{path} holds {info.get('energy')} seams, not {energy}: pass the --energy it was made with")
+        if info.get("image") != image_digest(pixels):
+            raise ValueError(f"{path} was carved from another image of the same size")
+    return order
+
+
+def save_seam_map(path: str, order: np.ndarray, pixels: np.ndarray, energy: str) -> None:
+    """Write ``order`` to ``path`` and the energy and image it was carved from to ``path.json``."""
+    # Through a file object, so np.save does not append .npy to the name given
+    with open(path, "wb") as f:
+        np.save(f, order)
+    with open(_seam_map_info(path), "w") as f:
+        json.dump({"energy": energy, "image": image_digest(pixels)}, f)
+
+
+def _memory(width: int, height: int, params: dict) -> int:
+    # The first energy map (float64 copy of the image and difference temporaries, or
+    # the weighted grey image and Sobel gradients), the cumulative map kept beside
+    # it, the working copy of the image
+    per_pixel = 96 if params["energy"] == "gradient" else 56
+    if params["map"] or params["size"]:
+        # The recorded seam order and original columns, or the loaded map and its mask
+        per_pixel += 8
+    area = width * height
+    if params["size"]:
+        target_w, target_h = parse_target(params["size"], width, height)
+        # Inserting seams carves the input; the widened image then has the other axis carved.
+        # Doubled pixels and their blends take up to 11 bytes per output pixel
+        area = max(area, target_w * height)
+        return (per_pixel + 8 + 3) * area + 11 * max(target_w * height, target_w * target_h)
+    return (per_pixel + 8 + 3) * area
+
+
+def _cacheable(params: dict) -> bool:
+    # Writing the seam map is a side effect a cached result would skip
+    return params["map"] is None
+
+
+def _report(ctx: dict) -> str:
+    if ctx["size"]:
+        return (
+            f"Saved seam-carved image to {ctx['output']} "
+            f"({ctx['src_width']}x{ctx['src_height']} -> {ctx['width']}x{ctx['height']})"
+        )
+    removed = ctx["src_width"] - ctx["width"]
+    seam_map = f", seam map {ctx['map']}" if ctx["map"] else ""
+    return (
+        f"Saved seam-carved image to {ctx['output']} "
+        f"({removed} seams removed, {ctx['width']}x{ctx['height']}{seam_map})"
+    )
+
+
+@register(
+    "seam-carve",
+    description="Content-aware seam carving to reduce or enlarge image width and height.",
+    suffix="-seamcarve",
+    params=[
+        Param("--percent", type=int, default=35,
+              help="Percentage of width to remove, 1-50 (default: 35)"),
+        Param("--size", metavar="WxH",
+              help="Target size instead of --percent, e.g. 1200x800 or x800: seams are removed "
+                   "or inserted to reach the width, then the height"),
+        Param("--energy", choices=["gradient", "sobel"], default="sobel",
+              help="Energy function (default: sobel)"),
+        Param("--map", metavar="PATH",
+              help="Seam index map (.npy): read it if it exists and skip the seam search, "
+                   "otherwise carve to 50%% once and save it there"),
+        Param("--pyramid", type=int, default=0, metavar="LEVELS",
+              help="Search seams on a copy halved LEVELS times and refine them at full size, "
+                   "removing many per pass: much faster on large images, approximate (default: 0, exact)"),
+        Param("--quality", type=float, default=0.5,
+              help="With --pyramid, 0-1: how far refined seams may leave the coarse path (default: 0.5)"),
+    ],
+    message=_report,
+    cacheable=_cacheable,
+    memory=_memory,
+)
+def seam_carve(
+    pixels: np.ndarray,
+    *,
+    percent: int,
+    size: Optional[str],
+    energy: str,
+    map: Optional[str],
+    pyramid: int,
+    quality: float,
+) -> np.ndarray:
+    if pyramid < 0:
+        raise ValueError(f"--pyramid must be 0 or more levels, got {pyramid}")
+    if not 0 <= quality <= 1:
+        raise ValueError(f"--quality must be between 0 and 1, got {quality}")
+    if size is not None:
+        if map is not None:
+            raise ValueError("--map works with --percent, not --size")
+        height, width = pixels.shape[:2]
+        target_w, target_h = parse_target(size, width, height)
+        pixels = resize_axis(pixels, target_w, 1, energy, pyramid, quality)
+        return resize_axis(pixels, target_h, 0, energy, pyramid, quality)
+
+    # Clamp percent to valid range
+    percent = max(1, min(50, percent))
+    original_width = pixels.shape[1]
+
+    seams_to_remove = int(original_width * percent / 100)
+    seams_to_remove = max(1, min(seams_to_remove, original_width - 1))
+
+    if map is not None:
+        if pyramid:
+            raise ValueError("--map records exact seams and cannot be combined with --pyramid")
+        if os.path.exists(map):
+            order = load_seam_map(map, pixels, energy)
+        else:
+            # Carve as far as any --percent can ask, so the map serves them all
+            order = seam_order(pixels, max(1, min(original_width // 2, original_width - 1)), energy)
+            save_seam_map(map, order, pixels, energy)
+        return retarget(pixels, order, original_width - seams_to_remove)
+
+    if pyramid:
+        return carve_pyramid(pixels, seams_to_remove, energy, pyramid, quality)
+    carver = SeamCarver(pixels, energy)
+    for _ in range(seams_to_remove):
+        carver.remove_seam()
+
+    return np.ascontiguousarray(carver.pixels)
@@ -0,0 +1,65 @@
+"""stipple -- Convert an image to a stipple dot pattern.
+
+Randomly places dots weighted by image darkness. Black dots on transparent.
+"""
+
+from typing import Optional
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from ..registry import Param, register, seeded
+
+
+def _memory(width: int, height: int, params: dict) -> int:
+    # float64 density, probabilities and the sampler's cumulative copy, the RGBA
+    # canvas and its array; per dot, the sampled indices and jittered coordinates
+    return 40 * width * height + 40 * params["dots"]
+
+
+@register(
+    "stipple",
+    description="Generate a stipple pattern from an image.",
+    suffix="-stipple",
+    params=[
+        Param("--dots", type=int, default=50000, help="Total dot count (default: 50000)"),
+        Param("--dot-size", type=float, default=1, help="Dot radius in pixels (default: 1)"),
+        Param("--seed", type=int, help="Random seed for reproducibility"),
+    ],
+    mode="L",
+    format="PNG",
+    message="stipple: {input_name} -> {output_name} (dots={dots}, dot-size={dot_size})",
+    cacheable=seeded,
+    memory=_memory,
+)
+def stipple(gray: np.ndarray, *, dots: int, dot_size: float, seed: Optional[int]) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    h, w = gray.shape
+
+    out = Image.new("RGBA", (w, h), (0, 0, 0, 0))
+
+    # Invert: darker pixels get higher probability
+    density = 255.0 - gray.astype(np.float64)
+    total = density.sum()
+    if total == 0:
+        # Completely white image, nothing to draw
+        return np.array(out)
+
+    # Flatten to 1D probability distribution
+    prob = density.ravel() / total
+
+    # Sample pixel indices weighted by probability
+    indices = rng.choice(len(prob), size=dots, p=prob)
+    ys, xs = np.divmod(indices, w)
+
+    # Add sub-pixel jitter so dots don't all land on pixel centers
+    xs = xs.astype(np.float64) + rng.uniform(-0.5, 0.5, size=dots)
+    ys = ys.astype(np.float64) + rng.uniform(-0.5, 0.5, size=dots)
+
+    draw = ImageDraw.Draw(out)
+
+    r = dot_size
+    for x, y in zip(xs, ys):
+        draw.ellipse([x - r, y - r, x + r, y + r], fill=(208, 101, 33, 255))
+
+    return np.array(out)
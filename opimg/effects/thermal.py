@@ -0,0 +1,51 @@
+"""Map brightness to false-color thermal palette (black-blue-magenta-red-yellow-white)."""
+
+import numpy as np
+
+from ..registry import per_pixel, register
+
+
+def build_thermal_lut() -> np.ndarray:
+    """Build a 256-entry RGB lookup table for thermal colormap."""
+    anchors = [
+        (0, (0, 0, 0)),        # black
+        (64, (0, 0, 200)),     # blue
+        (128, (200, 0, 200)),  # magenta
+        (170, (255, 0, 0)),    # red
+        (210, (255, 255, 0)),  # yellow
+        (255, (255, 255, 255)),  # white
+    ]
+
+    lut = np.zeros((256, 3), dtype=np.uint8)
+
+    for idx in range(len(anchors) - 1):
+        pos_start, color_start = anchors[idx]
+        pos_end, color_end = anchors[idx + 1]
+        span = pos_end - pos_start
+        for i in range(span):
+            t = i / span
+            r = int(color_start[0] + t * (color_end[0] - color_start[0]))
+            g = int(color_start[1] + t * (color_end[1] - color_start[1]))
+            b = int(color_start[2] + t * (color_end[2] - color_start[2]))
+            lut[pos_start + i] = [r, g, b]
+
+    # Fill the last anchor point
+    lut[255] = list(anchors[-1][1])
+
+    return lut
+
+
+THERMAL_LUT = build_thermal_lut()
+
+
+@register(
+    "thermal",
+    description="Apply false-color thermal palette based on brightness.",
+    suffix="-thermal",
+    mode="L",
+    message="Saved thermal image to {output}",
+    memory=per_pixel(3),
+)
+def thermal(gray: np.ndarray) -> np.ndarray:
+    # Vectorized LUT application
+    return THERMAL_LUT[gray]
@@ -0,0 +1,48 @@
+"""Chop image into NxN grid and randomly permute tiles."""
+
+from typing import Optional
+
+import numpy as np
+
+from ..registry import Param, register, seeded
+
+
+@register(
+    "tile-shuffle",
+    description="Shuffle tiles of an image in a grid.",
+    suffix="-shuffle",
+    params=[
+        Param("--grid", type=int, default=4, help="Grid size NxN (default: 4)"),
+        Param("--seed", type=int, help="RNG seed for reproducibility (default: None)"),
+    ],
+    message="Saved tile-shuffled image to {output} (grid={grid}, seed={seed})",
+    cacheable=seeded,
+)
+def tile_shuffle(pixels: np.ndarray, *, grid: int, seed: Optional[int]) -> np.ndarray:
+    """Divide image into grid x grid tiles and reassemble in shuffled order."""
+    h, w, c = pixels.shape
+    tile_h = h // grid
+    tile_w = w // grid
+
+    # Crop to exact tile grid dimensions
+    cropped = pixels[:tile_h * grid, :tile_w * grid]
+
+    # Extract tiles
+    tiles = []
+    for row in range(grid):
+        for col in range(grid):
+            tile = cropped[row * tile_h:(row + 1) * tile_h, col * tile_w:(col + 1) * tile_w]
+            tiles.append(tile)
+
+    # Shuffle tiles
+    rng = np.random.default_rng(seed)
+    perm = rng.permutation(len(tiles))
+
+    # Reassemble
+    out = np.zeros_like(cropped)
+    for idx, src_idx in enumerate(perm):
+        row = idx // grid
+        col = idx % grid
+        out[row * tile_h:(row + 1) * tile_h, col * tile_w:(col + 1) * tile_w] = tiles[src_idx]
+
+    return out
@@ -0,0 +1,96 @@
+"""Flatten pixel buffer and reshape with wrong row width for a diagonal shear effect.
+
+The RGB bytes are re-read as rows of ``--width`` pixels of ``--bpp`` bytes,
+each row starting ``--offset`` pixels plus ``--byte-offset`` bytes further on
+than a correct stride would, wrapping around the end of the buffer. A byte
+offset that is not a multiple of 3 misaligns the channels; a wrong ``--bpp``
+regroups the bytes (4 reads RGB as RGBX, 1 as greyscale), which changes the
+image height.
+"""
+
+from typing import Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from ..registry import Param, register
+
+
+def restride(flat: np.ndarray, height: int, row_stride: int, row_bytes: int) -> np.ndarray:
+    """``height`` rows of ``row_bytes`` bytes read from ``flat`` every ``row_stride`` bytes, wrapping.
+
+    Returns a (height, row_bytes) array, gathered in one vectorized copy.
+    """
+    total = len(flat)
+    # Unrolled buffer in which every wrapped row is a contiguous window
+    ring = np.resize(flat, total + row_bytes)
+    starts = np.arange(height, dtype=np.int64) * row_stride % total
+    return sliding_window_view(ring, row_bytes)[starts]
+
+
+def _output_shape(width: int, height: int, params: dict) -> tuple[int, int]:
+    out_w = params["width"] or width
+    return out_w, max(1, 3 * width * height // (out_w * params["bpp"]))
+
+
+def _memory(width: int, height: int, params: dict) -> int:
+    out_w, out_h = _output_shape(width, height, params)
+    row_bytes = out_w * params["bpp"]
+    total = 3 * width * height
+    # np.resize concatenates whole copies of the buffer before cutting the
+    # unrolled one from them, and the row starts take two int64 temporaries
+    ring = total * -(-(total + row_bytes) // total)
+    starts = 2 * 8 * out_h
+    # The gathered rows, which are the output at 3 bytes per pixel; regrouped
+    # pixels are copied once more, and a taller result is also copied by the
+    # encoder
+    gathered = out_h * row_bytes
+    regrouped = 2 * out_h * out_w * 3 if params["bpp"] != 3 else 0
+    return ring + starts + gathered + regrouped
+
+
+def _report(ctx: dict) -> str:
+    details = [f"offset={ctx['offset']}"]
+    if ctx["byte_offset"]:
+        details.append(f"byte-offset={ctx['byte_offset']}")
+    if ctx["width"] != ctx["src_width"]:
+        details.append(f"width={ctx['width']}")
+    if ctx["bpp"] != 3:
+        details.append(f"bpp={ctx['bpp']}")
+    return f"Saved wrong-stride image to {ctx['output']} ({', '.join(details)})"
+
+
+@register(
+    "wrong-stride",
+    description="Reshape pixel data with wrong stride for diagonal shear effect.",
+    suffix="-stride",
+    params=[
+        Param("--offset", type=int, default=1, help="Pixel offset per row (default: 1)"),
+        Param("--byte-offset", type=int, default=0,
+              help="Extra bytes per row; not a multiple of 3 misaligns channels (default: 0)"),
+        Param("--width", type=int, help="Row width in pixels to read the buffer with (default: image width)"),
+        Param("--bpp", type=int, default=3, choices=[1, 2, 3, 4],
+              help="Bytes per pixel to read the RGB buffer with, e.g. 4 for RGBX (default: 3)"),
+    ],
+    message=_report,
+    memory=_memory,
+)
+def wrong_stride(
+    pixels: np.ndarray, *, offset: int, byte_offset: int, width: Optional[int], bpp: int
+) -> np.ndarray:
+    """Reshape pixel data with a per-row offset to create a diagonal shear effect."""
+    h, w, _ = pixels.shape
+    if width is not None and width < 1:
+        raise ValueError(f"--width must be at least 1, got {width}")
+    out_w, out_h = _output_shape(w, h, {"width": width, "bpp": bpp})
+
+    row_bytes = out_w * bpp
+    row_stride = (out_w + offset) * bpp + byte_offset
+    rows = restride(pixels.reshape(-1), out_h, row_stride, row_bytes)
+    grouped = rows.reshape(out_h, out_w, bpp)
+    if bpp == 3:
+        return grouped
+    if bpp < 3:
+        # Too few bytes for colour: show the first byte of each pixel as grey
+        return np.repeat(grouped[:, :, :1], 3, axis=2)
+    return np.ascontiguousarray(grouped[:, :, :3])
@@ -0,0 +1,182 @@
+"""Image decode/encode helpers shared by the CLI wrappers and in-process callers."""
+
+import io
+import os
+import sys
+from typing import Any, Optional, Union
+
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+
+# Path meaning stdin (as input) or stdout (as output)
+STDIO = "-"
+
+
+class DecodeError(OSError):
+    """Data Pillow cannot decode: not an image it knows, or a truncated or corrupt one."""
+
+
+def _open(source: Union[str, bytes]) -> Image.Image:
+    try:
+        return Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+    except UnidentifiedImageError as e:
+        raise DecodeError(str(e)) from e
+
+
+def open_image(source: Union[str, bytes]) -> Image.Image:
+    """Open and fully decode an image file (or encoded bytes); the caller closes it.
+
+    Raises ``DecodeError`` if the data is not a whole image Pillow can read.
+    """
+    img = _open(source)
+    try:
+        img.load()
+    except BaseException as e:
+        img.close()
+        if isinstance(e, (OSError, SyntaxError)):
+            raise DecodeError(str(e)) from e
+        raise
+    return img
+
+
+def image_to_array(img: Image.Image, mode: str = "RGB") -> np.ndarray:
+    """A decoded image as a uint8 array in the given Pillow mode."""
+    return np.array(img.convert(mode))
+
+
+def load_image(path: str, mode: str = "RGB") -> np.ndarray:
+    """Decode an image file into a uint8 array in the given Pillow mode."""
+    with open_image(path) as img:
+        return image_to_array(img, mode)
+
+
+def save_image(pixels: np.ndarray, path: str, format: Optional[str] = None) -> None:
+    """Encode a uint8 array (L, RGB or RGBA by channel count) to ``path``."""
+    Image.fromarray(pixels).save(path, format)
+
+
+def read_input(path: str) -> bytes:
+    """The encoded bytes of ``path``, or of stdin for ``-``."""
+    if path == STDIO:
+        return sys.stdin.buffer.read()
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def write_output(path: str, data: bytes) -> None:
+    """Write encoded bytes to ``path``, or to stdout for ``-``."""
+    if path == STDIO:
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+        return
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def decode_image(data: bytes, mode: str = "RGB") -> np.ndarray:
+    with open_image(data) as img:
+        return image_to_array(img, mode)
+
+
+def encode_image(pixels: np.ndarray, format: str) -> bytes:
+    out = io.BytesIO()
+    Image.fromarray(pixels).save(out, format)
+    return out.getvalue()
+
+
+def image_size(data: bytes) -> tuple[int, int]:
+    """(width, height) from the header alone, without decoding pixels."""
+    with _open(data) as img:
+        return img.size
+
+
+def image_info(source: Union[str, bytes]) -> tuple[tuple[int, int], str]:
+    """``((width, height), mode)`` of an image file or encoded bytes, from the header alone."""
+    with _open(source) as img:
+        return img.size, img.mode
+
+
+def sniff_format(data: bytes) -> Optional[str]:
+    """The Pillow format of encoded bytes (from their header), or None if Pillow cannot write it."""
+    with _open(data) as img:
+        format = img.format
+    return format if format in Image.SAVE else None
+
+
+def parse_format(text: str) -> str:
+    """``"jpg"`` -> ``"JPEG"``; accepts Pillow format names and file extensions."""
+    Image.init()
+    name = Image.registered_extensions().get("." + text.lower().lstrip("."), text.upper())
+    if name not in Image.SAVE:
+        raise ValueError(f"unknown image format: {text}")
+    return name
+
+
+def format_extension(format: str) -> str:
+    """``"JPEG"`` -> ``".jpeg"``: the extension named after the format if registered, else the first one."""
+    extensions = [ext for ext, name in Image.registered_extensions().items() if name == format]
+    preferred = f".{format.lower()}"
+    return preferred if preferred in extensions or not extensions else extensions[0]
+
+
+def array_size(pixels: np.ndarray) -> tuple[int, int]:
+    return pixels.shape[1], pixels.shape[0]
+
+
+def output_format(path: str, format: Optional[str] = None) -> str:
+    """The Pillow format an output path will be written in (``format`` wins if given)."""
+    if format:
+        return format
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        return Image.registered_extensions()[ext]
+    except KeyError:
+        raise ValueError(f"unknown output file extension: {path}") from None
+
+
+def array_mode(pixels: np.ndarray) -> str:
+    if pixels.ndim == 2:
+        return "L"
+    return {3: "RGB", 4: "RGBA"}[pixels.shape[2]]
+
+
+def to_mode(pixels: np.ndarray, mode: str) -> np.ndarray:
+    """Convert an array between Pillow modes; a no-op when it is already ``mode``."""
+    if array_mode(pixels) == mode:
+        return pixels
+    return np.array(Image.fromarray(pixels).convert(mode))
+
+
+def default_output(input_path: str, suffix: str, format: Optional[str] = None) -> str:
+    """``photo.jpg`` -> ``photo<suffix>.jpg`` (or the forced format's extension, e.g. ``.png``)."""
+    base, ext = os.path.splitext(input_path)
+    if format == "PNG":
+        ext = ".png"
+    elif format and Image.registered_extensions().get(ext.lower()) != format:
+        ext = format_extension(format)
+    return f"{base}{suffix}{ext or '.png'}"
+
+
+def report_context(
+    params: dict[str, Any],
+    input_path: str,
+    output_path: str,
+    src_size: tuple[int, int],
+    result_size: tuple[int, int],
+) -> dict[str, Any]:
+    """Values available to an effect's ``message`` template; sizes are (width, height)."""
+    if input_path == STDIO:
+        input_path = "<stdin>"
+    if output_path == STDIO:
+        output_path = "<stdout>"
+    return {
+        **params,
+        "input": input_path,
+        "output": output_path,
+        "input_name": os.path.basename(input_path),
+        "output_name": os.path.basename(output_path),
+        "src_width": src_size[0],
+        "src_height": src_size[1],
+        "width": result_size[0],
+        "height": result_size[1],
+    }
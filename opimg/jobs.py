@@ -0,0 +1,224 @@
+"""``op run-jobs``: render a JSONL manifest of jobs on a pool of warm workers.
+
+    op run-jobs jobs.jsonl --jobs 8
+
+Each manifest line is one job::
+
+    {"patch": "echo", "input": "a.png", "output": "out/a.png", "args": {"count": 3}}
+
+``output`` is optional (default: the patch's usual suffix naming next to the
+input) and ``args`` is either a mapping of parameters or a list of CLI options
+(``["--count", "3"]``). An optional ``id`` names the job; otherwise it is
+identified by a hash of the line. Relative paths are resolved against the
+current directory.
+
+As each job finishes, one status record is appended to the results file
+(``<manifest>.results.jsonl`` by default)::
+
+    {"id": "1f0c...", "line": 1, "patch": "echo", "input": "a.png", "output": "out/a.png",
+     "status": "ok", "seconds": 0.41, "output_bytes": 48213, "cached": false, "error": null}
+
+With ``--max-memory``, a job whose estimate is over the limit is recorded as
+an error before its input is decoded.
+
+Running the same manifest again skips jobs that already have an ``ok`` record
+whose output still exists, so an interrupted run resumes where it stopped and
+failed jobs are retried.
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from typing import Any, Iterable, Iterator, Optional, Sequence
+
+from .cache import ResultCache, add_cache_arguments, cache_from_args
+from .memory import add_memory_argument, check_limit, estimate_file
+from .registry import get_effect
+from .render import output_path_for, render_file
+
+Job = dict[str, Any]
+Record = dict[str, Any]
+
+_worker_cache: Optional[ResultCache] = None
+_worker_max_memory: Optional[int] = None
+
+
+def job_id(entry: dict[str, Any]) -> str:
+    """The job's ``id`` field, else a stable hash of its content."""
+    if entry.get("id") is not None:
+        return str(entry["id"])
+    canonical = json.dumps(entry, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+def parse_job(line_no: int, entry: Any) -> Job:
+    """Validate one manifest entry against its patch's schema; raises ValueError."""
+    if not isinstance(entry, dict):
+        raise ValueError("job must be a JSON object")
+    for field in ("patch", "input"):
+        if not isinstance(entry.get(field), str):
+            raise ValueError(f"job needs a '{field}' string")
+    try:
+        effect = get_effect(entry["patch"])
+    except KeyError as e:
+        raise ValueError(e.args[0]) from None
+
+    args = entry.get("args") or {}
+    if isinstance(args, list):
+        params = effect.parse_args([str(a) for a in args])
+    elif isinstance(args, dict):
+        params = effect.resolve(effect.coerce(args))
+    else:
+        raise ValueError("'args' must be an object or a list of options")
+
+    output = entry.get("output") or output_path_for(effect, params, entry["input"])
+    return {
+        "id": job_id(entry),
+        "line": line_no,
+        "patch": effect.name,
+        "input": entry["input"],
+        "output": output,
+        "params": params,
+    }
+
+
+def read_manifest(path: str) -> Iterator[tuple[Optional[Job], Optional[Record]]]:
+    """Yield ``(job, None)`` per valid line, or ``(None, error record)`` per invalid one."""
+    with open(path) as f:
+        for line_no, text in enumerate(f, 1):
+            if not text.strip() or text.lstrip().startswith("#"):
+                continue
+            try:
+                entry = json.loads(text)
+            except ValueError as e:
+                yield None, {"id": f"line-{line_no}", "line": line_no, "status": "error", "error": f"bad JSON: {e}"}
+                continue
+            try:
+                yield parse_job(line_no, entry), None
+            except (ValueError, TypeError) as e:
+                ident = job_id(entry) if isinstance(entry, dict) else f"line-{line_no}"
+                yield None, {"id": ident, "line": line_no, "status": "error", "error": str(e)}
+
+
+def completed_ids(results_path: str) -> set[str]:
+    """Ids of jobs recorded ``ok`` whose output is still on disk."""
+    done: set[str] = set()
+    if not os.path.exists(results_path):
+        return done
+    with open(results_path) as f:
+        for text in f:
+            try:
+                record = json.loads(text)
+            except ValueError:
+                continue  # a line cut short by an interrupted run
+            if record.get("status") == "ok" and os.path.exists(record.get("output") or ""):
+                done.add(record["id"])
+            elif record.get("id") in done:
+                done.discard(record["id"])  # a later failure supersedes an earlier success
+    return done
+
+
+def _init_worker(cache: Optional[ResultCache], max_memory: Optional[int]) -> None:
+    global _worker_cache, _worker_max_memory
+    _worker_cache = cache
+    _worker_max_memory = max_memory
+
+
+def _run_job(job: Job) -> Record:
+    """Render one job in a worker; never raises, so one bad job cannot stop the pool."""
+    record = {k: job[k] for k in ("id", "line", "patch", "input", "output")}
+    start = time.perf_counter()
+    try:
+        effect = get_effect(job["patch"])
+        if _worker_max_memory is not None:
+            check_limit(estimate_file(effect, job["params"], job["input"]), _worker_max_memory)
+        out_dir = os.path.dirname(job["output"])
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        context = render_file(effect, job["params"], job["input"], job["output"], _worker_cache)
+        record.update(
+            status="ok",
+            output_bytes=os.path.getsize(job["output"]),
+            cached=bool(context.get("cached")),
+            error=None,
+        )
+    except Exception as e:  # noqa: BLE001 -- recorded per job
+        record.update(status="error", output_bytes=None, cached=False, error=f"{type(e).__name__}: {e}")
+    record["seconds"] = round(time.perf_counter() - start, 4)
+    return record
+
+
+def run_jobs(
+    jobs: Iterable[Job], workers: int, cache: Optional[ResultCache] = None, max_memory: Optional[int] = None
+) -> Iterator[Record]:
+    """Yield one status record per job as workers finish them (completion order).
+
+    Jobs estimated to need more than ``max_memory`` bytes are recorded as errors without rendering.
+    """
+    if workers <= 1:
+        _init_worker(cache, max_memory)
+        yield from map(_run_job, jobs)
+        return
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(cache, max_memory)) as pool:
+        yield from pool.imap_unordered(_run_job, jobs)
+
+
+def append_record(f, record: Record) -> None:
+    """Append one record and push it to disk, so a crash loses at most the job in flight."""
+    f.write(json.dumps(record) + "\n")
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="op run-jobs", description="Render every job in a JSONL manifest.")
+    parser.add_argument("manifest", help="JSONL file with one {patch, input, output, args} job per line")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: number of CPUs)")
+    parser.add_argument("--results", default=None,
+                        help="Append status records here (default: <manifest>.results.jsonl)")
+    add_cache_arguments(parser)
+    add_memory_argument(parser)
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile(args.manifest):
+        print(f"Error: file not found: {args.manifest}", file=sys.stderr)
+        sys.exit(1)
+    results_path = args.results or os.path.splitext(args.manifest)[0] + ".results.jsonl"
+
+    done = completed_ids(results_path)
+    pending, skipped, failed, invalid_lines = [], 0, 0, 0
+    start = time.perf_counter()
+    with open(results_path, "a") as results:
+        for job, invalid in read_manifest(args.manifest):
+            if invalid is not None:
+                invalid_lines += 1
+                failed += 1
+                append_record(results, invalid)
+                print(f"FAILED line {invalid['line']}: {invalid['error']}", file=sys.stderr)
+            elif job["id"] in done:
+                skipped += 1
+            else:
+                pending.append(job)
+
+        workers = max(1, min(args.jobs, len(pending)))
+        for record in run_jobs(pending, workers, cache_from_args(args), args.max_memory):
+            append_record(results, record)
+            if record["status"] != "ok":
+                failed += 1
+                print(f"FAILED line {record['line']} ({record['input']}): {record['error']}", file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    total = len(pending) + invalid_lines
+    print(
+        f"run-jobs: {total - failed}/{total} jobs in {elapsed:.2f}s with {workers} worker(s)"
+        + (f", {failed} failed" if failed else "")
+        + (f", {skipped} skipped" if skipped else ""),
+        file=sys.stderr,
+    )
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,174 @@
+"""Peak-memory estimates from the image header, before any pixel is decoded.
+
+    op --estimate closest-palette photo.jpg --palette "#000,#fff,#f00"
+    op --estimate echo --dimensions 8000x6000 --blend multiply --json
+    op pixel-sort photo.jpg --max-memory 2G
+
+A render goes through three phases, each holding different buffers at its peak:
+
+- ``decode``: Pillow's decoded image, its copy in the effect's colour mode and
+  the array made from that copy (through a transient bytes copy);
+- ``kernel``: the source array plus what the effect allocates, from its
+  registered model (``Effect.peak_memory``);
+- ``encode``: the source array, the result and Pillow's copy of the result.
+
+Pillow keeps 3-band images at 4 bytes per pixel. The estimate is the largest
+phase plus the interpreter's own footprint with the effect's imports loaded
+(taken from this process). ``--max-memory`` checks that figure and refuses to
+start a render that would exceed it.
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+from typing import Any, Optional, Sequence
+
+from .cache import parse_size
+from .io import STDIO, image_info, read_input
+from .registry import MODE_BANDS, Effect, get_effect
+
+_UNITS = ("B", "KiB", "MiB", "GiB", "TiB")
+
+
+def pillow_bytes(mode: str) -> int:
+    """Bytes per pixel of a decoded Pillow image in ``mode``."""
+    if mode in ("1", "L", "P"):
+        return 1
+    return 2 if mode.startswith("I;16") else 4
+
+
+def process_bytes() -> int:
+    """Resident size of this process: the interpreter and everything imported so far."""
+    try:
+        # Current, not peak, size: an ``op serve`` worker may have rendered a large image before
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in KiB on Linux and bytes on macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def format_bytes(n: float) -> str:
+    """``1536 * 1024`` -> ``"1.5 MiB"``."""
+    for unit in _UNITS[:-1]:
+        if abs(n) < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} {_UNITS[-1]}"
+
+
+def estimate(
+    effect: Effect, params: dict[str, Any], width: int, height: int, source_mode: str = "RGB"
+) -> dict[str, Any]:
+    """Per-phase and peak bytes of rendering a ``width`` x ``height`` image in ``source_mode``."""
+    n = width * height
+    src = n * MODE_BANDS[effect.mode]
+    phases = {
+        "decode": n * (pillow_bytes(source_mode) + pillow_bytes(effect.mode)) + 2 * src,
+        "kernel": src + effect.peak_memory(width, height, params),
+        # A result of at most 4 bytes per pixel, and Pillow's copy of it
+        "encode": src + 2 * 4 * n,
+    }
+    peak = max(phases.values())
+    baseline = process_bytes()
+    return {
+        "patch": effect.name,
+        "width": width,
+        "height": height,
+        "mode": source_mode,
+        "phases": phases,
+        "peak_bytes": peak,
+        "baseline_bytes": baseline,
+        "total_bytes": peak + baseline,
+    }
+
+
+def estimate_file(effect: Effect, params: dict[str, Any], path: str) -> dict[str, Any]:
+    """``estimate`` for the image at ``path`` (``-`` reads stdin), reading its header only."""
+    (width, height), mode = image_info(read_input(path) if path == STDIO else path)
+    return estimate(effect, params, width, height, mode)
+
+
+def check_limit(report: dict[str, Any], limit: int) -> None:
+    """Raise ValueError if the estimated total exceeds ``limit`` bytes."""
+    if report["total_bytes"] > limit:
+        raise ValueError(
+            f"{report['patch']} needs about {format_bytes(report['total_bytes'])} for a "
+            f"{report['width']}x{report['height']} image, over --max-memory {format_bytes(limit)}"
+        )
+
+
+def format_text(report: dict[str, Any]) -> str:
+    title = " ".join(str(report[k]) for k in ("patch", "input") if report.get(k) is not None)
+    megapixels = report["width"] * report["height"] / 1e6
+    lines = [f"estimate: {title} ({report['width']}x{report['height']}, {megapixels:.2f} MP, {report['mode']})"]
+    peak_phase = max(report["phases"], key=report["phases"].get)
+    for phase, nbytes in report["phases"].items():
+        marker = "  <- peak" if phase == peak_phase else ""
+        lines.append(f"  {phase:<10} {format_bytes(nbytes):>12}{marker}")
+    lines.append(f"  {'process':<10} {format_bytes(report['baseline_bytes']):>12}  (interpreter and imports)")
+    lines.append(f"  {'total':<10} {format_bytes(report['total_bytes']):>12}")
+    return "\n".join(lines)
+
+
+def add_memory_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--max-memory", type=parse_size, default=None, metavar="SIZE",
+                        help="Refuse to render if the estimated peak memory exceeds SIZE, e.g. 2G "
+                             "(file inputs; see op --estimate)")
+
+
+def _dimensions(text: str) -> tuple[int, int]:
+    width, sep, height = text.lower().partition("x")
+    try:
+        size = int(width), int(height)
+    except ValueError:
+        size = (0, 0)
+    if not sep or min(size) < 1:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got '{text}'")
+    return size
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    usage = "op --estimate <patch> [<input|-> | --dimensions WxH] [--json] [--args]"
+    if not argv or argv[0].startswith("-"):
+        print(f"Usage: {usage}", file=sys.stderr)
+        sys.exit(1)
+    name, rest = argv[0], argv[1:]
+    try:
+        effect = get_effect(name)
+    except KeyError as e:
+        print(f"Error: {e.args[0]}", file=sys.stderr)
+        sys.exit(1)
+
+    parser = argparse.ArgumentParser(
+        prog=f"op --estimate {name}", usage=usage,
+        description=f"Estimate the peak memory of {name} on an image without decoding it.",
+    )
+    parser.add_argument("input", nargs="?", default=None, help="Image to read the size from, or - for stdin")
+    # Not --size: effects such as res-crush and seam-carve have their own
+    parser.add_argument("--dimensions", type=_dimensions, default=None, metavar="WxH",
+                        help="Image size instead of an input, e.g. 8000x6000")
+    parser.add_argument("--json", action="store_true", help="Print the estimate as one JSON object")
+    effect.add_arguments(parser)
+    args = parser.parse_args(rest)
+    if (args.input is None) == (args.dimensions is None):
+        parser.error("give either an input image or --dimensions")
+    params = {p.name: getattr(args, p.name) for p in effect.params}
+
+    try:
+        if args.dimensions is not None:
+            report = estimate(effect, params, *args.dimensions)
+        else:
+            report = estimate_file(effect, params, args.input)
+    except OSError as e:
+        print(f"Error: cannot read {args.input}: {e}", file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        parser.error(str(e))
+    report["input"] = args.input
+    print(json.dumps(report) if args.json else format_text(report))
+
@@ -0,0 +1,198 @@
+"""Per-stage wall and CPU timings behind ``--profile``.
+
+    op pixel-sort photo.jpg --profile
+    op pixel-sort photo.jpg --profile-json
+
+A render is split into the stages it actually runs: ``startup`` (interpreter
+start and imports, measured from the ``op`` dispatcher's ``$OPIMG_START`` when
+present, else from the process start time in ``/proc``), ``read``/``decode``,
+``convert`` (to the effect's colour mode), ``kernel``, ``encode``/``write``
+and, with a result cache, ``cache_get``/``cache_put``. A request served by
+``op serve`` reports ``dispatch`` (client start to a warm worker picking it up)
+in place of startup. The report goes to stderr so it never mixes with an image
+streamed to stdout.
+
+ImageMagick patches cannot be split into stages; ``op`` runs them through
+``python -m opimg.profile <script> [args]``, which reports the script as one
+``script`` stage.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, Sequence
+
+# Wall-clock start (epoch seconds) exported by ``op`` for every invocation
+START_ENV = "OPIMG_START"
+
+# Set in ``op serve`` workers, whose process start says nothing about the request
+_warm = False
+
+
+def mark_warm() -> None:
+    global _warm
+    _warm = True
+
+
+def _request_start() -> Optional[float]:
+    """Epoch seconds at which ``op`` was invoked, if it told us."""
+    value = os.environ.get(START_ENV, "").replace(",", ".")
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def process_age() -> Optional[float]:
+    """Seconds since this process started, from /proc (Linux only; 10 ms resolution)."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Field 22 (starttime, in clock ticks since boot); the command name may contain spaces
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+
+
+def _cpu_since_start() -> float:
+    t = os.times()
+    return t.user + t.system
+
+
+class Profiler:
+    """Collects ``(stage, wall seconds, cpu seconds)`` for one render."""
+
+    def __init__(self) -> None:
+        self.stages: list[tuple[str, float, Optional[float]]] = []
+        self.size: Optional[tuple[int, int]] = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - wall, time.process_time() - cpu))
+
+    def record_startup(self) -> None:
+        """Record everything before the first stage: interpreter start, imports, argument parsing."""
+        start = _request_start()
+        if _warm:
+            if start is not None:
+                self.stages.append(("dispatch", max(0.0, time.time() - start), None))
+            return
+        if start is not None:
+            wall = max(0.0, time.time() - start)
+        else:
+            wall = process_age()
+        if wall is not None:
+            self.stages.append(("startup", wall, _cpu_since_start()))
+
+    def wall(self, name: str) -> float:
+        """Total wall time of stage ``name``, including its ``name:<detail>`` variants."""
+        return sum(w for stage, w, _ in self.stages if stage == name or stage.startswith(name + ":"))
+
+    def summary(self, **fields: Any) -> dict[str, Any]:
+        """The report as one JSON-serialisable object; ``fields`` are merged in first."""
+        total_wall = sum(w for _, w, _ in self.stages)
+        total_cpu = sum(c for _, _, c in self.stages if c is not None)
+        pixels = self.size[0] * self.size[1] if self.size else None
+
+        def rate(seconds: float) -> Optional[float]:
+            return round(pixels / 1e6 / seconds, 3) if pixels and seconds > 0 else None
+
+        return {
+            **fields,
+            "width": self.size[0] if self.size else None,
+            "height": self.size[1] if self.size else None,
+            "pixels": pixels,
+            "stages": [
+                {"stage": name, "wall_ms": round(w * 1e3, 3), "cpu_ms": None if c is None else round(c * 1e3, 3)}
+                for name, w, c in self.stages
+            ],
+            "total": {"wall_ms": round(total_wall * 1e3, 3), "cpu_ms": round(total_cpu * 1e3, 3)},
+            "megapixels_per_second": {"kernel": rate(self.wall("kernel")), "total": rate(total_wall)},
+        }
+
+    def report(self, json_output: bool = False, **fields: Any) -> str:
+        summary = self.summary(**fields)
+        if json_output:
+            return json.dumps(summary)
+        return format_text(summary)
+
+
+def format_text(summary: dict[str, Any]) -> str:
+    title = " ".join(str(v) for k, v in summary.items() if k in ("patch", "input"))
+    lines = [f"profile: {title}"]
+    if summary["pixels"]:
+        lines[0] += f" ({summary['width']}x{summary['height']}, {summary['pixels'] / 1e6:.2f} MP)"
+    rows = summary["stages"] + [{"stage": "total", **summary["total"]}]
+    width = max(10, *(len(s["stage"]) for s in rows))
+    lines.append(f"  {'stage':<{width}} {'wall ms':>10} {'cpu ms':>10}")
+    for s in rows:
+        cpu = "-" if s["cpu_ms"] is None else f"{s['cpu_ms']:.1f}"
+        lines.append(f"  {s['stage']:<{width}} {s['wall_ms']:>10.1f} {cpu:>10}")
+    rates = summary["megapixels_per_second"]
+    if rates["kernel"] is not None or rates["total"] is not None:
+        parts = [f"{rates[k]:.2f} MP/s {k}" for k in ("kernel", "total") if rates[k] is not None]
+        lines.append("  " + ", ".join(parts))
+    return "\n".join(lines)
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--profile", action="store_true",
+                        help="Report wall/CPU time per stage (startup, decode, convert, kernel, encode) on stderr")
+    parser.add_argument("--profile-json", action="store_true",
+                        help="Like --profile, as one JSON object")
+
+
+def profiler_from_args(args: argparse.Namespace) -> Optional[Profiler]:
+    if not (args.profile or args.profile_json):
+        return None
+    profiler = Profiler()
+    profiler.record_startup()
+    return profiler
+
+
+def print_report(profiler: Optional[Profiler], args: argparse.Namespace, **fields: Any) -> None:
+    if profiler is not None:
+        print(profiler.report(args.profile_json, **fields), file=sys.stderr)
+
+
+def run_script(argv: Sequence[str]) -> int:
+    """Profile an external patch script as a whole: ``<script> [args] --profile[-json]``."""
+    script, *args = argv
+    json_output = "--profile-json" in args
+    args = [a for a in args if a not in ("--profile", "--profile-json")]
+    profiler = Profiler()
+    profiler.record_startup()
+
+    wall, before = time.perf_counter(), resource.getrusage(resource.RUSAGE_CHILDREN)
+    returncode = subprocess.call([script, *args])
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    profiler.stages.append(("script", time.perf_counter() - wall, cpu))
+
+    inputs = [a for a in args if not a.startswith("-") or a == "-"]
+    if inputs and inputs[0] != "-" and os.path.isfile(inputs[0]):
+        try:
+            from PIL import Image
+
+            with Image.open(inputs[0]) as img:
+                profiler.size = img.size
+        except OSError:
+            pass
+    name = os.path.splitext(os.path.basename(script))[0]
+    print(profiler.report(json_output, patch=name, input=inputs[0] if inputs else None), file=sys.stderr)
+    return returncode
+
+
+if __name__ == "__main__":
+    sys.exit(run_script(sys.argv[1:]))
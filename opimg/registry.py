@@ -0,0 +1,223 @@
+"""Effect registry: every patch registers a pure ndarray -> ndarray function here.
+
+Effect modules live in ``opimg.effects`` and are imported lazily the first time
+an effect is looked up, so listing patches (or routing a request) never pays for
+NumPy, Pillow or SciPy imports.
+"""
+
+import argparse
+import importlib
+import pkgutil
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Sequence, Union
+
+EFFECTS_PACKAGE = "opimg.effects"
+
+_REGISTRY: dict[str, "Effect"] = {}
+
+# Bytes per pixel of the uint8 arrays an effect receives, by colour mode
+MODE_BANDS = {"L": 1, "RGB": 3, "RGBA": 4}
+
+# ``(width, height, params) -> bytes``: see ``Effect.peak_memory``
+MemoryModel = Callable[[int, int, dict[str, Any]], int]
+
+
+class _RaisingParser(argparse.ArgumentParser):
+    """Argument parser that raises ``ValueError`` instead of printing usage and exiting."""
+
+    def error(self, message: str):
+        raise ValueError(message)
+
+
+@dataclass(frozen=True)
+class Param:
+    """One command-line option of an effect, mirroring ``argparse.add_argument``."""
+
+    flag: str
+    type: Callable[[str], Any] = str
+    default: Any = None
+    help: str = ""
+    choices: Optional[Sequence[Any]] = None
+    metavar: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        """Keyword name the effect function receives, e.g. ``--offset-x`` -> ``offset_x``."""
+        return self.flag.lstrip("-").replace("-", "_")
+
+    def add_to(self, parser: argparse.ArgumentParser) -> None:
+        kwargs: dict[str, Any] = {"type": self.type, "default": self.default, "help": self.help}
+        if self.choices is not None:
+            kwargs["choices"] = self.choices
+        if self.metavar is not None:
+            kwargs["metavar"] = self.metavar
+        parser.add_argument(self.flag, dest=self.name, **kwargs)
+
+
+@dataclass(frozen=True)
+class Effect:
+    """A registered patch: the kernel plus everything needed to drive it from a CLI."""
+
+    name: str
+    fn: Callable[..., Any]
+    description: str
+    suffix: str
+    params: tuple[Param, ...] = ()
+    mode: str = "RGB"
+    format: Optional[str] = None
+    message: Union[str, Callable[[dict[str, Any]], str], None] = None
+    version: str = "1"
+    cacheable: Optional[Callable[[dict[str, Any]], bool]] = None
+    memory: Optional[MemoryModel] = None
+
+    def defaults(self) -> dict[str, Any]:
+        return {p.name: p.default for p in self.params}
+
+    def resolve(self, params: dict[str, Any]) -> dict[str, Any]:
+        """Fill in defaults and reject keywords the effect does not know."""
+        known = self.defaults()
+        unknown = set(params) - set(known)
+        if unknown:
+            raise TypeError(f"{self.name}: unknown parameter(s) {', '.join(sorted(unknown))}")
+        known.update(params)
+        return known
+
+    def __call__(self, pixels, **params):
+        return self.fn(pixels, **self.resolve(params))
+
+    def add_arguments(self, parser: argparse.ArgumentParser) -> None:
+        for p in self.params:
+            p.add_to(parser)
+
+    def parse_args(self, argv: Sequence[str]) -> dict[str, Any]:
+        """Parse CLI-style options (``["--count", "3"]``) into params; raises ValueError."""
+        parser = _RaisingParser(prog=self.name, add_help=False)
+        self.add_arguments(parser)
+        args = parser.parse_args(argv)
+        return {p.name: getattr(args, p.name) for p in self.params}
+
+    def coerce(self, values: dict[str, Any]) -> dict[str, Any]:
+        """Validate a JSON-style mapping (``{"offset-x": 5}``) against the schema.
+
+        Keys may be spelled as flags or keywords; values are converted with each
+        param's type and checked against its choices. Raises ValueError.
+        """
+        by_name = {p.name: p for p in self.params}
+        params = {}
+        for key, value in values.items():
+            name = key.lstrip("-").replace("-", "_")
+            if name not in by_name:
+                raise ValueError(f"{self.name}: unknown parameter '{key}'")
+            param = by_name[name]
+            if value is not None:
+                value = param.type(value)
+            if param.choices is not None and value not in param.choices:
+                raise ValueError(f"{self.name}: invalid value {value!r} for '{key}'")
+            params[name] = value
+        return params
+
+    def output_suffix(self, params: dict[str, Any]) -> str:
+        return self.suffix.format(**self.resolve(params))
+
+    def is_cacheable(self, params: dict[str, Any]) -> bool:
+        """Whether the output is a pure function of input and params (see ``opimg.cache``)."""
+        return self.cacheable is None or self.cacheable(self.resolve(params))
+
+    def peak_memory(self, width: int, height: int, params: dict[str, Any]) -> int:
+        """Estimated peak bytes the kernel allocates for a ``width`` x ``height`` input.
+
+        The result counts, the input array does not (see ``opimg.memory``). Without
+        a model the kernel is taken to allocate just a result the size of its input.
+        """
+        if self.memory is None:
+            return width * height * MODE_BANDS[self.mode]
+        return int(self.memory(width, height, self.resolve(params)))
+
+    def report(self, context: dict[str, Any]) -> str:
+        if callable(self.message):
+            return self.message(context)
+        if self.message is None:
+            return f"Saved {self.name} image to {context['output']}"
+        return self.message.format(**context)
+
+
+def register(
+    name: str,
+    *,
+    description: str,
+    suffix: str,
+    params: Sequence[Param] = (),
+    mode: str = "RGB",
+    format: Optional[str] = None,
+    message: Union[str, Callable[[dict[str, Any]], str], None] = None,
+    version: str = "1",
+    cacheable: Optional[Callable[[dict[str, Any]], bool]] = None,
+    memory: Optional[MemoryModel] = None,
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator registering ``fn(pixels, **params) -> pixels`` as the patch ``name``.
+
+    Bump ``version`` whenever a change alters the effect's output, so cached
+    results from the old version are not reused, and keep ``memory`` (the
+    kernel's peak allocation, see ``Effect.peak_memory``) in step with the code.
+    """
+
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        _REGISTRY[name] = Effect(
+            name=name,
+            fn=fn,
+            description=description,
+            suffix=suffix,
+            params=tuple(params),
+            mode=mode,
+            format=format,
+            message=message,
+            version=version,
+            cacheable=cacheable,
+            memory=memory,
+        )
+        return fn
+
+    return decorator
+
+
+def seeded(params: dict[str, Any]) -> bool:
+    """``cacheable`` predicate for random effects: deterministic only with an explicit seed."""
+    return params.get("seed") is not None
+
+
+def per_pixel(nbytes: float) -> MemoryModel:
+    """``memory`` model for kernels whose arrays all have the input's shape: ``nbytes`` per pixel."""
+    return lambda width, height, params: int(nbytes * width * height)
+
+
+def module_name(name: str) -> str:
+    return f"{EFFECTS_PACKAGE}.{name.replace('-', '_')}"
+
+
+def get_effect(name: str) -> Effect:
+    """Look up an effect by patch name, importing its module on first use."""
+    if name not in _REGISTRY:
+        try:
+            importlib.import_module(module_name(name))
+        except ModuleNotFoundError as e:
+            if e.name != module_name(name):
+                raise
+            raise KeyError(f"unknown patch '{name}'") from None
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        raise KeyError(f"unknown patch '{name}'") from None
+
+
+def list_effects() -> list[str]:
+    """Names of all available effects, without importing any of them."""
+    package = importlib.import_module(EFFECTS_PACKAGE)
+    return sorted(m.name.replace("_", "-") for m in pkgutil.iter_modules(package.__path__))
+
+
+def apply(name: str, pixels, **params):
+    """Run the effect ``name`` on ``pixels``, converting them to its colour mode first."""
+    from .io import to_mode
+
+    effect = get_effect(name)
+    return effect(to_mode(pixels, effect.mode), **params)
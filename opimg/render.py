@@ -0,0 +1,119 @@
+"""Decode -> effect -> encode for one file; shared by the CLI, batch and chain runners."""
+
+from typing import Any, Optional, Union
+
+import numpy as np
+
+from .cache import ResultCache, cache_key
+from .io import (
+    STDIO,
+    array_size,
+    default_output,
+    encode_image,
+    image_size,
+    image_to_array,
+    open_image,
+    output_format,
+    read_input,
+    report_context,
+    save_image,
+    sniff_format,
+    write_output,
+)
+from .profile import Profiler
+from .registry import Effect
+
+
+def output_path_for(
+    effect: Effect, params: dict[str, Any], input_path: str, format: Optional[str] = None
+) -> str:
+    return default_output(input_path, effect.output_suffix(params), format or effect.format)
+
+
+def decode_timed(source: Union[str, bytes], mode: str, profiler: Profiler) -> np.ndarray:
+    """Decode a file or encoded bytes into ``mode`` pixels, timing ``decode`` and ``convert``."""
+    with profiler.stage("decode"):
+        img = open_image(source)
+    with img, profiler.stage("convert"):
+        pixels = image_to_array(img, mode)
+    profiler.size = array_size(pixels)
+    return pixels
+
+
+def render_bytes(
+    effect: Effect,
+    params: dict[str, Any],
+    data: bytes,
+    format: str,
+    cache: Optional[ResultCache] = None,
+    profiler: Optional[Profiler] = None,
+) -> tuple[bytes, tuple[int, int], tuple[int, int], bool]:
+    """Apply ``effect`` to encoded image bytes and encode the result as ``format``.
+
+    Returns ``(encoded, src_size, result_size, cached)``. With a ``cache``,
+    cacheable renders are looked up by content first and stored after computing.
+    """
+    profiler = profiler or Profiler()
+    key = None
+    if cache is not None and effect.is_cacheable(params):
+        with profiler.stage("cache_get"):
+            key = cache_key(data, effect, params, format)
+            encoded = cache.get(key)
+        if encoded is not None:
+            src_size = image_size(data)
+            profiler.size = src_size
+            return encoded, src_size, image_size(encoded), True
+
+    src = decode_timed(data, effect.mode, profiler)
+    with profiler.stage("kernel"):
+        result = effect(src, **params)
+    with profiler.stage("encode"):
+        encoded = encode_image(result, format)
+    if key is not None:
+        with profiler.stage("cache_put"):
+            cache.put(key, encoded)
+    return encoded, array_size(src), array_size(result), False
+
+
+def render_file(
+    effect: Effect,
+    params: dict[str, Any],
+    input_path: str,
+    output_path: Optional[str] = None,
+    cache: Optional[ResultCache] = None,
+    format: Optional[str] = None,
+    profiler: Optional[Profiler] = None,
+) -> dict[str, Any]:
+    """Apply ``effect`` to the image at ``input_path`` and write the result.
+
+    Either path may be ``-`` for stdin/stdout; reading stdin writes to stdout
+    unless an output is given. ``format`` overrides the output format otherwise
+    implied by the effect, the output extension or (on stdout) the input's own
+    format. Stages are timed into ``profiler`` when one is given. Returns the
+    report context (see ``io.report_context``) for the status line, with
+    ``cached`` set when a cache was consulted.
+    """
+    profiler = profiler or Profiler()
+    if output_path is None:
+        output_path = STDIO if input_path == STDIO else output_path_for(effect, params, input_path, format)
+
+    if cache is None and STDIO not in (input_path, output_path):
+        src = decode_timed(input_path, effect.mode, profiler)
+        with profiler.stage("kernel"):
+            result = effect(src, **params)
+        with profiler.stage("encode"):
+            save_image(result, output_path, format or effect.format)
+        return report_context(params, input_path, output_path, array_size(src), array_size(result))
+
+    with profiler.stage("read"):
+        data = read_input(input_path)
+    if output_path == STDIO:
+        format = format or effect.format or sniff_format(data) or "PNG"
+    else:
+        format = output_format(output_path, format or effect.format)
+    encoded, src_size, result_size, cached = render_bytes(effect, params, data, format, cache, profiler)
+    with profiler.stage("write"):
+        write_output(output_path, encoded)
+    context = report_context(params, input_path, output_path, src_size, result_size)
+    context["cached"] = cached
+    return context
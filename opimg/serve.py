@@ -0,0 +1,188 @@
+"""``op serve``: a daemon that keeps pre-imported workers warm behind a Unix socket.
+
+Every request is one JSON line answered by one JSON line:
+
+    {"op": "run", "argv": ["pixel-sort", "in.png", "out.png"], "cwd": "/work", "env": {"OPIMG_START": "..."}}
+        -> {"returncode": 0, "stdout": "", "stderr": "Saved pixel-sorted image ..."}
+    {"op": "render", "patch": "echo", "params": {"count": 3}, "format": "PNG", "data": "<base64>"}
+        -> {"data": "<base64>"} or {"error": "..."}
+    {"op": "ping"} -> {"ok": true}
+    {"op": "shutdown"} -> {"ok": true}
+
+``op`` routes Python patches through the daemon automatically whenever its
+socket exists (see ``opimg.client``).
+"""
+
+import argparse
+import base64
+import contextlib
+import io
+import multiprocessing
+import os
+import signal
+import socketserver
+import sys
+import threading
+import traceback
+from typing import Any, Optional, Sequence
+
+from . import client, profile
+from .registry import get_effect, list_effects
+
+
+def _warm_worker() -> None:
+    """Import every effect module (and with them NumPy, Pillow, SciPy) up front."""
+    profile.mark_warm()
+    for name in list_effects():
+        get_effect(name)
+
+
+def _run_argv(argv: list[str], cwd: str, env: Optional[dict[str, str]] = None) -> dict[str, Any]:
+    """Run ``python -m opimg <argv>`` inside a worker, capturing its output and exit status.
+
+    ``env`` holds the client's ``OPIMG_*`` variables (see ``client.caller_env``).
+    They replace the worker's own for this request, so ``$OPIMG_CACHE_DIR``
+    and ``--profile``'s ``$OPIMG_START`` behave as in a local run.
+    """
+    from .cli import main
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    returncode = 0
+    own_env = client.caller_env()
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            os.chdir(cwd)
+            _replace_env(env or {})
+            main(argv)
+        except SystemExit as e:
+            if isinstance(e.code, str):
+                print(e.code, file=sys.stderr)
+                returncode = 1
+            else:
+                returncode = e.code or 0
+        except Exception:  # noqa: BLE001 -- relayed to the client like a crash would be
+            traceback.print_exc()
+            returncode = 1
+        finally:
+            _replace_env(own_env)
+    return {"returncode": returncode, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+def _replace_env(env: dict[str, str]) -> None:
+    """Make ``env`` the process's only ``OPIMG_*`` variables."""
+    for name in client.caller_env():
+        if name not in env:
+            del os.environ[name]
+    os.environ.update(env)
+
+
+def _render_bytes(patch: str, params: dict[str, Any], data: bytes, format: str) -> dict[str, Any]:
+    import numpy as np
+    from PIL import Image
+
+    try:
+        effect = get_effect(patch)
+        with Image.open(io.BytesIO(data)) as img:
+            pixels = np.array(img.convert(effect.mode))
+        result = effect(pixels, **params)
+        out = io.BytesIO()
+        Image.fromarray(result).save(out, effect.format or format)
+    except Exception as e:  # noqa: BLE001
+        return {"error": f"{type(e).__name__}: {e}"}
+    return {"data": base64.b64encode(out.getvalue()).decode("ascii")}
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        message = client.read_message(self.request)
+        if message is None:
+            return
+        reply = self.server.dispatch(message)
+        client.send_message(self.request, reply)
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, jobs: int) -> None:
+        self.path = path
+        self.pool = multiprocessing.Pool(jobs, initializer=_warm_worker)
+        old_umask = os.umask(0o177)  # socket is private to this user
+        try:
+            super().__init__(path, _Handler)
+        finally:
+            os.umask(old_umask)
+
+    def dispatch(self, message: dict[str, Any]) -> dict[str, Any]:
+        op = message.get("op")
+        if op == "ping":
+            return {"ok": True}
+        if op == "shutdown":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {"ok": True}
+        if op == "run":
+            return self.pool.apply(_run_argv, (message["argv"], message.get("cwd", "/"), message.get("env")))
+        if op == "render":
+            data = base64.b64decode(message["data"])
+            args = (message["patch"], message.get("params", {}), data, message.get("format", "PNG"))
+            return self.pool.apply(_render_bytes, args)
+        return {"error": f"unknown op {op!r}"}
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.pool.terminate()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+
+
+def _private_dir(path: str) -> None:
+    """Create the default socket's directory private to this user, refusing one anyone else can use."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.stat(directory)
+    if info.st_uid != os.getuid() or info.st_mode & 0o077:
+        print(f"Error: {directory} must belong to you and be private (mode 700)", file=sys.stderr)
+        sys.exit(1)
+
+
+def _claim_socket(path: str) -> None:
+    """Remove a stale socket file, refusing to start if a daemon already answers on it."""
+    if not os.path.lexists(path):
+        return
+    if not client.owned_by_caller(path):
+        print(f"Error: {path} belongs to another user; pass --socket or set OPIMG_SOCKET", file=sys.stderr)
+        sys.exit(1)
+    if client.is_running(path):
+        print(f"Error: a daemon is already listening on {path}", file=sys.stderr)
+        sys.exit(1)
+    os.unlink(path)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="op serve", description="Serve patches from warm worker processes.")
+    parser.add_argument("--socket", default=None, help=f"Socket path (default: {client.socket_path()})")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: number of CPUs)")
+    parser.add_argument("--stop", action="store_true", help="Stop the running daemon and exit")
+    args = parser.parse_args(argv)
+    path = args.socket or client.socket_path()
+
+    if args.stop:
+        try:
+            client.request({"op": "shutdown"}, path)
+        except OSError:
+            print(f"Error: no daemon listening on {path}", file=sys.stderr)
+            sys.exit(1)
+        print(f"Stopped daemon on {path}", file=sys.stderr)
+        return
+
+    if not args.socket and not os.environ.get("OPIMG_SOCKET"):
+        _private_dir(path)
+    _claim_socket(path)
+    with Server(path, max(1, args.jobs)) as server:
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        print(f"Serving on {path} with {args.jobs} worker(s)", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -1,25 +1,29 @@
 #!/bin/bash
 # res-crush.sh — Pixelate an image by downscaling and upscaling with nearest-neighbor
 #
-# Usage: ./res-crush.sh <input> [output] [--size N]
-#   input  - Source image (GIF, PNG, JPG, etc.)
-#   output - Output PNG path (default: <input>-pixelate-N.png)
-#   --size  - Downscale target in pixels (default: 64)
+# Usage: ./res-crush.sh <input> [output] [--size N] [--format FMT]
+#   input  - Source image (GIF, PNG, JPG, etc.), or - for stdin
+#   output - Output PNG path, or - for stdout (default: <input>-pixelate-N.png; stdout when reading stdin)
+#   --size   - Downscale target in pixels (default: 64)
+#   --format - Output format, e.g. png or jpg (default: from the output extension; png on stdout)
 #
 # Example:
 #   ./res-crush.sh ~/Desktop/photo.png
 #   ./res-crush.sh ~/Desktop/photo.png ~/output/result.png --size 64
+#   curl -s https://example.com/photo.jpg | ./res-crush.sh - --format jpg > result.jpg
 
 set -euo pipefail
 
 SIZE=64
 INPUT=""
 OUTPUT=""
+FORMAT=""
 
 while [ $# -gt 0 ]; do
   case "$1" in
-    --size) SIZE="$2"; shift 2 ;;
-    -*)     echo "Unknown option: $1" >&2; exit 1 ;;
+    --size)   SIZE="$2"; shift 2 ;;
+    --format) FORMAT="$2"; shift 2 ;;
+    -?*)      echo "Unknown option: $1" >&2; exit 1 ;;
     *)
       if [ -z "$INPUT" ]; then INPUT="$1"
       elif [ -z "$OUTPUT" ]; then OUTPUT="$1"
@@ -29,26 +33,48 @@ while [ $# -gt 0 ]; do
 done
 
 if [ -z "$INPUT" ]; then
-  echo "Usage: $0 <input> [output] [--size N]" >&2
+  echo "Usage: $0 <input> [output] [--size N] [--format FMT]" >&2
   exit 1
 fi
 
-if [ ! -f "$INPUT" ]; then
+if [ "$INPUT" != "-" ] && [ ! -f "$INPUT" ]; then
   echo "Error: File not found: $INPUT" >&2
   exit 1
 fi
 
+# Reading stdin writes to stdout unless an output is given
+if [ "$INPUT" = "-" ] && [ -z "$OUTPUT" ]; then
+  OUTPUT="-"
+fi
+
 if [ -z "$OUTPUT" ]; then
   DIR=$(dirname "$INPUT")
   BASE=$(basename "$INPUT" | sed 's/\.[^.]*$//')
   OUTPUT="${DIR}/${BASE}-pixelate-${SIZE}.png"
 fi
 
+# ImageMagick picks the format from a "png:" style prefix, and "-" is stdin/stdout
+if [ "$OUTPUT" = "-" ]; then
+  TARGET="${FORMAT:-png}:-"
+elif [ -n "$FORMAT" ]; then
+  TARGET="${FORMAT}:${OUTPUT}"
+else
+  TARGET="$OUTPUT"
+fi
+
+# stdin can only be read once, and the input is read more than once below
+if [ "$INPUT" = "-" ]; then
+  TMPDIR=$(mktemp -d)
+  trap 'rm -rf "$TMPDIR"' EXIT
+  cat > "${TMPDIR}/input"
+  INPUT="${TMPDIR}/input"
+fi
+
 DIMS=$(magick identify -format "%wx%h" "$INPUT[0]")
 
 magick "$INPUT" \
   -sample "${SIZE}x${SIZE}" \
   -filter point -resize "${DIMS}!" \
-  "$OUTPUT"
+  "$TARGET"
 
 echo "Pixelated to ${SIZE}px → $OUTPUT" >&2
@@ -0,0 +1,110 @@
+"""Tests for `op <patch> --batch`."""
+
+import os
+import shutil
+
+import numpy as np
+from PIL import Image
+
+from conftest import assert_valid_image
+from opimg import batch
+
+
+def _frames(tmp_path, img, n=3):
+    frames = tmp_path / "frames"
+    frames.mkdir()
+    for i in range(n):
+        shutil.copy(img, frames / f"frame{i}.png")
+    return frames
+
+
+class TestBatch:
+    def test_glob_with_out_dir(self, run_op, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        frames = _frames(tmp_path, img)
+        out_dir = tmp_path / "out"
+        r = run_op([
+            "scan-glitch", "--batch", str(frames / "*.png"), "--out-dir", str(out_dir),
+            "--jobs", "2", "--seed", "1",
+        ])
+        assert r.returncode == 0, r.stderr
+        assert "3/3 files" in r.stderr
+        for i in range(3):
+            assert_valid_image(str(out_dir / f"frame{i}-glitch.png"))
+
+    def test_directory_input_next_to_inputs(self, run_op, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        frames = _frames(tmp_path, img, n=2)
+        r = run_op(["thermal", "--batch", str(frames), "--jobs", "1"])
+        assert r.returncode == 0, r.stderr
+        assert_valid_image(str(frames / "frame0-thermal.png"))
+        assert_valid_image(str(frames / "frame1-thermal.png"))
+
+    def test_matches_single_runs(self, run_op, run_tool, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        frames = _frames(tmp_path, img, n=2)
+        out_dir = tmp_path / "out"
+        run_op(["pixel-sort", "--batch", str(frames / "*.png"), "--out-dir", str(out_dir), "--by", "hue"])
+        single = str(tmp_path / "single.png")
+        run_tool("pixel-sort", "pixel-sort.py", [img, single, "--by", "hue"])
+        expected = np.array(Image.open(single))
+        assert np.array_equal(np.array(Image.open(out_dir / "frame1-psort.png")), expected)
+
+    def test_failures_do_not_abort(self, run_op, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        frames = _frames(tmp_path, img, n=2)
+        (frames / "broken.png").write_text("not an image")
+        out_dir = tmp_path / "out"
+        r = run_op(["echo", "--batch", str(frames / "*.png"), "--out-dir", str(out_dir), "--count", "2"])
+        assert r.returncode != 0
+        assert "broken.png" in r.stderr
+        assert "2/3 files" in r.stderr
+        assert sorted(os.listdir(out_dir)) == ["frame0-echo.png", "frame1-echo.png"]
+
+    def test_max_memory_refuses_each_file(self, run_op, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        frames = _frames(tmp_path, img, n=2)
+        out_dir = tmp_path / "out"
+        r = run_op(["kaleidoscope", "--batch", str(frames), "--out-dir", str(out_dir), "--max-memory", "1K"])
+        assert r.returncode != 0
+        assert "over --max-memory" in r.stderr
+        assert "0/2 files" in r.stderr
+        assert not out_dir.exists() or not os.listdir(out_dir)
+
+    def test_recursive_glob_mirrors_subdirectories(self, run_op, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        for sub in ("a", "b/c"):
+            (tmp_path / "shots" / sub).mkdir(parents=True)
+            shutil.copy(img, tmp_path / "shots" / sub / "x.png")
+        out_dir = tmp_path / "out"
+        r = run_op(["echo", "--batch", str(tmp_path / "shots" / "**" / "*.png"), "--out-dir", str(out_dir)])
+        assert r.returncode == 0, r.stderr
+        assert "2/2 files" in r.stderr
+        assert_valid_image(str(out_dir / "a" / "x-echo.png"))
+        assert_valid_image(str(out_dir / "b" / "c" / "x-echo.png"))
+
+    def test_clashing_outputs_are_refused(self, run_op, tmp_workdir):
+        # Both inputs render to frame0-hatch.png: cross-hatch always writes PNG
+        tmp_path, img = tmp_workdir
+        frames = _frames(tmp_path, img, n=1)
+        Image.open(img).convert("RGB").save(frames / "frame0.jpg")
+        out_dir = tmp_path / "out"
+        r = run_op(["cross-hatch", "--batch", str(frames / "frame0.*"), "--out-dir", str(out_dir)])
+        assert r.returncode == 1
+        assert f"{frames / 'frame0.jpg'} and {frames / 'frame0.png'} would both write" in r.stderr
+        assert not out_dir.exists()
+
+    def test_input_root(self):
+        assert batch.input_root("shots/**/*.png") == "shots"
+        assert batch.input_root("/data/shots/2024-*/raw/*.png") == "/data/shots"
+        assert batch.input_root("*.png") == "."
+        assert batch.input_root("/*.png") == "/"
+
+    def test_no_matches(self, run_op, tmp_path):
+        r = run_op(["echo", "--batch", str(tmp_path / "*.png")])
+        assert r.returncode != 0
+        assert "no input files" in r.stderr
+
+    def test_unknown_patch(self, run_op, tmp_path):
+        r = run_op(["nonexistent", "--batch", str(tmp_path / "*.png")])
+        assert r.returncode != 0
@@ -0,0 +1,89 @@
+"""Tests for the benchmark runner in benchmarks/bench.py."""
+
+import json
+import subprocess
+import sys
+
+import numpy as np
+from PIL import Image
+
+from benchmarks import bench
+from conftest import ROOT
+
+
+def _case(median, status="ok"):
+    return {"status": status, "median_s": median, "peak_rss_mib": 50.0}
+
+
+class TestBench:
+    def test_image_shape(self):
+        for mp in bench.SIZES_MP:
+            w, h = bench.image_shape(mp)
+            assert abs(w * h / 1e6 - mp) / mp < 0.01
+            assert abs(w / h - 4 / 3) < 0.01
+
+    def test_synthetic_image_is_deterministic(self, tmp_path):
+        a, b = str(tmp_path / "a.png"), str(tmp_path / "b.png")
+        assert bench.synthetic_image(a, 0.01) == bench.synthetic_image(b, 0.01)
+        assert Image.open(a).tobytes() == Image.open(b).tobytes()
+
+    def test_lists_python_and_shell_patches(self):
+        patches = bench.list_patches()
+        assert "pixel-sort" in patches and "bit-crush" in patches
+        assert bench.is_script("bit-crush") and not bench.is_script("pixel-sort")
+
+    def test_compare(self):
+        baseline = {"echo": {"1MP": _case(1.0), "4MP": _case(4.0)}, "fold": {"1MP": _case(0.5)}}
+        results = {
+            "echo": {"1MP": _case(1.2), "4MP": _case(6.0)},
+            "fold": {"1MP": _case(0, status="timeout")},
+            "thermal": {"1MP": _case(9.0)},  # not in the baseline
+        }
+        regressions = bench.compare(results, baseline, tolerance=0.25, slack=0.05)
+        assert len(regressions) == 2
+        assert regressions[0].startswith("echo 4MP") and "1.50x" in regressions[0]
+        assert regressions[1].startswith("fold 1MP: timeout")
+
+    def test_deviation(self, tmp_path):
+        a, b = str(tmp_path / "a.png"), str(tmp_path / "b.png")
+        pixels = np.zeros((4, 5, 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(a)
+        pixels[0, :2] = (30, 0, 0)
+        Image.fromarray(pixels).save(b)
+        assert bench.deviation(a, b) == {"deviation_mae": 1.0, "deviation_changed": 0.1}
+        case = {**_case(1.0), **bench.deviation(a, b)}
+        assert bench.describe(case).endswith("vs exact: MAE 1.00, 10.0% of pixels differ")
+
+    def test_variants_are_cases(self, monkeypatch, tmp_path):
+        monkeypatch.setitem(bench.VARIANTS, "thermal", {"fast": []})
+        results = bench.run_benchmarks(["thermal"], [0.01], 1, 120, str(tmp_path))
+        assert set(results) == {"thermal", "thermal:fast"}
+        case = results["thermal:fast"]["0.01MP"]
+        assert case["deviation_mae"] == 0 and case["deviation_changed"] == 0
+
+    def test_diffusion_throughput(self, tmp_path):
+        rates = bench.diffusion_throughput(0.01, 1, str(tmp_path))
+        assert rates.keys() == bench.DIFFUSION_MP_S.keys()
+        for name, kernels in rates.items():
+            assert kernels.keys() == bench.DIFFUSION_MP_S[name].keys()
+            assert all(rate > 0 for rate in kernels.values())
+
+    def test_run_and_compare(self, tmp_path):
+        out, base = tmp_path / "results.json", tmp_path / "baseline.json"
+        args = [sys.executable, f"{ROOT}/benchmarks/bench.py", "--sizes", "0.01", "--patches", "thermal",
+                "--repeat", "1", "--output", str(out), "--baseline", str(base)]
+        r = subprocess.run(args + ["--save-baseline"], capture_output=True, text=True, timeout=120)
+        assert r.returncode == 0, r.stderr
+        case = json.loads(out.read_text())["results"]["thermal"]["0.01MP"]
+        assert case["status"] == "ok"
+        assert case["median_s"] > 0 and case["peak_rss_mib"] > 0 and "kernel_median_s" in case
+
+        r = subprocess.run(args + ["--tolerance", "100"], capture_output=True, text=True, timeout=120)
+        assert r.returncode == 0, r.stderr
+        assert "0 regression(s)" in r.stderr
+
+    def test_unknown_patch(self):
+        r = subprocess.run([sys.executable, f"{ROOT}/benchmarks/bench.py", "--patches", "nope"],
+                           capture_output=True, text=True, timeout=60)
+        assert r.returncode != 0
+        assert "unknown patch" in r.stderr
@@ -1,12 +1,13 @@
 """Tests for bit-crush tool (ImageMagick)."""
 
+import numpy as np
 import pytest
+from PIL import Image
 
 from conftest import assert_valid_image, skip_without_imagemagick
 
-pytestmark = pytest.mark.imagemagick
-
 
+@pytest.mark.imagemagick
 @skip_without_imagemagick()
 class TestBitCrush:
     def test_default_args(self, run_tool, tmp_workdir):
@@ -33,3 +34,29 @@ class TestBitCrush:
         r = run_tool("bit-crush", "bit-crush.sh", [])
         assert r.returncode != 0
         assert "Usage:" in r.stderr
+
+
+class TestBitCrushDither:
+    """Dithered renders run in the opimg port, without ImageMagick."""
+
+    def test_dither(self, run_tool, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        r = run_tool("bit-crush", "bit-crush.sh", [img, "--bits", "1", "--dither", "floyd-steinberg"])
+        assert r.returncode == 0, r.stderr
+        assert "floyd-steinberg dither" in r.stderr
+        out = str(tmp_path / "input-crush-1bit.png")
+        assert_valid_image(out)
+        assert set(np.unique(np.array(Image.open(out)))) == {0, 255}
+
+    def test_ordered(self, run_tool, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        out = str(tmp_path / "bayer.png")
+        r = run_tool("bit-crush", "bit-crush.sh", [img, out, "--bits", "2", "--dither", "bayer-8"])
+        assert r.returncode == 0, r.stderr
+        assert "bayer-8 dither" in r.stderr
+        assert set(np.unique(np.array(Image.open(out)))) <= {0, 85, 170, 255}
+
+    def test_unknown_kernel(self, run_tool, tmp_workdir):
+        _, img = tmp_workdir
+        r = run_tool("bit-crush", "bit-crush.sh", [img, "--dither", "nope"])
+        assert r.returncode != 0
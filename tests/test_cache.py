@@ -0,0 +1,92 @@
+"""Tests for the content-addressed result cache (--cache-dir)."""
+
+import os
+import time
+
+import pytest
+
+import opimg
+from opimg.cache import ResultCache, cache_key, parse_size
+
+from conftest import assert_valid_image
+
+
+class TestCacheKey:
+    def test_defaults_are_canonical(self):
+        effect = opimg.get_effect("echo")
+        assert cache_key(b"img", effect, {}, "PNG") == cache_key(b"img", effect, {"count": 12}, "PNG")
+
+    def test_key_covers_every_input(self):
+        echo = opimg.get_effect("echo")
+        base = cache_key(b"img", echo, {}, "PNG")
+        assert cache_key(b"other", echo, {}, "PNG") != base
+        assert cache_key(b"img", echo, {"count": 3}, "PNG") != base
+        assert cache_key(b"img", echo, {}, "JPEG") != base
+        assert cache_key(b"img", opimg.get_effect("thermal"), {}, "PNG") != base
+
+    def test_seeded_patches_need_a_seed(self):
+        for name in ("scan-glitch", "stipple", "tile-shuffle"):
+            effect = opimg.get_effect(name)
+            assert not effect.is_cacheable({})
+            assert effect.is_cacheable({"seed": 3})
+        assert opimg.get_effect("seam-carve").is_cacheable({})
+
+    def test_parse_size(self):
+        assert parse_size("1024") == 1024
+        assert parse_size("2K") == 2048
+        assert parse_size("1.5M") == 3 << 19
+        assert parse_size("1GB") == 1 << 30
+
+
+class TestResultCache:
+    def test_round_trip(self, tmp_path):
+        cache = ResultCache(str(tmp_path))
+        assert cache.get("ab" * 32) is None
+        cache.put("ab" * 32, b"payload")
+        assert cache.get("ab" * 32) == b"payload"
+
+    def test_lru_eviction(self, tmp_path):
+        cache = ResultCache(str(tmp_path), max_bytes=250)
+        keys = [f"{i:02d}" * 32 for i in range(3)]
+        for key in keys[:2]:
+            cache.put(key, b"x" * 100)
+        past = time.time() - 60
+        for key in keys[:2]:
+            os.utime(cache._path(key), (past, past))
+        cache.get(keys[0])  # most recently used now
+        cache.put(keys[2], b"x" * 100)
+        assert cache.get(keys[0]) is not None
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[2]) is not None
+
+
+class TestCacheCli:
+    def test_hit_reuses_output(self, run_tool, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        cache_dir = str(tmp_path / "cache")
+        out1, out2 = str(tmp_path / "a.png"), str(tmp_path / "b.png")
+        r1 = run_tool("seam-carve", "seam-carve.py", [img, out1, "--percent", "10", "--cache-dir", cache_dir])
+        r2 = run_tool("seam-carve", "seam-carve.py", [img, out2, "--percent", "10", "--cache-dir", cache_dir])
+        assert r1.returncode == 0 and r2.returncode == 0
+        assert "(cached)" not in r1.stderr
+        assert "(cached)" in r2.stderr
+        assert "(6 seams removed, 58x64)" in r2.stderr
+        assert_valid_image(out2)
+        with open(out1, "rb") as f1, open(out2, "rb") as f2:
+            assert f1.read() == f2.read()
+
+    @pytest.mark.parametrize("args, cached", [([], False), (["--seed", "4"], True)])
+    def test_unseeded_never_cached(self, run_tool, tmp_workdir, args, cached):
+        tmp_path, img = tmp_workdir
+        cache_dir = str(tmp_path / "cache")
+        out = str(tmp_path / "out.png")
+        for _ in range(2):
+            r = run_tool("tile-shuffle", "tile-shuffle.py", [img, out, "--cache-dir", cache_dir] + args)
+        assert ("(cached)" in r.stderr) == cached
+
+    def test_batch_uses_cache(self, run_op, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        cache_dir = str(tmp_path / "cache")
+        args = ["thermal", "--batch", img, "--out-dir", str(tmp_path / "out"), "--cache-dir", cache_dir]
+        assert run_op(args).returncode == 0
+        assert len([f for _, _, fs in os.walk(cache_dir) for f in fs]) == 1
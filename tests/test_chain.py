@@ -0,0 +1,70 @@
+"""Tests for `op chain`."""
+
+import numpy as np
+from PIL import Image
+
+from conftest import assert_valid_image
+
+
+class TestChain:
+    def test_chain_stages(self, run_op, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        out = str(tmp_path / "chained.png")
+        r = run_op([
+            "chain", img, out,
+            "bit-crush", "--bits", "2", "::", "channel-offset", "::",
+            "scan-glitch", "--seed", "3", "::", "echo", "--count", "6",
+        ])
+        assert r.returncode == 0, r.stderr
+        assert_valid_image(out)
+        assert "bit-crush → channel-offset → scan-glitch → echo" in r.stderr
+
+    def test_matches_sequential_runs(self, run_op, run_tool, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        step1 = str(tmp_path / "step1.png")
+        step2 = str(tmp_path / "step2.png")
+        chained = str(tmp_path / "chained.png")
+        run_tool("pixel-sort", "pixel-sort.py", [img, step1, "--by", "hue"])
+        run_tool("thermal", "thermal.py", [step1, step2])
+        r = run_op(["chain", img, chained, "pixel-sort", "--by", "hue", "::", "thermal"])
+        assert r.returncode == 0, r.stderr
+        assert np.array_equal(np.array(Image.open(step2)), np.array(Image.open(chained)))
+
+    def test_mode_changes_between_stages(self, run_op, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        out = str(tmp_path / "modes.png")
+        r = run_op(["chain", img, out, "dot-halftone", "--spacing", "4", "::", "echo", "--count", "2"])
+        assert r.returncode == 0, r.stderr
+        assert assert_valid_image(out).mode == "RGB"
+
+    def test_max_memory_checks_every_stage(self, run_op, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        out = tmp_path / "x.png"
+        r = run_op(["chain", "--max-memory", "1K", img, str(out), "echo", "::", "kaleidoscope"])
+        assert r.returncode != 0
+        assert "over --max-memory" in r.stderr
+        assert not out.exists()
+
+        r = run_op(["chain", "--max-memory", "1G", img, str(out), "echo", "::", "kaleidoscope"])
+        assert r.returncode == 0, r.stderr
+        assert_valid_image(str(out))
+
+    def test_unknown_stage(self, run_op, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        r = run_op(["chain", img, str(tmp_path / "x.png"), "echo", "::", "nonexistent"])
+        assert r.returncode != 0
+        assert "unknown patch" in r.stderr
+
+    def test_bad_stage_option(self, run_op, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        r = run_op(["chain", img, str(tmp_path / "x.png"), "echo", "--bogus", "1"])
+        assert r.returncode != 0
+
+    def test_empty_stage(self, run_op, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        r = run_op(["chain", img, str(tmp_path / "x.png"), "echo", "::"])
+        assert r.returncode != 0
+
+    def test_missing_input(self, run_op, tmp_path):
+        r = run_op(["chain", "/nonexistent/image.png", str(tmp_path / "x.png"), "echo"])
+        assert r.returncode != 0
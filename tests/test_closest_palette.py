@@ -1,7 +1,15 @@
 """Tests for closest-palette tool."""
 
+import numpy as np
+import pytest
+
 from conftest import assert_valid_image
 
+from opimg.dither import diffuse
+from opimg.effects import closest_palette
+from opimg.io import load_image, save_image
+from opimg.registry import get_effect
+
 
 class TestClosestPalette:
     def test_with_palette(self, run_tool, tmp_workdir):
@@ -32,6 +40,65 @@ class TestClosestPalette:
         assert r.returncode == 0
         assert_valid_image(out)
 
+    def test_metric(self, run_tool, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        out = str(tmp_path / "oklab.png")
+        r = run_tool("closest-palette", "closest-palette.py", [
+            img, out, "--palette", "#000,#fff,#f00", "--metric", "oklab",
+        ])
+        assert r.returncode == 0, r.stderr
+        assert_valid_image(out)
+
+    def test_dither(self, run_tool, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        out = str(tmp_path / "dithered.png")
+        r = run_tool("closest-palette", "closest-palette.py", [
+            img, out, "--palette", "#000,#fff,#f00", "--dither", "jarvis",
+        ])
+        assert r.returncode == 0, r.stderr
+        assert "3 colors, jarvis dither" in r.stderr
+        colors = np.unique(load_image(out).reshape(-1, 3), axis=0)
+        assert {tuple(c) for c in colors} <= {(0, 0, 0), (255, 255, 255), (255, 0, 0)}
+
+    def test_blue_noise(self, run_tool, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        out = str(tmp_path / "blue-noise.png")
+        r = run_tool("closest-palette", "closest-palette.py", [
+            img, out, "--palette", "#000,#fff,#f00", "--dither", "blue-noise",
+        ])
+        assert r.returncode == 0, r.stderr
+        assert "3 colors, blue-noise dither" in r.stderr
+        colors = np.unique(load_image(out).reshape(-1, 3), axis=0)
+        assert {tuple(c) for c in colors} <= {(0, 0, 0), (255, 255, 255), (255, 0, 0)}
+
+    def test_bits(self, run_tool, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        out = str(tmp_path / "bits.png")
+        r = run_tool("closest-palette", "closest-palette.py", [img, out, "--bits", "1", "--dither", "atkinson"])
+        assert r.returncode == 0, r.stderr
+        assert "8 colors" in r.stderr
+        assert set(np.unique(load_image(out))) <= {0, 255}
+
+    @pytest.mark.parametrize("args", [
+        ["--bits", "2", "--palette", "#000,#fff"],
+        ["--bits", "9"],
+        ["--bits", "2", "--metric", "lab"],
+    ])
+    def test_bad_bits(self, run_tool, tmp_workdir, args):
+        _, img = tmp_workdir
+        r = run_tool("closest-palette", "closest-palette.py", [img, *args])
+        assert r.returncode != 0
+
+    def test_from_image_seeded(self, run_tool, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        outs = [str(tmp_path / f"seeded-{i}.png") for i in range(2)]
+        for out in outs:
+            r = run_tool("closest-palette", "closest-palette.py", [
+                img, out, "--from-image", img, "--colors", "4", "--seed", "7",
+            ])
+            assert r.returncode == 0, r.stderr
+        assert np.array_equal(load_image(outs[0]), load_image(outs[1]))
+
     def test_no_palette_errors(self, run_tool, tmp_workdir):
         _, img = tmp_workdir
         r = run_tool("closest-palette", "closest-palette.py", [img])
@@ -40,3 +107,193 @@ class TestClosestPalette:
     def test_no_args(self, run_tool):
         r = run_tool("closest-palette", "closest-palette.py", [])
         assert r.returncode != 0
+
+
+class TestPaletteCube:
+    def _brute_force(self, pixels, palette):
+        flat = pixels.reshape(-1, 3).astype(np.float64)
+        dists = np.linalg.norm(flat[:, None] - palette[None, :].astype(np.float64), axis=2)
+        return palette[np.argmin(dists, axis=1)].reshape(pixels.shape)
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        pixels = rng.integers(0, 256, (40, 50, 3), dtype=np.uint8)
+        # Repeated palette colors: ties go to the first, as with argmin
+        palette = closest_palette.parse_palette("#000,#fff,#f00,#0f0,#00f,#f00,#808080")
+        assert np.array_equal(closest_palette.snap_to_palette(pixels, palette), self._brute_force(pixels, palette))
+
+    def test_wide_palette(self):
+        rng = np.random.default_rng(1)
+        pixels = rng.integers(0, 256, (30, 30, 3), dtype=np.uint8)
+        palette = rng.integers(0, 256, (300, 3), dtype=np.uint8)
+        cube = closest_palette.PaletteCube(palette)
+        assert cube.index.dtype == np.uint16
+        assert np.array_equal(cube.snap(pixels), self._brute_force(pixels, palette))
+
+    def test_fills_lazily(self):
+        palette = closest_palette.parse_palette("#000,#fff")
+        cube = closest_palette.PaletteCube(palette)
+        pixels = np.array([[[10, 10, 10], [250, 240, 230], [10, 10, 10]]], dtype=np.uint8)
+        assert cube.lookup(pixels).tolist() == [[0, 1, 0]]
+        assert np.count_nonzero(cube.index != cube.unknown) == 2
+        # Known colors are served from the cube
+        cube.index[closest_palette.pack_colors(pixels[:, :1])] = 1
+        assert cube.lookup(pixels[:, :1]).tolist() == [[1]]
+
+    @pytest.mark.parametrize("n", [closest_palette.SEARCH_COLORS, closest_palette.SEARCH_COLORS + 1])
+    def test_new_colors_searched_or_deduplicated(self, n):
+        # Up to SEARCH_COLORS new colors are searched as they come, duplicates
+        # and all; more are deduplicated first
+        rng = np.random.default_rng(3)
+        pixels = rng.integers(0, 32, (1, n, 3), dtype=np.uint8)
+        palette = closest_palette.parse_palette("#000,#fff,#101010,#0f0,#1f1f00")
+        cube = closest_palette.PaletteCube(palette)
+        assert np.array_equal(cube.snap(pixels), self._brute_force(pixels, palette))
+        assert np.count_nonzero(cube.index != cube.unknown) == len(np.unique(pixels.reshape(-1, 3), axis=0))
+
+    def test_cube_is_shared_per_palette(self):
+        palette = closest_palette.parse_palette("#000,#fff,#f00")
+        cube = closest_palette.palette_cube(palette)
+        assert closest_palette.palette_cube(palette.copy()) is cube
+        assert closest_palette.palette_cube(palette[:2]) is not cube
+
+    @pytest.mark.parametrize("metric", ["lab", "oklab"])
+    def test_perceptual_matches_brute_force(self, metric):
+        rng = np.random.default_rng(2)
+        pixels = rng.integers(0, 256, (40, 50, 3), dtype=np.uint8)
+        palette = closest_palette.parse_palette("#000,#fff,#d03020,#20a040,#2040c0,#f0d020,#808080")
+        convert = closest_palette.COLOR_SPACES[metric]
+        dists = ((convert(pixels.reshape(-1, 3))[:, None] - convert(palette)[None]) ** 2).sum(axis=2)
+        expected = palette[np.argmin(dists, axis=1)].reshape(pixels.shape)
+        assert np.array_equal(closest_palette.snap_to_palette(pixels, palette, metric), expected)
+
+    def test_color_spaces(self):
+        colors = np.array([[255, 255, 255], [255, 0, 0]], dtype=np.uint8)
+        assert np.allclose(closest_palette.lab_coordinates(colors), [[100, 0, 0], [53.241, 80.092, 67.203]], atol=1e-3)
+        assert np.allclose(closest_palette.oklab_coordinates(colors), [[1, 0, 0], [0.62796, 0.22486, 0.12585]], atol=1e-4)
+
+    def test_metric_changes_the_match(self):
+        # A purple closer to the grey in RGB, but perceptually closer to the blue
+        palette = closest_palette.parse_palette("#808080,#0000ff")
+        pixel = np.array([[[115, 16, 153]]], dtype=np.uint8)
+        assert closest_palette.snap_to_palette(pixel, palette)[0, 0].tolist() == [128, 128, 128]
+        for metric in ("lab", "oklab"):
+            assert closest_palette.snap_to_palette(pixel, palette, metric)[0, 0].tolist() == [0, 0, 255]
+
+    def test_cube_is_per_metric(self):
+        palette = closest_palette.parse_palette("#000,#fff,#f00")
+        assert closest_palette.palette_cube(palette, "lab") is closest_palette.palette_cube(palette, "lab")
+        assert closest_palette.palette_cube(palette, "lab") is not closest_palette.palette_cube(palette)
+
+    def test_dither_uses_the_cube(self):
+        palette = closest_palette.parse_palette("#000,#fff,#d03020,#2040c0")
+        pixels = np.random.default_rng(3).integers(0, 256, (20, 30, 3), dtype=np.uint8)
+        out = get_effect("closest-palette")(pixels, palette="#000,#fff,#d03020,#2040c0", dither="floyd-steinberg")
+        cube = closest_palette.palette_cube(palette)
+        assert np.array_equal(out, diffuse(pixels, cube.snap, "floyd-steinberg"))
+        assert np.array_equal(cube.snap(out), out)
+
+    @pytest.mark.parametrize("metric", ["rgb", "lab", "oklab"])
+    def test_fill_matches_search(self, metric):
+        palette = closest_palette.parse_palette("#000,#fff,#d03020,#20a040,#2040c0,#d03020,#808080")
+        cube = closest_palette.PaletteCube(palette, metric)
+        cube.fill()
+        assert cube.full and not np.any(cube.index == cube.unknown)
+        codes = np.random.default_rng(4).integers(0, closest_palette.CUBE_SIZE, 100000).astype("<u4")
+        colors = closest_palette.unpack_colors(codes)
+        assert np.array_equal(cube.index[codes], closest_palette.nearest_colors(colors, palette, metric))
+
+    @pytest.mark.parametrize("metric", ["rgb", "lab", "oklab"])
+    def test_box_bounds(self, metric):
+        rng = np.random.default_rng(5)
+        low = rng.integers(0, 200, (50, 3), dtype=np.uint8)
+        high = low + rng.integers(0, 56, (50, 3), dtype=np.uint8)
+        inside = (low + rng.random((20, 50, 3)) * (high - low + 1)).astype(np.uint8)
+        lower, upper = closest_palette.box_bounds(low, high, metric)
+        coordinates = closest_palette.COLOR_SPACES[metric](inside.reshape(-1, 3)).reshape(inside.shape)
+        assert np.all(coordinates >= lower - 1e-9) and np.all(coordinates <= upper + 1e-9)
+
+    def test_large_diffusion_fills_the_cube(self, monkeypatch):
+        palette = closest_palette.parse_palette("#000,#fff,#d03020,#2040c0,#f0d020")
+        pixels = np.random.default_rng(6).integers(0, 256, (20, 30, 3), dtype=np.uint8)
+        expected = diffuse(pixels, closest_palette.PaletteCube(palette).snap, "floyd-steinberg")
+        monkeypatch.setattr(closest_palette, "FILL_PIXELS", 600)
+        out = get_effect("closest-palette")(pixels, palette="#000,#fff,#d03020,#2040c0,#f0d020", dither="floyd-steinberg")
+        assert closest_palette.palette_cube(palette).full
+        assert np.array_equal(out, expected)
+
+    def test_filled_cube_stored_on_disk(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("OPIMG_CACHE_DIR", str(tmp_path / "cache"))
+        palette = closest_palette.parse_palette("#000,#fff,#d03020,#2040c0")
+        cube = closest_palette.PaletteCube(palette, "oklab")
+        assert not cube.restore()
+        cube.fill()
+        assert len(list((tmp_path / "cache" / "cubes").rglob("*"))) == 2  # one entry and its directory
+
+        # A new process starts from the stored cube without searching
+        monkeypatch.setattr(closest_palette.PaletteCube, "_fill_blocks", None)
+        monkeypatch.setattr(closest_palette, "nearest_colors", None)
+        closest_palette._cube.cache_clear()
+        stored = closest_palette.palette_cube(palette, "oklab")
+        assert stored.full and np.array_equal(stored.index, cube.index)
+        pixels = np.random.default_rng(7).integers(0, 256, (10, 10, 3), dtype=np.uint8)
+        assert np.array_equal(stored.snap(pixels), cube.snap(pixels))
+        # Other metrics have cubes of their own
+        assert not closest_palette.PaletteCube(palette).restore()
+        closest_palette._cube.cache_clear()
+
+    def test_palette_spread(self):
+        assert closest_palette.palette_spread(closest_palette.parse_palette("#000,#fff")) == 255
+        assert closest_palette.palette_spread(closest_palette.parse_palette("#000,#000")) == 255
+        assert closest_palette.palette_spread(closest_palette.parse_palette("#000,#404040,#808080,#fff")) == 64
+
+    def test_pack_round_trip(self):
+        colors = np.array([[1, 2, 3], [255, 0, 128]], dtype=np.uint8)
+        codes = closest_palette.pack_colors(colors)
+        assert codes.tolist() == [1 | 2 << 8 | 3 << 16, 255 | 128 << 16]
+        assert np.array_equal(closest_palette.unpack_colors(codes), colors)
+
+
+class TestReferencePalette:
+    @pytest.fixture
+    def reference(self, tmp_path):
+        rng = np.random.default_rng(0)
+        colors = np.array([[200, 30, 30], [20, 160, 60], [30, 60, 200]], dtype=np.uint8)
+        pixels = colors[rng.integers(0, 3, (60, 80))] + rng.integers(0, 8, (60, 80, 3), dtype=np.uint8)
+        path = str(tmp_path / "ref.png")
+        save_image(pixels, path)
+        return path, colors
+
+    def test_finds_dominant_colors(self, reference):
+        path, colors = reference
+        palette = closest_palette.reference_palette(path, 3, seed=1)
+        found = palette[np.lexsort(palette.T[::-1])].astype(int)
+        assert np.abs(found - colors[np.lexsort(colors.T[::-1])]).max() <= 8
+
+    def test_seed_is_reproducible(self, reference):
+        pixels = load_image(reference[0])
+        first = closest_palette.extract_palette_kmeans(pixels, 5, seed=3)
+        assert np.array_equal(closest_palette.extract_palette_kmeans(pixels, 5, seed=3), first)
+
+    def test_fewer_colors_than_clusters(self):
+        pixels = np.full((10, 10, 3), 7, dtype=np.uint8)
+        assert closest_palette.extract_palette_kmeans(pixels, 4, seed=0).tolist() == [[7, 7, 7]] * 4
+
+    def test_cached_on_disk(self, reference, tmp_path, monkeypatch):
+        path, _ = reference
+        monkeypatch.setenv("OPIMG_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr(closest_palette, "_palettes", {})
+        palette = closest_palette.reference_palette(path, 3, seed=1)
+        assert len(list((tmp_path / "cache" / "palettes").rglob("*"))) == 2  # one entry and its directory
+
+        # A new process finds the palette without running k-means again
+        monkeypatch.setattr(closest_palette, "_palettes", {})
+        monkeypatch.setattr(closest_palette, "extract_palette_kmeans", None)
+        assert np.array_equal(closest_palette.reference_palette(path, 3, seed=1), palette)
+
+    def test_cache_follows_contents(self, reference, tmp_path, monkeypatch):
+        path, _ = reference
+        monkeypatch.setattr(closest_palette, "_palettes", {})
+        closest_palette.reference_palette(path, 3, seed=1)
+        save_image(np.full((8, 8, 3), 90, dtype=np.uint8), path)
+        assert closest_palette.reference_palette(path, 3, seed=1).tolist() == [[90, 90, 90]] * 3
@@ -0,0 +1,133 @@
+"""Tests for the dithering shared by closest-palette, bit-crush and posterize-hsv."""
+
+import functools
+
+import numpy as np
+import pytest
+
+from opimg import dither
+from opimg.dither import (
+    KERNELS,
+    PATTERNS,
+    bayer_matrix,
+    diffuse,
+    diffusion_memory,
+    ordered,
+    quantize_dithered,
+    threshold_map,
+    tile_thresholds,
+    void_and_cluster,
+    wavefront_slope,
+)
+from opimg.effects.bit_crush import level_table
+
+
+def _sequential(pixels, quantize, kernel):
+    """Textbook raster-order error diffusion, one pixel at a time."""
+    h, w = pixels.shape[:2]
+    pending = pixels.reshape(h, w, -1).astype(np.float64)
+    out = np.empty(pending.shape, dtype=np.uint8)
+    for y in range(h):
+        for x in range(w):
+            value = np.clip(pending[y, x], 0, 255)
+            out[y, x] = quantize(np.rint(value).astype(np.uint8)[None])[0]
+            for dy, dx, weight in KERNELS[kernel]:
+                if y + dy < h and 0 <= x + dx < w:
+                    pending[y + dy, x + dx] += (value - out[y, x]) * weight
+    return out.reshape(pixels.shape)
+
+
+_one_bit = functools.partial(np.take, level_table(2))
+
+
+class TestDiffuse:
+    @pytest.mark.parametrize("kernel", sorted(KERNELS))
+    @pytest.mark.parametrize("shape", [(23, 31, 3), (40, 3, 3), (2, 50), (30, 2), (1, 1, 3)])
+    def test_matches_sequential(self, kernel, shape):
+        pixels = np.random.default_rng(0).integers(0, 256, shape, dtype=np.uint8)
+        assert np.array_equal(diffuse(pixels, _one_bit, kernel), _sequential(pixels, _one_bit, kernel))
+
+    def test_any_quantizer(self):
+        palette = np.array([[0, 0, 0], [255, 255, 255], [200, 40, 40]], dtype=np.uint8)
+
+        def nearest(colors):
+            dists = ((colors[:, None].astype(int) - palette[None]) ** 2).sum(axis=2)
+            return palette[np.argmin(dists, axis=1)]
+
+        pixels = np.random.default_rng(1).integers(0, 256, (20, 25, 3), dtype=np.uint8)
+        out = diffuse(pixels, nearest, "floyd-steinberg")
+        assert np.array_equal(out, _sequential(pixels, nearest, "floyd-steinberg"))
+        assert {tuple(c) for c in out.reshape(-1, 3)} <= {tuple(c) for c in palette}
+
+    @pytest.mark.parametrize("kernel", ["floyd-steinberg", "jarvis"])
+    def test_keeps_average_tone(self, kernel):
+        grey = np.full((64, 64), 64, dtype=np.uint8)
+        out = diffuse(grey, _one_bit, kernel)
+        assert set(np.unique(out)) == {0, 255}
+        # Error spread past the edges is lost
+        assert abs(out.mean() - 64) < 3
+
+    def test_slope(self):
+        assert wavefront_slope(KERNELS["floyd-steinberg"]) == 2
+        assert wavefront_slope(KERNELS["atkinson"]) == 2
+        assert wavefront_slope(KERNELS["jarvis"]) == 3
+
+    def test_memory_is_mostly_the_result(self):
+        assert diffusion_memory(8000, 6000, 3, "jarvis") < 2 * 8000 * 6000 * 3
+
+
+class TestOrdered:
+    def test_bayer_matrix(self):
+        assert bayer_matrix(2).tolist() == [[0, 2], [3, 1]]
+        assert sorted(bayer_matrix(8).ravel()) == list(range(64))
+
+    def test_void_and_cluster_ranks(self):
+        ranks = void_and_cluster(16, 1.5)
+        assert sorted(ranks.ravel()) == list(range(256))
+        assert np.array_equal(ranks, void_and_cluster(16, 1.5))
+        # The darkest eighth is spread out: no two of its pixels touch, even across the wrap
+        on = ranks < 32
+        for dy, dx in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+            assert not (on & np.roll(on, (dy, dx), axis=(0, 1))).any()
+
+    @pytest.mark.parametrize("pattern", PATTERNS)
+    def test_thresholds_tile(self, pattern):
+        thresholds = threshold_map(pattern)
+        n = len(thresholds)
+        assert 0 < thresholds.min() < thresholds.max() < 1
+        tiled = tile_thresholds(pattern, 2 * n + 1, 2 * n + 1)
+        assert tiled.shape == (2 * n + 1, 2 * n + 1)
+        assert np.array_equal(tiled[n:2 * n, n:2 * n], thresholds)
+        assert np.array_equal(tiled[2 * n, :n], thresholds[0])
+
+    @pytest.mark.parametrize("pattern", ["bayer-8", "blue-noise"])
+    @pytest.mark.parametrize("tone", [16, 64, 128, 200])
+    def test_keeps_average_tone(self, pattern, tone):
+        grey = np.full((128, 128), tone, dtype=np.uint8)
+        out = ordered(grey, _one_bit, pattern, 255)
+        assert set(np.unique(out)) <= {0, 255}
+        assert abs(out.mean() - tone) < 2
+
+    def test_bands_match_one_pass(self, monkeypatch):
+        pixels = np.random.default_rng(2).integers(0, 256, (50, 40, 3), dtype=np.uint8)
+        expected = ordered(pixels, _one_bit, "bayer-4", 255)
+        monkeypatch.setattr(dither, "BAND_PIXELS", 40 * 8)
+        assert np.array_equal(ordered(pixels, _one_bit, "bayer-4", 255), expected)
+
+    def test_blue_noise_cached_on_disk(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("OPIMG_CACHE_DIR", str(tmp_path))
+        dither.blue_noise.cache_clear()
+        try:
+            ranks = dither.blue_noise()
+            assert (tmp_path / "textures").is_dir()
+            dither.blue_noise.cache_clear()
+            monkeypatch.setattr(dither, "void_and_cluster", None)
+            assert np.array_equal(dither.blue_noise(), ranks)
+        finally:
+            dither.blue_noise.cache_clear()
+
+    def test_dispatch(self):
+        pixels = np.random.default_rng(4).integers(0, 256, (10, 12), dtype=np.uint8)
+        assert np.array_equal(quantize_dithered(pixels, _one_bit, "none", 255), _one_bit(pixels))
+        assert np.array_equal(quantize_dithered(pixels, _one_bit, "atkinson", 255), diffuse(pixels, _one_bit, "atkinson"))
+        assert np.array_equal(quantize_dithered(pixels, _one_bit, "bayer-2", 255), ordered(pixels, _one_bit, "bayer-2", 255))
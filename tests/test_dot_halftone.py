@@ -1,6 +1,14 @@
 """Tests for dot-halftone tool."""
 
+import math
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFilter
+
 from conftest import assert_valid_image
+from opimg.effects.dot_halftone import ellipse_spans
+from opimg.registry import get_effect
 
 
 class TestDotHalftone:
@@ -29,6 +37,14 @@ class TestDotHalftone:
         result = assert_valid_image(out)
         assert result.mode == "RGBA"
 
+    def test_supersample(self, run_tool, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        out = str(tmp_path / "smooth.png")
+        r = run_tool("dot-halftone", "dot-halftone.py", [img, out, "--supersample", "4"])
+        assert r.returncode == 0, r.stderr
+        alpha = np.array(assert_valid_image(out))[..., 3]
+        assert ((alpha > 0) & (alpha < 255)).any()
+
     def test_missing_input(self, run_tool):
         r = run_tool("dot-halftone", "dot-halftone.py", ["/nonexistent/image.png"])
         assert r.returncode != 0
@@ -36,3 +52,75 @@ class TestDotHalftone:
     def test_no_args(self, run_tool):
         r = run_tool("dot-halftone", "dot-halftone.py", [])
         assert r.returncode != 0
+
+
+def _drawn(gray, spacing, max_dot, angle):
+    """The per-dot ``ImageDraw.ellipse`` rendering the rasterizer reproduces."""
+    img = Image.fromarray(gray).filter(ImageFilter.GaussianBlur(radius=max(1, spacing // 4)))
+    w, h = img.size
+    pixels = img.load()
+    out = Image.new("RGBA", (w, h), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(out)
+    cos_a, sin_a = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    limit = int(math.hypot(w, h) / spacing) + 1
+    for gi in range(-limit, limit + 1):
+        for gj in range(-limit, limit + 1):
+            ix = cos_a * gi * spacing - sin_a * gj * spacing + w / 2.0
+            iy = sin_a * gi * spacing + cos_a * gj * spacing + h / 2.0
+            xi, yi = int(round(ix)), int(round(iy))
+            if 0 <= xi < w and 0 <= yi < h:
+                radius = (1.0 - pixels[xi, yi] / 255.0) * max_dot
+                if radius > 0:
+                    draw.ellipse([ix - radius, iy - radius, ix + radius, iy + radius], fill=(208, 101, 33, 255))
+    return np.array(out)
+
+
+class TestRasterizer:
+    @pytest.fixture
+    def gray(self):
+        y, x = np.mgrid[:90, :120]
+        return (x * 2 + y).astype(np.uint8) ^ np.random.default_rng(0).integers(0, 64, (90, 120), dtype=np.uint8)
+
+    @pytest.mark.parametrize("spacing, max_dot, angle", [
+        (8, 4.0, 0), (8, 9.0, 0), (20, 25.0, 0), (3, 0.6, 5),
+        (6, 3.0, 15), (10, 8.0, 45), (4, 2.0, 30), (7, 12.7, -71.3),
+    ])
+    def test_matches_drawn_dots(self, gray, spacing, max_dot, angle):
+        out = get_effect("dot-halftone")(gray, spacing=spacing, max_dot=max_dot, angle=angle)
+        assert np.array_equal(out, _drawn(gray, spacing, max_dot, angle))
+
+    def test_ellipse_spans(self):
+        canvas = Image.new("L", (10, 7))
+        ImageDraw.Draw(canvas).ellipse([2, 1, 9, 6], fill=255)
+        filled = np.asarray(canvas)[1:7, 2:10] > 0
+        spans = ellipse_spans(7, 5)
+        columns = np.arange(8)
+        assert np.array_equal(filled, (columns >= spans[:, :1]) & (columns <= spans[:, 1:]))
+
+    @pytest.mark.parametrize("spacing, max_dot, angle", [(8, 4.0, 0), (8, 9.0, 0), (6, 3.0, 15), (10, 8.0, 45)])
+    def test_supersampled_ellipses_close_to_drawn_dots(self, gray, spacing, max_dot, angle):
+        # Supersampling tests samples against the ellipse inscribed in each
+        # box, so its coverage only approximates Pillow's filled pixels: it
+        # differs along dot edges and inks about 1.5% less overall
+        smooth = get_effect("dot-halftone")(gray, spacing=spacing, max_dot=max_dot, angle=angle, supersample=16)
+        drawn = _drawn(gray, spacing, max_dot, angle)[..., 3] > 0
+        coverage = smooth[..., 3] / 255
+        assert np.mean(np.abs(coverage - drawn)) < 0.08
+        assert abs(coverage.mean() - drawn.mean()) < 0.02
+
+    def test_supersample(self, gray):
+        effect = get_effect("dot-halftone")
+        hard = effect(gray, spacing=8)
+        smooth = effect(gray, spacing=8, supersample=4)
+        edges = (smooth[..., 3] > 0) & (smooth[..., 3] < 255)
+        assert edges.any()
+        assert np.all(smooth[smooth[..., 3] > 0, :3] == (208, 101, 33))
+        assert abs(smooth[..., 3].mean() - hard[..., 3].mean()) < 0.05 * 255
+
+    def test_no_dots(self):
+        out = get_effect("dot-halftone")(np.full((20, 30), 255, dtype=np.uint8), spacing=8)
+        assert not out.any()
+
+    def test_bad_supersample(self):
+        with pytest.raises(ValueError, match="--supersample"):
+            get_effect("dot-halftone")(np.zeros((10, 10), dtype=np.uint8), supersample=0)
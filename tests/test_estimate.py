@@ -0,0 +1,203 @@
+"""Tests for peak-memory models, `op --estimate` and `--max-memory`."""
+
+import json
+import os
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from opimg.effects import closest_palette
+from opimg.io import to_mode
+from opimg.memory import check_limit, estimate, format_bytes
+from opimg.registry import get_effect, list_effects
+
+# Arguments an effect cannot run without, or that keep it quick at test size
+ARGS = {
+    "closest-palette": {"palette": "#000000,#ffffff,#d03020,#20a040,#2040c0,#f0d020"},
+    "seam-carve": {"percent": 5},
+    "slit-scan": {"slits": 16},
+    "stipple": {"dots": 2000, "seed": 1},
+}
+
+
+@pytest.fixture(scope="module")
+def photo():
+    h, w = 150, 200
+    y, x = np.mgrid[:h, :w]
+    pixels = np.stack([x * 255 // w, y * 255 // h, 128 + 127 * np.sin(x * 0.05) * np.cos(y * 0.03)], axis=-1)
+    return pixels.astype(np.uint8) ^ np.random.default_rng(0).integers(0, 24, (h, w, 3), dtype=np.uint8)
+
+
+def _traced_peak(effect, pixels, params):
+    effect(pixels, **params)  # warm up lazy imports and caches
+    tracemalloc.start()
+    try:
+        effect(pixels, **params)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+class TestModels:
+    @pytest.mark.parametrize("name", list_effects())
+    def test_model_covers_traced_peak(self, name, photo):
+        effect = get_effect(name)
+        pixels = to_mode(photo, effect.mode)
+        params = ARGS.get(name, {})
+        h, w = photo.shape[:2]
+        # NumPy's fixed-size iteration buffers (under 128 KiB) are not modelled
+        assert effect.peak_memory(w, h, params) + (128 << 10) >= _traced_peak(effect, pixels, params)
+
+    @pytest.mark.parametrize("name, params", [
+        ("bit-crush", {"bits": 1, "dither": "jarvis"}),
+        ("bit-crush", {"bits": 2, "dither": "bayer-8"}),
+        ("closest-palette", {**ARGS["closest-palette"], "dither": "floyd-steinberg", "metric": "oklab"}),
+        ("closest-palette", {**ARGS["closest-palette"], "dither": "blue-noise"}),
+        ("posterize-hsv", {"dither": "blue-noise"}),
+    ])
+    def test_dither_models_cover_traced_peak(self, name, params, photo):
+        effect = get_effect(name)
+        h, w = photo.shape[:2]
+        assert effect.peak_memory(w, h, params) + (128 << 10) >= _traced_peak(effect, photo, params)
+
+    @pytest.mark.parametrize("params", [
+        {},
+        {"offset": 7, "byte_offset": 1},
+        {"width": 10},
+        {"width": 48, "bpp": 4},
+        {"bpp": 1},
+    ])
+    def test_wrong_stride_model_covers_traced_peak(self, params):
+        # Large enough that the unrolled buffer dwarfs the untracked slack
+        effect = get_effect("wrong-stride")
+        pixels = np.random.default_rng(1).integers(0, 256, (600, 800, 3), dtype=np.uint8)
+        params = {"offset": 1, "byte_offset": 0, "width": None, "bpp": 3, **params}
+        assert effect.peak_memory(800, 600, params) + (128 << 10) >= _traced_peak(effect, pixels, params)
+
+    def test_cube_fill_is_modelled(self, photo, monkeypatch):
+        monkeypatch.setattr(closest_palette, "FILL_PIXELS", 1)
+        effect = get_effect("closest-palette")
+        params = {**ARGS["closest-palette"], "dither": "jarvis", "metric": "lab"}
+        h, w = photo.shape[:2]
+        effect(photo, **params)
+        # A cold cube, so the traced run fills it
+        closest_palette._cube.cache_clear()
+        tracemalloc.start()
+        try:
+            effect(photo, **params)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        assert effect.peak_memory(w, h, params) + (128 << 10) >= peak
+
+    def test_default_model_is_one_result(self):
+        assert get_effect("channel-swap").peak_memory(100, 50, {}) == 100 * 50 * 3
+
+    def test_params_are_modelled(self):
+        echo = get_effect("echo")
+        assert echo.peak_memory(100, 100, {"blend": "multiply"}) > echo.peak_memory(100, 100, {})
+        isolate = get_effect("isolate-threshold")
+        assert isolate.peak_memory(100, 100, {"scale": 4}) > 4 * isolate.peak_memory(100, 100, {})
+
+    def test_closest_palette_is_chunked(self):
+        effect = get_effect("closest-palette")
+        params = {"palette": ARGS["closest-palette"]["palette"]}
+        small = effect.peak_memory(1000, 1000, params)
+        large = effect.peak_memory(8000, 6000, params)
+        # Past one chunk of the search, only the per-pixel arrays grow with the image
+        assert large - small == (48 - 1) * 1_000_000 * (14 + 32)
+
+
+class TestSnapChunks:
+    def test_chunks_match_single_pass(self, photo, monkeypatch):
+        palette = closest_palette.parse_palette("#000,#fff,#f00,#0f0,#00f")
+        flat = photo.reshape(-1, 3).astype(np.float64)
+        dists = np.linalg.norm(flat[:, None] - palette[None, :].astype(np.float64), axis=2)
+        expected = palette[np.argmin(dists, axis=1)].reshape(photo.shape)
+
+        monkeypatch.setattr(closest_palette, "CHUNK_BYTES", 1000 * closest_palette._snap_bytes_per_pixel(5))
+        assert closest_palette.chunk_pixels(5) == 1000
+        assert np.array_equal(closest_palette.snap_to_palette(photo, palette), expected)
+
+
+class TestEstimate:
+    def test_phases(self):
+        report = estimate(get_effect("thermal"), {}, 400, 300, "RGB")
+        n = 400 * 300
+        assert report["phases"] == {"decode": n * (4 + 1 + 2), "kernel": n * (1 + 3), "encode": n * (1 + 8)}
+        assert report["peak_bytes"] == n * 9
+        assert report["total_bytes"] == report["peak_bytes"] + report["baseline_bytes"]
+        assert report["baseline_bytes"] > 0
+
+    def test_limit(self):
+        report = estimate(get_effect("kaleidoscope"), {}, 8000, 6000)
+        check_limit(report, report["total_bytes"])
+        with pytest.raises(ValueError, match="over --max-memory 1.0 GiB"):
+            check_limit(report, 1 << 30)
+
+    def test_format_bytes(self):
+        assert format_bytes(512) == "512 B"
+        assert format_bytes(1536 << 10) == "1.5 MiB"
+        assert format_bytes(3 << 40) == "3.0 TiB"
+
+
+class TestEstimateCli:
+    def test_text(self, run_op, tmp_workdir):
+        _, img = tmp_workdir
+        r = run_op(["--estimate", "echo", img, "--blend", "multiply"])
+        assert r.returncode == 0, r.stderr
+        assert r.stdout.startswith(f"estimate: echo {img} (64x64, 0.00 MP, RGB)")
+        for phase in ("decode", "kernel", "encode", "process", "total"):
+            assert phase in r.stdout
+
+    def test_json_from_size(self, run_op):
+        r = run_op(["--estimate", "closest-palette", "--dimensions", "8000x6000", "--palette", "#000,#fff", "--json"])
+        assert r.returncode == 0, r.stderr
+        report = json.loads(r.stdout)
+        assert (report["width"], report["height"]) == (8000, 6000)
+        assert report["peak_bytes"] == max(report["phases"].values())
+
+    @pytest.mark.parametrize("name", list_effects())
+    def test_every_patch(self, name, run_op, tmp_workdir):
+        # Each patch's own flags are parsed next to --estimate's
+        _, img = tmp_workdir
+        flags = {p.name: p.flag for p in get_effect(name).params}
+        args = [arg for key, value in ARGS.get(name, {}).items() for arg in (flags[key], str(value))]
+        r = run_op(["--estimate", name, img, "--json", *args])
+        assert r.returncode == 0, r.stderr
+        assert json.loads(r.stdout)["peak_bytes"] > 0
+
+    def test_matches_in_process_model(self, run_op, tmp_workdir):
+        _, img = tmp_workdir
+        report = json.loads(run_op(["--estimate", "polar", img, "--json"]).stdout)
+        assert report["phases"] == estimate(get_effect("polar"), {}, 64, 64)["phases"]
+
+    @pytest.mark.parametrize("args", [[], ["input.png", "--dimensions", "10x10"], ["--dimensions", "10"]])
+    def test_bad_usage(self, run_op, tmp_workdir, args):
+        tmp_path, _ = tmp_workdir
+        r = run_op(["--estimate", "echo", *args], cwd=tmp_path)
+        assert r.returncode != 0
+
+    def test_unknown_patch(self, run_op, tmp_workdir):
+        _, img = tmp_workdir
+        r = run_op(["--estimate", "nope", img])
+        assert r.returncode == 1
+        assert "unknown patch" in r.stderr
+
+
+class TestMaxMemory:
+    def test_refuses_before_rendering(self, run_op, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        out = tmp_path / "out.png"
+        r = run_op(["kaleidoscope", img, str(out), "--max-memory", "1M"])
+        assert r.returncode != 0
+        assert "over --max-memory" in r.stderr
+        assert not os.path.exists(out)
+
+    def test_within_limit(self, run_op, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        out = tmp_path / "out.png"
+        r = run_op(["kaleidoscope", img, str(out), "--max-memory", "4G"])
+        assert r.returncode == 0, r.stderr
+        assert os.path.exists(out)
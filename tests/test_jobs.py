@@ -0,0 +1,141 @@
+"""Tests for `op run-jobs`."""
+
+import json
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from conftest import assert_valid_image
+from opimg import jobs
+
+
+def _manifest(tmp_path, entries):
+    path = tmp_path / "jobs.jsonl"
+    path.write_text("".join((e if isinstance(e, str) else json.dumps(e)) + "\n" for e in entries))
+    return path
+
+
+def _records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class TestParseJob:
+    def test_mapping_args_are_coerced(self):
+        job = jobs.parse_job(1, {"patch": "echo", "input": "a.png", "args": {"offset-x": "5", "count": 2}})
+        assert job["params"]["offset_x"] == 5
+        assert job["params"]["count"] == 2
+        assert job["output"] == "a-echo.png"
+
+    def test_list_args_are_parsed(self):
+        job = jobs.parse_job(1, {"patch": "echo", "input": "a.png", "args": ["--count", "4"]})
+        assert job["params"]["count"] == 4
+
+    @pytest.mark.parametrize("entry", [
+        {"input": "a.png"},
+        {"patch": "nonexistent", "input": "a.png"},
+        {"patch": "echo", "input": "a.png", "args": {"bogus": 1}},
+        {"patch": "echo", "input": "a.png", "args": {"blend": "nope"}},
+        {"patch": "echo", "input": "a.png", "args": ["--bogus"]},
+        ["echo", "a.png"],
+    ])
+    def test_invalid(self, entry):
+        with pytest.raises(ValueError):
+            jobs.parse_job(1, entry)
+
+    def test_id_is_stable(self):
+        entry = {"patch": "echo", "input": "a.png"}
+        assert jobs.job_id(entry) == jobs.job_id(dict(reversed(entry.items())))
+        assert jobs.job_id({**entry, "id": "mine"}) == "mine"
+
+
+class TestRunJobs:
+    def test_runs_and_records(self, run_op, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        manifest = _manifest(tmp_path, [
+            {"patch": "echo", "input": img, "output": str(tmp_path / "out" / "a.png"), "args": {"count": 2}},
+            {"id": "t", "patch": "thermal", "input": img},
+        ])
+        r = run_op(["run-jobs", str(manifest), "--jobs", "2"])
+        assert r.returncode == 0, r.stderr
+        assert "2/2 jobs" in r.stderr
+        assert_valid_image(str(tmp_path / "out" / "a.png"))
+        assert_valid_image(str(tmp_path / "input-thermal.png"))
+
+        records = {rec["line"]: rec for rec in _records(tmp_path / "jobs.results.jsonl")}
+        assert records[1]["status"] == "ok"
+        assert records[1]["output_bytes"] == (tmp_path / "out" / "a.png").stat().st_size
+        assert records[2]["id"] == "t"
+        assert records[2]["seconds"] >= 0
+
+    def test_matches_single_run(self, run_op, run_tool, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        manifest = _manifest(tmp_path, [
+            {"patch": "pixel-sort", "input": img, "output": str(tmp_path / "job.png"), "args": ["--by", "hue"]},
+        ])
+        run_op(["run-jobs", str(manifest), "--jobs", "1"])
+        single = str(tmp_path / "single.png")
+        run_tool("pixel-sort", "pixel-sort.py", [img, single, "--by", "hue"])
+        assert np.array_equal(np.array(Image.open(tmp_path / "job.png")), np.array(Image.open(single)))
+
+    def test_failures_are_recorded_and_retried(self, run_op, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        manifest = _manifest(tmp_path, [
+            {"patch": "echo", "input": img},
+            {"patch": "echo", "input": str(tmp_path / "missing.png")},
+            {"patch": "nonexistent", "input": img},
+            "not json",
+        ])
+        results = tmp_path / "status.jsonl"
+        r = run_op(["run-jobs", str(manifest), "--results", str(results)])
+        assert r.returncode != 0
+        assert "1/4 jobs" in r.stderr and "3 failed" in r.stderr
+        statuses = sorted(rec["status"] for rec in _records(results))
+        assert statuses == ["error", "error", "error", "ok"]
+
+        # The ok job is skipped; the failures run again
+        r = run_op(["run-jobs", str(manifest), "--results", str(results)])
+        assert "1 skipped" in r.stderr
+        assert "3 failed" in r.stderr
+
+    def test_resume_skips_completed(self, run_op, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        manifest = _manifest(tmp_path, [{"patch": "echo", "input": img}])
+        run_op(["run-jobs", str(manifest)])
+        out = tmp_path / "input-echo.png"
+        mtime = out.stat().st_mtime_ns
+
+        r = run_op(["run-jobs", str(manifest)])
+        assert r.returncode == 0, r.stderr
+        assert "1 skipped" in r.stderr
+        assert out.stat().st_mtime_ns == mtime
+
+        # A deleted output is rendered again
+        out.unlink()
+        r = run_op(["run-jobs", str(manifest)])
+        assert "1/1 jobs" in r.stderr
+        assert_valid_image(str(out))
+
+    def test_max_memory_is_a_job_error(self, run_op, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        out = tmp_path / "big.png"
+        manifest = _manifest(tmp_path, [{"patch": "kaleidoscope", "input": img, "output": str(out)}])
+        r = run_op(["run-jobs", str(manifest), "--max-memory", "1K"])
+        assert r.returncode != 0
+        assert "1 failed" in r.stderr
+        (record,) = _records(tmp_path / "jobs.results.jsonl")
+        assert record["status"] == "error"
+        assert "over --max-memory" in record["error"]
+        assert not out.exists()
+
+    def test_truncated_results_line_is_ignored(self, tmp_path):
+        results = tmp_path / "r.jsonl"
+        out = tmp_path / "out.png"
+        out.write_bytes(b"x")
+        results.write_text(json.dumps({"id": "a", "status": "ok", "output": str(out)}) + '\n{"id": "b", "sta')
+        assert jobs.completed_ids(str(results)) == {"a"}
+
+    def test_missing_manifest(self, run_op, tmp_path):
+        r = run_op(["run-jobs", str(tmp_path / "nope.jsonl")])
+        assert r.returncode != 0
+        assert "not found" in r.stderr
@@ -0,0 +1,101 @@
+"""Tests for the in-process opimg effect library."""
+
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import opimg
+
+from conftest import ROOT
+from test_op_cli import ALL_PATCHES
+
+
+
+@pytest.fixture
+def pixels(tmp_workdir):
+    _, img = tmp_workdir
+    return np.array(Image.open(img).convert("RGB"))
+
+
+class TestRegistry:
+    def test_lists_every_patch(self):
+        assert opimg.list_effects() == sorted(ALL_PATCHES)
+
+    def test_listing_is_lazy(self):
+        code = "import sys, opimg; opimg.list_effects(); print('numpy' in sys.modules)"
+        r = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT)
+        assert r.stdout.strip() == "False"
+
+    def test_schema(self):
+        effect = opimg.get_effect("kaleidoscope")
+        assert effect.name == "kaleidoscope"
+        assert [p.name for p in effect.params] == ["segments", "angle"]
+
+    def test_unknown_patch(self):
+        with pytest.raises(KeyError):
+            opimg.get_effect("nonexistent")
+
+    def test_unknown_parameter(self, pixels):
+        with pytest.raises(TypeError):
+            opimg.apply("thermal", pixels, bogus=1)
+
+
+class TestApply:
+    @pytest.mark.parametrize("name", ALL_PATCHES)
+    def test_every_effect_returns_uint8(self, name, pixels):
+        params = {"palette": "#000,#fff"} if name == "closest-palette" else {}
+        if name == "stipple":
+            params["dots"] = 500
+        out = opimg.apply(name, pixels, **params)
+        assert out.dtype == np.uint8
+        assert out.shape[0] == pixels.shape[0]
+
+    def test_defaults_match_schema(self, pixels):
+        effect = opimg.get_effect("scan-glitch")
+        assert effect.defaults() == {"severity": 8, "seed": None}
+        a = opimg.apply("scan-glitch", pixels, seed=5)
+        b = opimg.apply("scan-glitch", pixels, seed=5, severity=8)
+        assert np.array_equal(a, b)
+
+    def test_mode_conversion(self, pixels):
+        out = opimg.apply("thermal", pixels)
+        assert out.shape == pixels.shape
+
+    def test_channel_swap_values(self, pixels):
+        out = opimg.apply("channel-swap", pixels, map="B,G,R")
+        assert np.array_equal(out, pixels[:, :, ::-1])
+
+    def test_invalid_value_raises(self, pixels):
+        with pytest.raises(ValueError):
+            opimg.apply("channel-swap", pixels, map="X,Y,Z")
+
+    def test_bit_crush_levels(self, pixels):
+        out = opimg.apply("bit-crush", pixels, bits=1)
+        assert set(np.unique(out)) <= {0, 255}
+
+    def test_bit_crush_dither(self, pixels):
+        out = opimg.apply("bit-crush", pixels, bits=1, dither="atkinson")
+        assert set(np.unique(out)) <= {0, 255}
+        assert not np.array_equal(out, opimg.apply("bit-crush", pixels, bits=1))
+
+    def test_posterize_hsv_dither(self, pixels):
+        out = opimg.apply("posterize-hsv", pixels, dither="bayer-4")
+        assert out.shape == pixels.shape
+        assert np.array_equal(out, opimg.apply("posterize-hsv", pixels, dither="bayer-4"))
+
+    def test_channel_offset_rolls(self, pixels):
+        out = opimg.apply("channel-offset", pixels, r="3,2", g="0,0", b="0,0")
+        assert np.array_equal(out[:, :, 0], np.roll(pixels[:, :, 0], (2, 3), axis=(0, 1)))
+        assert np.array_equal(out[:, :, 1:], pixels[:, :, 1:])
+
+    def test_fold_mirror(self, pixels):
+        out = opimg.apply("fold", pixels, axis="x", position=20)
+        assert np.array_equal(out[:, 20:40], pixels[:, 19::-1])
+        assert not out[:, 40:].any()
+
+    def test_isolate_threshold_scale(self, pixels):
+        out = opimg.apply("isolate-threshold", pixels, scale=2)
+        assert out.shape == (128, 128, 4)
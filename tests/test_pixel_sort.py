@@ -1,6 +1,13 @@
 """Tests for pixel-sort tool."""
 
+import multiprocessing
+
+import numpy as np
+import pytest
+
 from conftest import assert_valid_image
+from opimg.effects import pixel_sort
+from opimg.registry import get_effect
 
 
 class TestPixelSort:
@@ -35,3 +42,161 @@ class TestPixelSort:
     def test_no_args(self, run_tool):
         r = run_tool("pixel-sort", "pixel-sort.py", [])
         assert r.returncode != 0
+
+
+def _reference_sort(line, metric_fn, threshold, lower=0, descending=False, min_run=1, max_run=0):
+    """Run by run, as a loop: each run in [lower, threshold) sorted stably by the metric."""
+    values = metric_fn(line)
+    result = line.copy()
+    i = 0
+    while i < len(line):
+        j = i
+        while j < len(line) and lower <= values[j] < threshold:
+            j += 1
+        if j - i >= min_run:
+            for start in range(i, j, max_run or len(line)):
+                end = min(j, start + (max_run or len(line)))
+                keys = -values[start:end] if descending else values[start:end]
+                result[start:end] = line[start:end][np.argsort(keys, kind="stable")]
+        i = j + 1
+    return result
+
+
+def _image():
+    rng = np.random.default_rng(3)
+    # Few levels: long runs and many equal values
+    pixels = (rng.integers(0, 5, (23, 37, 3)) * 60).astype(np.uint8)
+    pixels[::4] = rng.integers(0, 256, (6, 37, 3), dtype=np.uint8)
+    return pixels
+
+
+def _sort(pixels, **params):
+    return get_effect("pixel-sort")(pixels, **params)
+
+
+class TestSortRuns:
+    @pytest.mark.parametrize("by", sorted(pixel_sort.METRIC_FN))
+    @pytest.mark.parametrize("threshold", [0, 120, 256])
+    def test_matches_run_by_run_sort(self, by, threshold):
+        pixels = _image()
+        result = _sort(pixels, by=by, threshold=threshold)
+        for row, expected in zip(result, pixels):
+            assert np.array_equal(row, _reference_sort(expected, pixel_sort.METRIC_FN[by], threshold))
+
+    @pytest.mark.parametrize("chunk", [1, 40, 1 << 18])
+    def test_columns_are_transposed_rows(self, chunk, monkeypatch):
+        monkeypatch.setattr(pixel_sort, "CHUNK_PIXELS", chunk)
+        pixels = _image()
+        rows = _sort(np.ascontiguousarray(pixels.swapaxes(0, 1)), by="hue", threshold=200)
+        columns = _sort(pixels, by="hue", threshold=200, direction="column")
+        assert np.array_equal(columns, rows.swapaxes(0, 1))
+
+    def test_segmented_order(self):
+        rng = np.random.default_rng(0)
+        values = rng.integers(0, 6, 500) * 0.5
+        runs = np.cumsum(rng.random(500) < 0.1)
+        assert np.array_equal(pixel_sort.segmented_order(values, runs), np.lexsort((values, runs)))
+
+    @pytest.mark.parametrize("options", [
+        {"lower": 60, "upper": 180},
+        {"order": "descending"},
+        {"min_run": 4},
+        {"max_run": 3},
+        {"lower": 30, "order": "descending", "min_run": 2, "max_run": 5},
+    ])
+    def test_bands_order_and_run_limits(self, options):
+        pixels = _image()
+        result = _sort(pixels, threshold=220, **options)
+        expected = {
+            "threshold": options.get("upper", 220),
+            "lower": options.get("lower", 0),
+            "descending": options.get("order") == "descending",
+            "min_run": options.get("min_run", 1),
+            "max_run": options.get("max_run", 0),
+        }
+        for row, line in zip(result, pixels):
+            assert np.array_equal(row, _reference_sort(line, pixel_sort.pixel_brightness, **expected))
+
+
+class TestLineMap:
+    @pytest.mark.parametrize("angle", [0.0, 30.0, 45.0, 100.0, 200.0, 315.0])
+    def test_lines_tile_the_image_along_the_angle(self, angle):
+        h, w = 13, 21
+        index, line_starts = pixel_sort.line_map(h, w, angle)
+        assert sorted(index) == list(range(h * w))
+        direction = np.array([np.sin(np.radians(angle)), np.cos(np.radians(angle))])
+        for line in np.split(index, line_starts[1:]):
+            steps = np.diff(np.stack(np.divmod(line, w), axis=1), axis=0)
+            # One pixel to the next: a neighbour, ahead along the angle
+            assert (np.abs(steps).max(axis=1, initial=1) == 1).all()
+            assert (steps @ direction > 0).all()
+
+    def test_right_angles_are_rows_and_columns(self):
+        assert np.array_equal(pixel_sort.line_map(4, 6, 0.0)[0], np.arange(24))
+        assert np.array_equal(pixel_sort.line_map(4, 6, 90.0)[0], np.arange(24).reshape(4, 6).T.reshape(-1))
+        assert not pixel_sort.line_map(4, 6, 30.0)[0].flags.writeable
+
+    @pytest.mark.parametrize("angle", [30, 100, 222.5])
+    def test_angled_sort_matches_lines(self, angle):
+        pixels = _image()
+        result = _sort(pixels, by="hue", threshold=200, angle=angle, max_run=6)
+        index, line_starts = pixel_sort.line_map(23, 37, angle % 360)
+        flat, expected = pixels.reshape(-1, 3), np.empty_like(pixels).reshape(-1, 3)
+        for line in np.split(index, line_starts[1:]):
+            expected[line] = _reference_sort(flat[line], pixel_sort.pixel_hue, 200, max_run=6)
+        assert np.array_equal(result.reshape(-1, 3), expected)
+
+    @pytest.mark.parametrize("angle, direction, flip", [
+        (0, "row", None), (90, "column", None), (180, "row", 1), (-90, "column", 0), (360, "row", None),
+    ])
+    def test_right_angles(self, angle, direction, flip):
+        pixels = _image()
+        source = pixels if flip is None else np.flip(pixels, flip)
+        expected = _sort(source, direction=direction)
+        expected = expected if flip is None else np.flip(expected, flip)
+        assert np.array_equal(_sort(pixels, angle=angle), expected)
+
+
+class TestWorkers:
+    @pytest.mark.parametrize("options", [
+        {}, {"direction": "column"}, {"angle": 30, "max_run": 5}, {"angle": 270, "order": "descending"},
+    ])
+    def test_same_as_one_process(self, options):
+        pixels = _image()
+        expected = _sort(pixels, by="hue", **options)
+        assert np.array_equal(_sort(pixels, by="hue", workers=3, **options), expected)
+
+    def test_pool_workers_sort_alone(self):
+        # A daemonic pool worker cannot start processes, so it sorts by itself
+        with multiprocessing.Pool(1) as pool:
+            result = pool.apply(_sort, (_image(),), {"workers": 2})
+        assert np.array_equal(result, _sort(_image()))
+
+
+class TestPixelSortOptions:
+    def test_cli(self, run_tool, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        out = str(tmp_path / "angled.png")
+        r = run_tool("pixel-sort", "pixel-sort.py", [
+            img, out, "--angle", "30", "--lower", "40", "--upper", "220", "--order", "descending", "--max-run", "20",
+        ])
+        assert r.returncode == 0, r.stderr
+        assert_valid_image(out)
+        assert "range=40-220, angle=30, descending, max-run=20" in r.stderr
+
+    def test_workers_cli(self, run_tool, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        one, many = str(tmp_path / "one.png"), str(tmp_path / "many.png")
+        assert run_tool("pixel-sort", "pixel-sort.py", [img, one, "--angle", "60"]).returncode == 0
+        r = run_tool("pixel-sort", "pixel-sort.py", [img, many, "--angle", "60", "--workers", "2"])
+        assert r.returncode == 0, r.stderr
+        assert "workers=2" in r.stderr and "leaked" not in r.stderr
+        assert open(one, "rb").read() == open(many, "rb").read()
+
+    @pytest.mark.parametrize("args", [
+        ["--lower", "100", "--upper", "50"], ["--max-run", "-1"], ["--workers", "-2"],
+    ])
+    def test_invalid(self, run_tool, tmp_workdir, args):
+        _, img = tmp_workdir
+        r = run_tool("pixel-sort", "pixel-sort.py", [img, *args])
+        assert r.returncode != 0
@@ -40,6 +40,18 @@ class TestPosterizeHsv:
         post_colors = len(np.unique(posterized.reshape(-1, 3), axis=0))
         assert post_colors < orig_colors
 
+    def test_dither(self, run_tool, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        out = str(tmp_path / "dithered.png")
+        r = run_tool("posterize-hsv", "posterize-hsv.py", [img, out, "--v-levels", "2", "--dither", "blue-noise"])
+        assert r.returncode == 0, r.stderr
+        assert_valid_image(out)
+
+    def test_unknown_pattern(self, run_tool, tmp_workdir):
+        _, img = tmp_workdir
+        r = run_tool("posterize-hsv", "posterize-hsv.py", [img, "--dither", "floyd-steinberg"])
+        assert r.returncode != 0
+
     def test_missing_input(self, run_tool):
         r = run_tool("posterize-hsv", "posterize-hsv.py", ["/nonexistent/image.png"])
         assert r.returncode != 0
@@ -0,0 +1,123 @@
+"""Tests for `--profile` stage timings."""
+
+import json
+import os
+import subprocess
+import time
+
+import pytest
+
+from conftest import OP, assert_valid_image, skip_without_imagemagick
+from opimg.profile import Profiler, format_text, process_age
+
+
+def _json_report(stderr: str) -> dict:
+    return json.loads(stderr.strip().splitlines()[-1])
+
+
+class TestProfiler:
+    def test_stages_and_rates(self):
+        p = Profiler()
+        p.size = (1000, 500)
+        with p.stage("decode"):
+            pass
+        with p.stage("kernel"):
+            time.sleep(0.01)
+        s = p.summary(patch="echo")
+        assert s["patch"] == "echo"
+        assert s["pixels"] == 500_000
+        assert [st["stage"] for st in s["stages"]] == ["decode", "kernel"]
+        assert s["stages"][1]["wall_ms"] >= 10
+        assert s["total"]["wall_ms"] >= s["stages"][1]["wall_ms"]
+        assert 0 < s["megapixels_per_second"]["kernel"] <= 50
+
+    def test_kernel_rate_sums_chain_stages(self):
+        p = Profiler()
+        p.stages = [("kernel:a", 0.5, 0.5), ("convert", 0.1, 0.1), ("kernel:b", 0.5, 0.5)]
+        p.size = (1000, 1000)
+        assert p.summary()["megapixels_per_second"]["kernel"] == 1.0
+
+    def test_text_report(self):
+        p = Profiler()
+        p.stages = [("startup", 0.1, None), ("kernel", 0.02, 0.02)]
+        p.size = (200, 100)
+        text = format_text(p.summary(patch="thermal", input="a.png"))
+        assert text.startswith("profile: thermal a.png (200x100, 0.02 MP)")
+        assert "startup" in text and "kernel" in text and "total" in text
+        assert "MP/s kernel" in text
+
+    def test_startup_from_env(self, monkeypatch):
+        monkeypatch.setenv("OPIMG_START", str(time.time() - 2))
+        p = Profiler()
+        p.record_startup()
+        (name, wall, cpu), = p.stages
+        assert name == "startup"
+        assert 2 <= wall < 10
+        assert cpu > 0
+
+    @pytest.mark.skipif(not os.path.exists("/proc/self/stat"), reason="needs /proc")
+    def test_process_age(self):
+        assert 0 <= process_age() < 3600
+
+
+class TestProfileCli:
+    def test_text(self, run_op, tmp_workdir):
+        _, img = tmp_workdir
+        r = run_op(["echo", img, "--profile"])
+        assert r.returncode == 0, r.stderr
+        assert "Saved echo image" in r.stderr
+        for stage in ("startup", "decode", "convert", "kernel", "encode", "total", "MP/s"):
+            assert stage in r.stderr
+
+    def test_json(self, run_tool, tmp_workdir):
+        _, img = tmp_workdir
+        r = run_tool("thermal", "thermal.py", [img, "--profile-json"])
+        assert r.returncode == 0, r.stderr
+        report = _json_report(r.stderr)
+        assert report["patch"] == "thermal"
+        assert report["pixels"] == 64 * 64
+        stages = [s["stage"] for s in report["stages"]]
+        assert stages == ["startup", "decode", "convert", "kernel", "encode"]
+        assert report["megapixels_per_second"]["kernel"] > 0
+
+    def test_startup_counts_from_op(self, tmp_workdir):
+        _, img = tmp_workdir
+        env = {**os.environ, "OPIMG_START": str(time.time() - 5)}
+        r = subprocess.run(["python3", os.path.join(os.path.dirname(OP), "echo", "echo.py"), img, "--profile-json"],
+                           env=env, capture_output=True, text=True, timeout=60)
+        startup = _json_report(r.stderr)["stages"][0]
+        assert startup["stage"] == "startup" and startup["wall_ms"] >= 5000
+
+    def test_cache_hit_stages(self, run_op, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        args = ["echo", img, "--cache-dir", str(tmp_path / "cache"), "--profile-json"]
+        run_op(args)
+        report = _json_report(run_op(args).stderr)
+        assert report["cached"] is True
+        stages = [s["stage"] for s in report["stages"]]
+        assert "cache_get" in stages and "kernel" not in stages
+
+    def test_stdout_stays_clean(self, tmp_workdir):
+        _, img = tmp_workdir
+        r = subprocess.run([OP, "echo", img, "-", "--profile"], capture_output=True, timeout=60)
+        assert r.returncode == 0
+        assert r.stdout.startswith(b"\x89PNG")
+        assert b"kernel" in r.stderr
+
+    def test_chain(self, run_op, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        out = str(tmp_path / "out.png")
+        r = run_op(["chain", "--profile-json", img, out, "thermal", "::", "echo", "--count", "2"])
+        assert r.returncode == 0, r.stderr
+        assert_valid_image(out)
+        stages = [s["stage"] for s in _json_report(r.stderr)["stages"]]
+        assert "kernel:thermal" in stages and "kernel:echo" in stages
+
+    @skip_without_imagemagick()
+    def test_imagemagick_script(self, run_op, tmp_workdir):
+        _, img = tmp_workdir
+        r = run_op(["bit-crush", img, "--profile-json"])
+        assert r.returncode == 0, r.stderr
+        report = _json_report(r.stderr)
+        assert report["patch"] == "bit-crush"
+        assert [s["stage"] for s in report["stages"]][-1] == "script"
@@ -1,8 +1,27 @@
 """Tests for seam-carve tool."""
 
-import os
+import numpy as np
+import pytest
+
+from PIL import Image
 
 from conftest import assert_valid_image
+from opimg.effects.seam_carve import (
+    ENERGY_FN,
+    SeamCarver,
+    carve_pyramid,
+    disjoint_seams,
+    downscale,
+    insert_seams,
+    load_seam_map,
+    refine_seams,
+    remove_seam,
+    resize_axis,
+    retarget,
+    retarget_widths,
+    save_seam_map,
+    seam_order,
+)
 
 
 class TestSeamCarve:
@@ -48,3 +67,240 @@ class TestSeamCarve:
     def test_no_args(self, run_tool):
         r = run_tool("seam-carve", "seam-carve.py", [])
         assert r.returncode != 0
+
+
+def _reference_seam(energy):
+    """Textbook DP: cumulative minimum row by row, then backtrack taking the leftmost minimum."""
+    h, w = energy.shape
+    cost = energy.copy()
+    for r in range(1, h):
+        for x in range(w):
+            cost[r, x] += cost[r - 1, max(0, x - 1):x + 2].min()
+    seam = [int(np.argmin(cost[-1]))]
+    for r in range(h - 2, -1, -1):
+        lo = max(0, seam[-1] - 1)
+        seam.append(lo + int(np.argmin(cost[r, lo:seam[-1] + 2])))
+    return np.array(seam[::-1])
+
+
+def _images():
+    rng = np.random.default_rng(7)
+    y, x = np.mgrid[:23, :31]
+    yield np.stack([x * 8, y * 11, (x * y) % 256], axis=-1).astype(np.uint8)
+    yield rng.integers(0, 256, (17, 29, 3), dtype=np.uint8)
+    # Few distinct values: many equal-energy seams, so tie-breaking matters
+    yield (rng.integers(0, 3, (19, 25, 3)) * 100).astype(np.uint8)
+    yield rng.integers(0, 256, (2, 9, 3), dtype=np.uint8)
+
+
+class TestSeamCarver:
+    @pytest.mark.parametrize("energy", ["sobel", "gradient"])
+    @pytest.mark.parametrize("index", range(4))
+    def test_matches_full_recomputation(self, energy, index):
+        pixels = list(_images())[index]
+        carver = SeamCarver(pixels, energy)
+        expected = pixels
+        for _ in range(pixels.shape[1] - 1):
+            seam = _reference_seam(ENERGY_FN[energy](expected))
+            assert np.array_equal(carver.remove_seam(), seam)
+            expected = remove_seam(expected, seam)
+            assert np.array_equal(carver.pixels, expected)
+
+    def test_seam_order_retargets_every_width(self):
+        pixels = list(_images())[1]
+        w = pixels.shape[1]
+        order = seam_order(pixels, 12)
+        assert order.dtype == np.uint8
+        carver = SeamCarver(pixels)
+        for width in range(w, w - 13, -1):
+            assert np.array_equal(retarget(pixels, order, width), carver.pixels)
+            carver.remove_seam()
+
+    def test_retarget_widths(self):
+        pixels = list(_images())[0]
+        order = seam_order(pixels, 10, "gradient")
+        widths = [31, 27, 21]
+        outputs = list(retarget_widths(pixels, order, widths))
+        assert [o.shape[1] for o in outputs] == widths
+        assert np.array_equal(outputs[1], retarget(pixels, order, 27))
+        with pytest.raises(ValueError, match="covers widths 21-31"):
+            retarget(pixels, order, 20)
+
+    def test_insert_seams(self):
+        pixels = list(_images())[1]
+        order = seam_order(pixels, 5)
+        wide = insert_seams(pixels, order, 5)
+        assert wide.shape == (17, 34, 3)
+        for r in range(17):
+            cols = np.flatnonzero(order[r] < 5)
+            # Each seam pixel is followed by its blend with the next pixel
+            originals = np.delete(wide[r], cols + np.arange(1, 6), axis=0)
+            assert np.array_equal(originals, pixels[r])
+            j = cols[0]
+            expected = (pixels[r, j].astype(int) + pixels[r, min(j + 1, 28)] + 1) // 2
+            assert np.array_equal(wide[r, j + 1], expected)
+
+    @pytest.mark.parametrize("size", [15, 30])
+    def test_horizontal_is_transposed_vertical(self, size):
+        pixels = list(_images())[0]
+        transposed = np.ascontiguousarray(pixels.swapaxes(0, 1))
+        expected = resize_axis(transposed, size, 1).swapaxes(0, 1)
+        assert np.array_equal(resize_axis(pixels, size, 0), expected)
+
+    def test_resize_axis_limits(self):
+        pixels = list(_images())[3]
+        assert resize_axis(pixels, 1, 0).shape == (1, 9, 3)
+        assert resize_axis(pixels, 17).shape == (2, 17, 3)
+        with pytest.raises(ValueError, match="1-17 pixels, not 18"):
+            resize_axis(pixels, 18)
+
+    def test_remove_seam(self):
+        img = np.arange(12).reshape(3, 4)
+        assert remove_seam(img, np.array([0, 1, 3])).tolist() == [[1, 2, 3], [4, 6, 7], [8, 9, 10]]
+
+
+def _assert_disjoint_paths(seams, width):
+    # One column per seam and row, never shared, moving at most one column per row
+    assert seams.min() >= 0 and seams.max() < width
+    assert (np.diff(np.sort(seams, axis=1), axis=1) > 0).all()
+    assert np.abs(np.diff(seams, axis=0)).max() <= 1
+
+
+class TestSeamCarvePyramid:
+    def test_disjoint_seams(self):
+        energy = ENERGY_FN["sobel"](list(_images())[1])
+        seams = disjoint_seams(energy, 6)
+        assert seams.shape == (17, 6)
+        _assert_disjoint_paths(seams, 29)
+        assert np.array_equal(seams[:, 0], _reference_seam(energy))
+
+    @pytest.mark.parametrize("margin", [0, 3])
+    def test_refined_seams_stay_in_their_corridors(self, margin):
+        pixels = np.random.default_rng(5).integers(0, 256, (40, 64, 3), dtype=np.uint8)
+        blocks = disjoint_seams(ENERGY_FN["sobel"](downscale(pixels, 4)), 3)
+        seams = refine_seams(ENERGY_FN["sobel"](pixels), blocks, 4, margin)
+        assert seams.shape == (40, 3)
+        _assert_disjoint_paths(seams, 64)
+        starts = np.sort(blocks, axis=1)[np.arange(40) // 4] * 4
+        assert (np.sort(seams, axis=1) >= starts - margin).all()
+        assert (np.sort(seams, axis=1) < starts + 4 + margin).all()
+
+    @pytest.mark.parametrize("levels", [1, 2])
+    @pytest.mark.parametrize("quality", [0, 1])
+    def test_finds_the_flat_band(self, levels, quality):
+        # Noise with a flat band: like exact carving, every seam goes through the band
+        pixels = np.random.default_rng(3).integers(0, 256, (48, 96, 3), dtype=np.uint8)
+        pixels[:, 40:64] = 120
+        expected = np.delete(pixels, range(40, 52), axis=1)
+        assert np.array_equal(resize_axis(pixels, 84), expected)
+        assert np.array_equal(carve_pyramid(pixels, 12, "sobel", levels, quality), expected)
+
+    def test_narrow_images_finish_exactly(self):
+        pixels = list(_images())[0]
+        assert carve_pyramid(pixels, 30, "gradient", 3).shape == (23, 1, 3)
+        assert np.array_equal(carve_pyramid(pixels, 0), pixels)
+
+    def test_cli(self, run_tool, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        out = str(tmp_path / "pyramid.png")
+        r = run_tool("seam-carve", "seam-carve.py", [img, out, "--size", "40x50", "--pyramid", "2", "--quality", "1"])
+        assert r.returncode == 0, r.stderr
+        assert assert_valid_image(out).size == (40, 50)
+
+    @pytest.mark.parametrize("args, message", [
+        (["--quality", "1.5"], "--quality must be between 0 and 1"),
+        (["--pyramid", "-1"], "--pyramid must be 0 or more"),
+        (["--map", "m.npy"], "cannot be combined with --pyramid"),
+    ])
+    def test_invalid(self, run_tool, tmp_workdir, args, message):
+        tmp_path, img = tmp_workdir
+        r = run_tool("seam-carve", "seam-carve.py", [img, "--pyramid", "1", *args], cwd=tmp_path)
+        assert r.returncode != 0
+        assert message in r.stderr
+
+
+class TestSeamMap:
+    def test_map_is_written_then_reused(self, run_tool, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        seam_map = str(tmp_path / "input.seams.npy")
+        plain, mapped = str(tmp_path / "plain.png"), str(tmp_path / "mapped.png")
+
+        assert run_tool("seam-carve", "seam-carve.py", [img, plain, "--percent", "20"]).returncode == 0
+        r = run_tool("seam-carve", "seam-carve.py", [img, mapped, "--percent", "20", "--map", seam_map])
+        assert r.returncode == 0, r.stderr
+        order = np.load(seam_map)
+        assert order.shape == (64, 64) and order.max() == 32
+        assert np.array_equal(np.asarray(Image.open(mapped)), np.asarray(Image.open(plain)))
+
+        # Another width comes from the saved map
+        r = run_tool("seam-carve", "seam-carve.py", [img, mapped, "--percent", "40", "--map", seam_map])
+        assert r.returncode == 0, r.stderr
+        assert "seam map" in r.stderr
+        assert Image.open(mapped).size == (39, 64)
+
+    def test_map_of_another_image(self, run_tool, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        seam_map = str(tmp_path / "other.npy")
+        np.save(seam_map, np.zeros((10, 10), dtype=np.uint8))
+        r = run_tool("seam-carve", "seam-carve.py", [img, "--map", seam_map])
+        assert r.returncode != 0
+        assert "seam map for a 10x10 image, not 64x64" in r.stderr
+
+    def test_map_of_another_image_the_same_size(self, run_tool, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        seam_map = str(tmp_path / "input.seams.npy")
+        assert run_tool("seam-carve", "seam-carve.py", [img, "--map", seam_map]).returncode == 0
+        other = str(tmp_path / "other.png")
+        Image.fromarray(255 - np.asarray(Image.open(img))).save(other)
+        r = run_tool("seam-carve", "seam-carve.py", [other, "--map", seam_map])
+        assert r.returncode != 0
+        assert "carved from another image" in r.stderr
+
+    def test_map_of_another_energy(self, run_tool, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        seam_map = str(tmp_path / "input.seams.npy")
+        assert run_tool("seam-carve", "seam-carve.py", [img, "--map", seam_map]).returncode == 0
+        r = run_tool("seam-carve", "seam-carve.py", [img, "--map", seam_map, "--energy", "gradient"])
+        assert r.returncode != 0
+        assert "holds sobel seams, not gradient" in r.stderr
+
+
+class TestLoadSeamMap:
+    @pytest.fixture
+    def pixels(self):
+        return np.random.default_rng(0).integers(0, 256, (5, 6, 3), dtype=np.uint8)
+
+    def test_bare_map_is_trusted(self, pixels, tmp_path):
+        order = seam_order(pixels, 3)
+        np.save(tmp_path / "m.npy", order)
+        assert np.array_equal(load_seam_map(str(tmp_path / "m.npy"), pixels, "gradient"), order)
+
+    def test_round_trip(self, pixels, tmp_path):
+        order = seam_order(pixels, 3)
+        save_seam_map(str(tmp_path / "m.npy"), order, pixels, "sobel")
+        assert np.array_equal(load_seam_map(str(tmp_path / "m.npy"), pixels, "sobel"), order)
+
+    @pytest.mark.parametrize("row", [[0, 1, 1, 3, 3, 3], [0, 1, 2, 3, 3, 4], [3, 3, 3, 3, 3, 3]])
+    def test_rows_must_remove_each_seam_once(self, pixels, tmp_path, row):
+        order = seam_order(pixels, 3)
+        order[2] = row
+        np.save(tmp_path / "m.npy", order)
+        with pytest.raises(ValueError, match="some row does not remove seams"):
+            load_seam_map(str(tmp_path / "m.npy"), pixels, "sobel")
+
+
+class TestSeamCarveSize:
+    @pytest.mark.parametrize("size, expected", [("80x48", (80, 48)), ("40x", (40, 64)), ("x90", (64, 90))])
+    def test_size(self, run_tool, tmp_workdir, size, expected):
+        tmp_path, img = tmp_workdir
+        out = str(tmp_path / "sized.png")
+        r = run_tool("seam-carve", "seam-carve.py", [img, out, "--size", size])
+        assert r.returncode == 0, r.stderr
+        assert assert_valid_image(out).size == expected
+        assert f"64x64 -> {expected[0]}x{expected[1]}" in r.stderr
+
+    @pytest.mark.parametrize("args", [["--size", "64"], ["--size", "200x64"], ["--size", "32x32", "--map", "m.npy"]])
+    def test_invalid(self, run_tool, tmp_workdir, args):
+        tmp_path, img = tmp_workdir
+        r = run_tool("seam-carve", "seam-carve.py", [img, *args], cwd=tmp_path)
+        assert r.returncode != 0
@@ -0,0 +1,168 @@
+"""Tests for the `op serve` daemon and the client routing in `op`."""
+
+import io
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from conftest import OP, assert_valid_image
+from opimg import client
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    """Start `op serve` on a private socket; yields the env routing `op` through it."""
+    sock = str(tmp_path / "op.sock")
+    env = {**os.environ, "OPIMG_SOCKET": sock}
+    proc = subprocess.Popen([OP, "serve", "--jobs", "1"], env=env, stderr=subprocess.PIPE)
+    deadline = time.monotonic() + 30
+    while not client.is_running(sock):
+        assert proc.poll() is None, proc.stderr.read()
+        assert time.monotonic() < deadline, "daemon did not start"
+        time.sleep(0.1)
+    yield env
+    subprocess.run([OP, "serve", "--stop"], env=env, capture_output=True, timeout=30)
+    proc.wait(timeout=30)
+    assert not os.path.exists(sock)
+
+
+def _op(args, env):
+    return subprocess.run([OP] + args, env=env, capture_output=True, text=True, timeout=60)
+
+
+class TestServe:
+    def test_routes_patch_through_daemon(self, daemon, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        out = str(tmp_path / "served.png")
+        local = str(tmp_path / "local.png")
+        r = _op(["pixel-sort", img, out, "--by", "hue"], daemon)
+        assert r.returncode == 0, r.stderr
+        assert "by=hue" in r.stderr
+        _op(["pixel-sort", img, local, "--by", "hue"], {**daemon, "OPIMG_NO_DAEMON": "1"})
+        assert np.array_equal(np.array(Image.open(out)), np.array(Image.open(local)))
+
+    def test_relative_paths_use_client_cwd(self, daemon, tmp_workdir):
+        tmp_path, _ = tmp_workdir
+        r = subprocess.run([OP, "thermal", "input.png"], env=daemon, cwd=tmp_path,
+                           capture_output=True, text=True, timeout=60)
+        assert r.returncode == 0, r.stderr
+        assert_valid_image(str(tmp_path / "input-thermal.png"))
+
+    def test_client_cache_dir(self, daemon, tmp_workdir):
+        # The daemon was started without a cache directory; the caller's applies
+        tmp_path, img = tmp_workdir
+        cache_dir = tmp_path / "cache"
+        env = {**daemon, "OPIMG_CACHE_DIR": str(cache_dir)}
+        r = _op(["thermal", img, str(tmp_path / "a.png")], env)
+        assert r.returncode == 0, r.stderr
+        assert cache_dir.is_dir()
+        r = _op(["thermal", img, str(tmp_path / "b.png")], env)
+        assert "(cached)" in r.stderr
+        # ... for that request only
+        r = _op(["thermal", img, str(tmp_path / "c.png")], daemon)
+        assert "(cached)" not in r.stderr
+
+    def test_errors_relayed(self, daemon):
+        r = _op(["pixel-sort", "/nonexistent/image.png"], daemon)
+        assert r.returncode == 1
+        assert "not found" in r.stderr
+
+    def test_chain_through_daemon(self, daemon, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        out = str(tmp_path / "chained.png")
+        r = _op(["chain", img, out, "echo", "--count", "2", "::", "thermal"], daemon)
+        assert r.returncode == 0, r.stderr
+        assert_valid_image(out)
+
+    def test_render_bytes(self, daemon, tmp_workdir):
+        _, img = tmp_workdir
+        with open(img, "rb") as f:
+            data = f.read()
+        out = client.render("channel-swap", data, path=daemon["OPIMG_SOCKET"], map="B,G,R")
+        src = np.array(Image.open(img).convert("RGB"))
+        result = np.array(Image.open(io.BytesIO(out)))
+        assert np.array_equal(result, src[:, :, ::-1])
+
+    def test_render_error(self, daemon, tmp_workdir):
+        _, img = tmp_workdir
+        with open(img, "rb") as f:
+            data = f.read()
+        with pytest.raises(RuntimeError, match="unknown patch"):
+            client.render("nonexistent", data, path=daemon["OPIMG_SOCKET"])
+
+    def test_second_daemon_refused(self, daemon):
+        r = _op(["serve"], daemon)
+        assert r.returncode != 0
+        assert "already listening" in r.stderr
+
+
+class TestFallback:
+    def test_stale_socket_falls_back_to_local(self, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        stale = str(tmp_path / "stale.sock")
+        _bind(stale)
+        out = str(tmp_path / "out.png")
+        r = _op(["echo", img, out, "--count", "1"], {**os.environ, "OPIMG_SOCKET": stale})
+        assert r.returncode == 0, r.stderr
+        assert_valid_image(out)
+
+    def test_stop_without_daemon(self, tmp_path):
+        r = _op(["serve", "--stop"], {**os.environ, "OPIMG_SOCKET": str(tmp_path / "none.sock")})
+        assert r.returncode != 0
+
+
+def _bind(path):
+    subprocess.run([sys.executable, "-c", f"import socket; s = socket.socket(socket.AF_UNIX); s.bind({path!r})"],
+                   check=True)
+
+
+@pytest.fixture
+def foreign_socket(tmp_path):
+    """A socket file owned by another user (needs root to hand it over)."""
+    if os.getuid() != 0:
+        pytest.skip("chown to another user needs root")
+    path = str(tmp_path / "foreign.sock")
+    _bind(path)
+    os.chown(path, 65534, 65534)
+    return path
+
+
+class TestSocketOwnership:
+    def test_client_refuses_foreign_socket(self, foreign_socket):
+        assert not client.owned_by_caller(foreign_socket)
+        with pytest.raises(OSError, match="another user"):
+            client.request({"op": "ping"}, foreign_socket)
+        assert client.run(["echo", "x.png"], foreign_socket) == client.EX_TEMPFAIL
+
+    def test_op_renders_locally(self, foreign_socket, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        out = str(tmp_path / "out.png")
+        r = _op(["echo", img, out, "--count", "1"], {**os.environ, "OPIMG_SOCKET": foreign_socket})
+        assert r.returncode == 0, r.stderr
+        assert_valid_image(out)
+
+    def test_serve_refuses_foreign_socket(self, foreign_socket):
+        r = _op(["serve", "--socket", foreign_socket], dict(os.environ))
+        assert r.returncode == 1
+        assert "another user" in r.stderr
+        assert os.path.exists(foreign_socket)
+
+    def test_default_socket_dir_must_be_private(self, tmp_path):
+        shared = tmp_path / f"opimg-{os.getuid()}"
+        shared.mkdir()
+        shared.chmod(0o777)
+        env = {k: v for k, v in os.environ.items() if k != "OPIMG_SOCKET"}
+        r = _op(["serve"], {**env, "XDG_RUNTIME_DIR": str(tmp_path)})
+        assert r.returncode == 1
+        assert "mode 700" in r.stderr
+
+    def test_default_socket_path(self, monkeypatch, tmp_path):
+        monkeypatch.delenv("OPIMG_SOCKET", raising=False)
+        monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+        assert client.socket_path() == str(tmp_path / f"opimg-{os.getuid()}" / "op.sock")
+
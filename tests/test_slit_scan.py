@@ -1,7 +1,10 @@
 """Tests for slit-scan tool."""
 
-import os
+import numpy as np
+import pytest
+from PIL import Image
 
+import opimg
 from conftest import assert_valid_image
 
 
@@ -35,3 +38,53 @@ class TestSlitScan:
     def test_no_args(self, run_tool):
         r = run_tool("slit-scan", "slit-scan.py", [])
         assert r.returncode != 0
+
+    def test_transforms(self, run_tool, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        out = str(tmp_path / "warp.png")
+        r = run_tool("slit-scan", "slit-scan.py", [
+            img, out, "--max-zoom", "2", "--max-shear", "30", "--max-shift", "10,-5",
+        ])
+        assert r.returncode == 0, r.stderr
+        assert assert_valid_image(out).size == (64, 64)
+
+    def test_invalid_zoom(self, run_tool, tmp_workdir):
+        _, img = tmp_workdir
+        r = run_tool("slit-scan", "slit-scan.py", [img, "--max-zoom", "0"])
+        assert r.returncode != 0
+
+
+def _rotation_reference(pixels, slits, max_angle):
+    """The original engine: one full-frame Pillow rotation per slit."""
+    img = Image.fromarray(pixels)
+    height, width, _ = pixels.shape
+    actual = slits if slits > 0 else width
+    result = np.zeros_like(pixels)
+    for i in range(actual):
+        rotated = np.array(img.rotate(i * max_angle / actual, resample=Image.BICUBIC, expand=False))
+        src_col = min(int(i * width / actual), width - 1)
+        result[:, int(i * width / actual):min(int((i + 1) * width / actual), width)] = rotated[:, src_col:src_col + 1]
+    return result
+
+
+class TestSlitScanKernel:
+    @pytest.mark.parametrize("shape", [(40, 57, 3), (33, 33, 3), (6, 90, 3)])
+    @pytest.mark.parametrize("slits, max_angle", [(0, 180), (16, 90), (7, 360), (120, 45), (5, -500)])
+    def test_matches_full_frame_rotations(self, shape, slits, max_angle):
+        pixels = np.random.default_rng(1).integers(0, 256, shape, dtype=np.uint8)
+        out = opimg.apply("slit-scan", pixels, slits=slits, max_angle=max_angle)
+        assert np.array_equal(out, _rotation_reference(pixels, slits, max_angle))
+
+    def test_shift(self):
+        pixels = np.random.default_rng(2).integers(0, 256, (20, 40, 3), dtype=np.uint8)
+        # Slit 1 of 2 is shifted by half of --max-shift: a whole number of pixels, so no blending
+        out = opimg.apply("slit-scan", pixels, slits=2, max_angle=0, max_shift="20,0")
+        assert np.array_equal(out[:, :20], np.repeat(pixels[:, :1], 20, axis=1))
+        assert np.array_equal(out[:, 20:], np.repeat(pixels[:, 10:11], 20, axis=1))
+
+    def test_zoom_keeps_centre(self):
+        pixels = np.random.default_rng(3).integers(0, 256, (21, 41, 3), dtype=np.uint8)
+        out = opimg.apply("slit-scan", pixels, slits=2, max_angle=0, max_zoom=3)
+        # The centre pixel is a fixed point of a zoom about the centre
+        assert np.array_equal(out[10, 20], pixels[10, 20])
+        assert not np.array_equal(out[:, 20], pixels[:, 20])
@@ -0,0 +1,141 @@
+"""Tests for streaming images through stdin/stdout with `-`."""
+
+import io
+import subprocess
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from conftest import OP, skip_without_imagemagick
+
+
+def _op(args, data=None):
+    return subprocess.run([OP] + args, input=data, capture_output=True, timeout=60)
+
+
+def _decode(data):
+    with Image.open(io.BytesIO(data)) as img:
+        return img.format, np.array(img)
+
+
+class TestStdio:
+    @pytest.mark.parametrize("patch, args", [
+        ("echo", ["--count", "3"]),
+        ("thermal", []),
+        ("cross-hatch", []),
+        ("tile-shuffle", ["--seed", "2"]),
+    ])
+    def test_stdin_to_stdout_matches_file_run(self, tmp_workdir, patch, args):
+        tmp_path, img = tmp_workdir
+        with open(img, "rb") as f:
+            r = _op([patch, "-"] + args, f.read())
+        assert r.returncode == 0, r.stderr
+        assert b"<stdout>" in r.stderr
+
+        out = str(tmp_path / "file.png")
+        _op([patch, img, out] + args)
+        format, pixels = _decode(r.stdout)
+        assert format == "PNG"
+        assert np.array_equal(pixels, np.array(Image.open(out)))
+
+    def test_stdout_keeps_input_format(self, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        jpeg = io.BytesIO()
+        Image.open(img).convert("RGB").save(jpeg, "JPEG")
+        r = _op(["echo", "-"], jpeg.getvalue())
+        assert r.returncode == 0, r.stderr
+        assert _decode(r.stdout)[0] == "JPEG"
+
+    def test_format_flag(self, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        r = _op(["thermal", img, "-", "--format", "jpg"])
+        assert r.returncode == 0, r.stderr
+        assert _decode(r.stdout)[0] == "JPEG"
+
+        out = tmp_path / "forced.png"
+        _op(["thermal", img, str(out), "--format", "webp"])
+        assert Image.open(out).format == "WEBP"
+
+    def test_format_flag_names_default_output(self, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        r = _op(["echo", img, "--format", "jpeg"])
+        assert r.returncode == 0, r.stderr
+        assert Image.open(tmp_path / "input-echo.jpeg").format == "JPEG"
+
+    def test_unknown_format(self, tmp_workdir):
+        _, img = tmp_workdir
+        r = _op(["echo", img, "-", "--format", "nope"])
+        assert r.returncode != 0
+        assert b"unknown image format" in r.stderr
+
+    def test_stdin_to_file(self, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        out = tmp_path / "out.png"
+        with open(img, "rb") as f:
+            r = _op(["echo", "-", str(out)], f.read())
+        assert r.returncode == 0, r.stderr
+        assert r.stdout == b""
+        assert Image.open(out).size == (64, 64)
+
+    def test_pipeline(self, tmp_workdir):
+        _, img = tmp_workdir
+        first = _op(["thermal", img, "-"])
+        second = _op(["echo", "-", "--count", "2"], first.stdout)
+        assert second.returncode == 0, second.stderr
+        chained = _op(["chain", img, "-", "thermal", "::", "echo", "--count", "2"])
+        assert chained.returncode == 0, chained.stderr
+        assert np.array_equal(_decode(second.stdout)[1], _decode(chained.stdout)[1])
+
+    def test_chain_stdin_with_format(self, tmp_workdir):
+        _, img = tmp_workdir
+        with open(img, "rb") as f:
+            r = _op(["chain", "--format", "jpeg", "-", "-", "thermal", "::", "echo"], f.read())
+        assert r.returncode == 0, r.stderr
+        assert _decode(r.stdout)[0] == "JPEG"
+
+    def test_dithered_script_writes_png(self, tmp_workdir):
+        # Dithered bit-crush runs in the opimg port; stdout stays PNG like the ImageMagick path
+        _, img = tmp_workdir
+        jpeg = io.BytesIO()
+        Image.open(img).convert("RGB").save(jpeg, "JPEG")
+        r = _op(["bit-crush", "-", "-", "--bits", "1", "--dither", "floyd-steinberg"], jpeg.getvalue())
+        assert r.returncode == 0, r.stderr
+        assert _decode(r.stdout)[0] == "PNG"
+
+    def test_bad_stdin(self):
+        r = _op(["echo", "-"], b"not an image")
+        assert r.returncode != 0
+
+    @pytest.mark.parametrize("args", [["echo", "-"], ["chain", "-", "-", "thermal", "::", "echo"]])
+    @pytest.mark.parametrize("data", [b"", b"not an image", b"\x89PNG\r\n\x1a\n\x00\x00"])
+    def test_undecodable_stdin(self, args, data):
+        r = _op(args, data)
+        assert r.returncode == 1
+        assert r.stderr.decode().strip() == "Error: cannot decode image from stdin"
+        assert r.stdout == b""
+
+    def test_undecodable_file(self, tmp_path):
+        bad = tmp_path / "bad.png"
+        bad.write_bytes(b"not an image")
+        r = _op(["echo", str(bad)])
+        assert r.returncode == 1
+        assert r.stderr.decode().strip() == f"Error: cannot decode image from {bad}"
+
+
+@skip_without_imagemagick()
+@pytest.mark.imagemagick
+class TestStdioImageMagick:
+    @pytest.mark.parametrize("patch", ["bit-crush", "res-crush", "fold", "channel-offset", "isolate-threshold"])
+    def test_stdin_to_stdout(self, tmp_workdir, patch):
+        _, img = tmp_workdir
+        with open(img, "rb") as f:
+            r = _op([patch, "-"], f.read())
+        assert r.returncode == 0, r.stderr
+        assert _decode(r.stdout)[0] == "PNG"
+
+    def test_format_flag(self, tmp_workdir):
+        _, img = tmp_workdir
+        r = _op(["bit-crush", img, "-", "--format", "jpg"])
+        assert r.returncode == 0, r.stderr
+        assert _decode(r.stdout)[0] == "JPEG"
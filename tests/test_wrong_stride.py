@@ -1,8 +1,10 @@
 """Tests for wrong-stride tool."""
 
 import numpy as np
+import pytest
 from PIL import Image
 
+import opimg
 from conftest import assert_valid_image
 
 
@@ -39,3 +41,61 @@ class TestWrongStride:
     def test_no_args(self, run_tool):
         r = run_tool("wrong-stride", "wrong-stride.py", [])
         assert r.returncode != 0
+
+    def test_byte_offset_width_and_bpp(self, run_tool, tmp_workdir):
+        tmp_path, img = tmp_workdir
+        out = str(tmp_path / "modes.png")
+        r = run_tool("wrong-stride", "wrong-stride.py", [
+            img, out, "--byte-offset", "1", "--width", "48", "--bpp", "4",
+        ])
+        assert r.returncode == 0, r.stderr
+        assert "byte-offset=1, width=48, bpp=4" in r.stderr
+        # 64x64 RGB bytes regrouped as 48-pixel RGBX rows
+        assert Image.open(out).size == (48, 64 * 64 * 3 // (48 * 4))
+
+    def test_invalid_width(self, run_tool, tmp_workdir):
+        _, img = tmp_workdir
+        r = run_tool("wrong-stride", "wrong-stride.py", [img, "--width", "0"])
+        assert r.returncode != 0
+
+
+def _loop_reference(pixels, offset):
+    """The original byte-at-a-time implementation."""
+    h, w, _ = pixels.shape
+    flat = pixels.flatten()
+    row_bytes = w * 3
+    total = len(flat)
+    out = np.zeros_like(pixels)
+    for r in range(h):
+        start = (r * row_bytes + r * offset * 3) % total
+        out[r] = flat[(start + np.arange(row_bytes)) % total].reshape(w, 3)
+    return out
+
+
+class TestWrongStrideKernel:
+    @pytest.mark.parametrize("offset", [0, 1, 3, -7, 500, -100000])
+    @pytest.mark.parametrize("shape", [(32, 45, 3), (1, 7, 3), (9, 1, 3)])
+    def test_matches_loop(self, shape, offset):
+        pixels = np.random.default_rng(0).integers(0, 256, shape, dtype=np.uint8)
+        assert np.array_equal(opimg.apply("wrong-stride", pixels, offset=offset), _loop_reference(pixels, offset))
+
+    def test_byte_offset_misaligns_channels(self):
+        pixels = np.arange(4 * 5 * 3, dtype=np.uint8).reshape(4, 5, 3)
+        out = opimg.apply("wrong-stride", pixels, offset=0, byte_offset=1)
+        # Row r starts r * (15 + 1) bytes in, so row 1 begins with G of its first pixel
+        assert out[1, 0].tolist() == [16, 17, 18]
+        assert out[0].tolist() == pixels[0].tolist()
+
+    def test_width(self):
+        pixels = np.arange(4 * 6 * 3, dtype=np.uint8).reshape(4, 6, 3)
+        out = opimg.apply("wrong-stride", pixels, offset=0, width=8)
+        assert out.shape == (3, 8, 3)
+        assert np.array_equal(out.reshape(-1), pixels.reshape(-1))
+
+    @pytest.mark.parametrize("bpp, height", [(1, 12), (2, 6), (4, 3)])
+    def test_bpp(self, bpp, height):
+        pixels = np.arange(4 * 4 * 3, dtype=np.uint8).reshape(4, 4, 3)
+        out = opimg.apply("wrong-stride", pixels, offset=0, bpp=bpp)
+        assert out.shape == (height, 4, 3)
+        # Pixel 1 is the second bpp-byte group: its first three bytes, or its first byte as grey
+        assert out[0, 1].tolist() == (list(range(bpp, bpp + 3)) if bpp >= 3 else [bpp] * 3)